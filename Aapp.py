@@ -1,264 +1,34 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, date
+from datetime import date
 import numpy as np
-import json
-import os
-from google.oauth2.service_account import Credentials
-import gspread
 import time
-import requests
 from streamlit_autorefresh import st_autorefresh
-
-# Google Sheets Configuration
-SHEET_NAME = "Forex Trading Analytics"
-WORKSHEET_NAME = "Trades"
+from analytics import trader_rankings
+from evaluator import manual_close
+from instruments import INSTRUMENTS, TRADERS
+from perf_panel import get_perf_log_path, perf_debug_enabled, show_perf_panel
+from profiling import RunTrace, get_profiler
+from trade_data import (
+    get_ingest_report, get_live_price, get_live_prices, get_quote_cache, get_twelvedata_config, init_connection,
+    init_price_client, journal_trade_write, latest_data_version, load_trades,
+    queue_trade_updates, setup_google_sheet_silently, start_price_monitor, start_write_queue, sync_sheet
+)
 
 # Real-time update configuration
 REAL_TIME_UPDATE_INTERVAL = 10  # Update every 10 seconds (reduced frequency)
-CACHE_TTL = 30  # Cache data for 30 seconds (longer cache)
-
-# Initialize Google Sheets connection
-@st.cache_resource
-def init_connection():
-    """Initialize connection to Google Sheets"""
-    try:
-        # Try to get credentials from Streamlit secrets
-        credentials = Credentials.from_service_account_info(
-            st.secrets["gcp_service_account"],
-            scopes=[
-                "https://www.googleapis.com/auth/spreadsheets",
-                "https://www.googleapis.com/auth/drive"
-            ]
-        )
-        return gspread.authorize(credentials)
-    except Exception as e:
-        return None
-
-@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
-def load_trades_from_sheets():
-    """Load trades from Google Sheets with optimized caching"""
-    try:
-        gc = init_connection()
-        if gc is None:
-            return load_fallback_data()
-        
-        # Single API call to get all data
-        spreadsheet = gc.open(SHEET_NAME)
-        sheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        all_values = sheet.get_all_values()
-        
-        if not all_values or len(all_values) < 2:
-            return load_fallback_data()
-        
-        # DATA CLEANING: Fix instrument names
-        for i, row in enumerate(all_values):
-            if len(row) > 3:  # Make sure instrument column exists
-                instrument = str(row[3]).strip().upper()
-                # Fix USTECH to US30 for Wallace
-                if instrument == 'USTECH':
-                    all_values[i][3] = 'US30'
-                # Fix other common typos if needed
-                elif instrument == 'NAS100':
-                    all_values[i][3] = 'NAS100'
-                elif instrument == 'SPX500':
-                    all_values[i][3] = 'SPX500'
-        
-        # Continue with existing processing code...
-        processed_records = []
-        for i, row in enumerate(all_values[1:], 1):  # Skip headers
-            if not any(str(cell).strip() for cell in row):
-                continue
-                
-            try:
-                while len(row) < 12:
-                    row.append('')
-                
-                # Only process rows with complete valid data (no outcome required for new trades)
-                if (row[2] and row[3] and row[4] and row[5] and row[6] and 
-                    str(row[2]).strip() not in ['', 'trader'] and 
-                    str(row[3]).strip() not in ['', 'instrument'] and
-                    str(row[4]).strip() not in ['', '0.0', '0']):
-                    
-                    try:
-                        entry_val = float(row[4])
-                        sl_val = float(row[5]) 
-                        target_val = float(row[6])
-                        
-                        # Skip if all prices are zero
-                        if entry_val == 0.0 and sl_val == 0.0 and target_val == 0.0:
-                            continue
-                            
-                        # Handle outcome and result - default to "Open" if not set
-                        outcome = str(row[10]).strip() if row[10] and str(row[10]).strip() not in ['', 'outcome'] else "Open"
-                        result = str(row[11]).strip() if row[11] and str(row[11]).strip() not in ['', 'result'] else "Open"
-                        
-                        processed_record = {
-                            'id': int(row[0]) if row[0] and str(row[0]).strip().isdigit() else i,
-                            'date': str(row[1]).strip() if row[1] else '',
-                            'trader': str(row[2]).strip(),
-                            'instrument': str(row[3]).strip(),
-                            'entry': entry_val,
-                            'sl': sl_val,
-                            'target': target_val,
-                            'risk': float(row[7]) if row[7] and str(row[7]).replace('.', '').replace('-', '').isdigit() else abs(entry_val - sl_val),
-                            'reward': float(row[8]) if row[8] and str(row[8]).replace('.', '').replace('-', '').isdigit() else abs(target_val - entry_val),
-                            'rrRatio': float(row[9]) if row[9] and str(row[9]).replace('.', '').replace('-', '').isdigit() else 0.0,
-                            'outcome': outcome,
-                            'result': result
-                        }
-                        processed_records.append(processed_record)
-                    except (ValueError, TypeError):
-                        continue
-                    
-            except (ValueError, TypeError, IndexError):
-                continue
-        
-        return processed_records if processed_records else load_fallback_data()
-        
-    except:
-        return load_fallback_data()
-
-def save_trade_to_sheets(trade_data):
-    """Save a single trade to Google Sheets - optimized for speed"""
-    try:
-        gc = init_connection()
-        if gc is None:
-            return False
-        
-        spreadsheet = gc.open(SHEET_NAME)
-        sheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        
-        # Prepare row data efficiently
-        row_data = [
-            str(trade_data['id']), str(trade_data['date']), str(trade_data['trader']),
-            str(trade_data['instrument']), float(trade_data['entry']), float(trade_data['sl']),
-            float(trade_data['target']), float(trade_data['risk']), float(trade_data['reward']),
-            float(trade_data['rrRatio']), str(trade_data['outcome']), str(trade_data['result'])
-        ]
-        
-        # Single API call
-        sheet.append_row(row_data, value_input_option='RAW')
-        return True
-        
-    except:
-        return False
-
-def update_trade_in_sheets(trade_data):
-    """Update an existing trade in Google Sheets"""
-    try:
-        gc = init_connection()
-        if gc is None:
-            return False
-        
-        spreadsheet = gc.open(SHEET_NAME)
-        sheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        
-        # Find the trade by ID
-        cell = sheet.find(str(trade_data['id']))
-        if cell and cell.col == 1:  # Found in ID column
-            # Update the entire row
-            row_data = [
-                str(trade_data['id']), str(trade_data['date']), str(trade_data['trader']),
-                str(trade_data['instrument']), float(trade_data['entry']), float(trade_data['sl']),
-                float(trade_data['target']), float(trade_data['risk']), float(trade_data['reward']),
-                float(trade_data['rrRatio']), str(trade_data['outcome']), str(trade_data['result'])
-            ]
-            
-            # Update the row
-            for col, value in enumerate(row_data, 1):
-                sheet.update_cell(cell.row, col, value)
-            return True
-        return False
-        
-    except:
-        return False
-
-def delete_trade_from_sheets(trade_id):
-    """Delete a trade from Google Sheets - optimized for speed"""
-    try:
-        gc = init_connection()
-        if gc is None:
-            return False
-        
-        spreadsheet = gc.open(SHEET_NAME)
-        sheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        
-        # Find and delete in single operation
-        cell = sheet.find(str(trade_id))
-        if cell and cell.col == 1:
-            sheet.delete_rows(cell.row)
-            return True
-        return False
-        
-    except:
-        return False
-
-def setup_google_sheet_silently():
-    """Set up the Google Sheet with proper headers if it doesn't exist - runs silently in background"""
-    try:
-        gc = init_connection()
-        if gc is None:
-            return False
-        
-        # Step 1: Handle the spreadsheet
-        try:
-            spreadsheet = gc.open(SHEET_NAME)
-        except gspread.SpreadsheetNotFound:
-            # Create new spreadsheet
-            spreadsheet = gc.create(SHEET_NAME)
-        
-        # Step 2: Handle the worksheet
-        try:
-            worksheet = spreadsheet.worksheet(WORKSHEET_NAME)
-        except gspread.WorksheetNotFound:
-            # Create new worksheet named "Trades"
-            worksheet = spreadsheet.add_worksheet(title=WORKSHEET_NAME, rows=1000, cols=12)
-        
-        # Step 3: Setup headers
-        try:
-            headers = worksheet.row_values(1)
-            expected_headers = ['id', 'date', 'trader', 'instrument', 'entry', 'sl', 'target', 'risk', 'reward', 'rrRatio', 'outcome', 'result']
-            
-            if not headers or len(headers) == 0 or headers != expected_headers:
-                # Clear first row and set proper headers
-                worksheet.clear()  # Clear the worksheet first
-                worksheet.append_row(expected_headers)
-            
-        except Exception as e:
-            # Try to add headers anyway
-            try:
-                headers = ['id', 'date', 'trader', 'instrument', 'entry', 'sl', 'target', 'risk', 'reward', 'rrRatio', 'outcome', 'result']
-                worksheet.append_row(headers)
-            except:
-                pass
-        
-        return True
-        
-    except:
-        return False
 
-def load_fallback_data():
-    """Load fallback data when Google Sheets is not available"""
-    return [
-        { 'id': 1, 'date': '2023-10-08', 'trader': 'Waithaka', 'instrument': 'XAUUSD', 'entry': 1820.50, 'sl': 1815.00, 'target': 1830.00, 'risk': 5.50, 'reward': 9.50, 'rrRatio': 1.73, 'outcome': 'Target Hit', 'result': 'Win' },
-        { 'id': 2, 'date': '2023-10-07', 'trader': 'Wallace', 'instrument': 'USOIL', 'entry': 89.30, 'sl': 88.50, 'target': 91.00, 'risk': 0.80, 'reward': 1.70, 'rrRatio': 2.13, 'outcome': 'SL Hit', 'result': 'Loss' },
-        { 'id': 3, 'date': '2023-10-06', 'trader': 'Max', 'instrument': 'BTCUSD', 'entry': 27450.00, 'sl': 27200.00, 'target': 27800.00, 'risk': 250.00, 'reward': 350.00, 'rrRatio': 1.40, 'outcome': 'Open', 'result': 'Open' },
-        { 'id': 4, 'date': '2023-10-05', 'trader': 'Waithaka', 'instrument': 'EURUSD', 'entry': 1.06250, 'sl': 1.06000, 'target': 1.06700, 'risk': 0.00250, 'reward': 0.00450, 'rrRatio': 1.80, 'outcome': 'Open', 'result': 'Open' },
-        { 'id': 5, 'date': '2023-10-04', 'trader': 'Wallace', 'instrument': 'US30', 'entry': 34500.00, 'sl': 34200.00, 'target': 34900.00, 'risk': 300.00, 'reward': 400.00, 'rrRatio': 1.33, 'outcome': 'Open', 'result': 'Open' }
-    ]
+# Recent Trade Setups paging: cards carry buttons so pages stay short, the table can show more
+RECENT_PAGE_SIZES = {'Cards': [10, 25, 50], 'Table': [50, 100, 250, 500]}
 
 # Real-time update functions
 def force_refresh_data():
     """Force refresh data from Google Sheets and update session state - optimized"""
     try:
-        # Clear cache and get fresh data
-        st.cache_data.clear()
-        fresh_data = load_trades_from_sheets()
-        st.session_state.trades = fresh_data
-        st.session_state.last_data_hash = hash(str(fresh_data))  # Track changes
+        # Pull sheet changes now; only a real change moves the data version and misses the cache
+        sync_sheet()
+        fresh_store, st.session_state.data_version = load_trades()
+        st.session_state.trade_store = fresh_store
+        st.session_state.last_data_hash = fresh_store.fingerprint()  # Track changes
         return True
     except:
         return False
@@ -277,166 +47,63 @@ def auto_refresh_trades():
         st.session_state.last_auto_refresh = time.time()
         
         try:
-            # Get fresh data without clearing cache immediately
-            fresh_data = load_trades_from_sheets()
-            current_hash = hash(str(fresh_data))
+            # Once the cached copy expires this re-syncs the sheet and bumps the version on changes
+            if st.session_state.get('data_version') == latest_data_version():
+                return
+            
+            fresh_store, st.session_state.data_version = load_trades()
+            current_hash = fresh_store.fingerprint()
             
             # Only update if data actually changed
             if st.session_state.last_data_hash != current_hash:
-                st.session_state.trades = fresh_data
+                st.session_state.trade_store = fresh_store
                 st.session_state.last_data_hash = current_hash
                 st.rerun()
         except:
             pass
 
-def normalize_symbol(pair: str) -> str:
-    """Convert pair formats (EURUSD or BTCUSD) => 'EUR/USD' or 'BTC/USD'"""
-    pair = pair.strip().upper()
-    if "/" in pair:
-        return pair
-    if len(pair) >= 6:
-        return f"{pair[:3]}/{pair[3:]}"
-    return pair
-
-def get_live_price(pair: str) -> float:
-    """Get live price from Twelve Data API"""
-    symbol = normalize_symbol(pair)
-    
-    try:
-        api_key = st.secrets.get("twelvedata", {}).get("api_key")
-    except:
-        return None
-    
-    if not api_key:
-        return None
-
-    url = "https://api.twelvedata.com/price"
-    try:
-        resp = requests.get(
-            url, 
-            params={"symbol": symbol, "apikey": api_key}, 
-            timeout=10
-        )
-        data = resp.json()
-        
-        if "price" in data:
-            return float(data["price"])
-        return None
-    except:
-        return None
-
 def check_and_update_trades():
     """Check live prices and update trade outcomes"""
-    if not st.session_state.trades:
+    store = st.session_state.trade_store
+    if not len(store):
         return 0
     
-    updates_made = 0
+    # Fetch every distinct open instrument in one batched request
+    live_prices = get_live_prices(store.open_instruments())
     
-    for i, trade in enumerate(st.session_state.trades):
-        # Skip already closed trades
-        if trade.get("outcome") in ("Target Hit", "SL Hit", "Manual Close"):
-            continue
-        
-        symbol = trade.get("instrument", "")
-        if not symbol:
-            continue
-        
-        # Get live price
-        live_price = get_live_price(symbol)
-        if live_price is None:
-            continue
-        
-        # Get trade parameters
-        entry_price = float(trade.get("entry", 0))
-        sl_price = float(trade.get("sl", 0))
-        target_price = float(trade.get("target", 0))
-        
-        if entry_price == 0 or (sl_price == 0 and target_price == 0):
-            continue
-        
-        # Determine trade direction and check for hits
-        is_long_trade = target_price > entry_price
-        trade_updated = False
-        
-        if is_long_trade:
-            # Long trade
-            if target_price > 0 and live_price >= target_price:
-                st.session_state.trades[i]["outcome"] = "Target Hit"
-                st.session_state.trades[i]["result"] = "Win"
-                trade_updated = True
-            elif sl_price > 0 and live_price <= sl_price:
-                st.session_state.trades[i]["outcome"] = "SL Hit"
-                st.session_state.trades[i]["result"] = "Loss"
-                trade_updated = True
-        else:
-            # Short trade
-            if target_price > 0 and live_price <= target_price:
-                st.session_state.trades[i]["outcome"] = "Target Hit"
-                st.session_state.trades[i]["result"] = "Win"
-                trade_updated = True
-            elif sl_price > 0 and live_price >= sl_price:
-                st.session_state.trades[i]["outcome"] = "SL Hit"
-                st.session_state.trades[i]["result"] = "Loss"
-                trade_updated = True
-        
-        if trade_updated:
-            updates_made += 1
-            # Update in sheets immediately
-            if st.session_state.sheets_connected:
-                update_trade_in_sheets(st.session_state.trades[i])
+    # Evaluate every open trade at once straight from the store's columns
+    updated_trades = store.close_hits(store.find_hits(live_prices))
+    
+    # Journal the outcomes; the background writer pushes them in one batch
+    if updated_trades and st.session_state.sheets_connected:
+        queue_trade_updates(updated_trades)
     
-    return updates_made
+    return len(updated_trades)
+
+def apply_monitor_results(monitor):
+    """Merge hits published by the background monitor into session state"""
+    version, hits = monitor.hits_since(st.session_state.get('monitor_version', 0))
+    st.session_state.monitor_version = version
+    
+    store = st.session_state.trade_store
+    applied = store.close_hits((trade_id, hit['outcome'], hit['result']) for trade_id, hit in hits.items())
+    return len(applied)
 
 def close_trade(trade_id, close_type="manual", current_price=None):
     """Close a trade and calculate P&L based on current price"""
     try:
-        # Force complete data refresh
-        st.cache_data.clear()
-        fresh_data = load_trades_from_sheets()
-        st.session_state.trades = fresh_data
-        
         # Find and update the trade
-        trade_updated = False
-        for i, trade in enumerate(st.session_state.trades):
-            if trade['id'] == trade_id:
-                if close_type == "manual" and current_price is not None:
-                    # Calculate actual P&L based on current price
-                    entry = trade['entry']
-                    sl = trade['sl']
-                    target = trade['target']
-                    
-                    is_long = target > entry
-                    
-                    if is_long:
-                        # Long trade: profit if current > entry
-                        pnl = current_price - entry
-                    else:
-                        # Short trade: profit if entry > current
-                        pnl = entry - current_price
-                    
-                    # Store the close price in the outcome field
-                    st.session_state.trades[i]['outcome'] = f'Manual Close @ {current_price:.5f}'
-                    
-                    # Determine if win or loss and store actual P&L
-                    if pnl > 0:
-                        st.session_state.trades[i]['result'] = 'Win'
-                        st.session_state.trades[i]['reward'] = abs(pnl)  # Actual profit
-                    elif pnl < 0:
-                        st.session_state.trades[i]['result'] = 'Loss'
-                        st.session_state.trades[i]['risk'] = abs(pnl)  # Actual loss
-                    else:
-                        st.session_state.trades[i]['result'] = 'Breakeven'
-                else:
-                    # Couldn't get price - mark as breakeven
-                    st.session_state.trades[i]['outcome'] = 'Manual Close @ N/A'
-                    st.session_state.trades[i]['result'] = 'Breakeven'
-                
-                trade_updated = True
-                
-                # Update Google Sheets
-                if st.session_state.sheets_connected:
-                    update_trade_in_sheets(st.session_state.trades[i])
-                break
+        store = st.session_state.trade_store
+        trade = store.get(trade_id)
+        trade_updated = trade is not None
+        if trade_updated:
+            # Actual P&L at the current price; without a price it closes as breakeven
+            changes = manual_close(trade, current_price if close_type == "manual" else None)
+            store.update(trade_id, **changes)
+            
+            # Journal for Google Sheets; the session already shows the close
+            if st.session_state.sheets_connected:
+                journal_trade_write("update", store.get(trade_id))
         
         if trade_updated:
             st.success(f"✅ Trade #{trade_id} closed!")
@@ -449,16 +116,45 @@ def close_trade(trade_id, close_type="manual", current_price=None):
         st.error(f"❌ Error: {str(e)}")
         return False
 
+def adjust_trade_sl_tp(trade_id, new_sl, new_tp):
+    """Move an open trade's stop loss and take profit, recomputing risk and reward"""
+    store = st.session_state.trade_store
+    trade = store.get(trade_id)
+    if trade is None:
+        return False
+    
+    entry = float(trade['entry'])
+    risk = abs(entry - float(new_sl))
+    reward = abs(float(new_tp) - entry)
+    
+    store.update(
+        trade_id,
+        sl=float(new_sl),
+        target=float(new_tp),
+        risk=risk,
+        reward=reward,
+        rrRatio=round(reward / risk, 2) if risk > 0 else 0
+    )
+    
+    if st.session_state.sheets_connected:
+        journal_trade_write("update", store.get(trade_id))
+    return True
+
 # Page configuration
 st.set_page_config(
     page_title="The War Zone - Forex Trading Analytics",
     page_icon="⚔️",
     layout="wide",
-    initial_sidebar_state="collapsed"
+    initial_sidebar_state="expanded" if perf_debug_enabled() else "collapsed"
 )
 
-# Custom CSS
-st.markdown("""
+# Section timings for this run (shown in the sidebar with ?debug=1)
+trace = RunTrace(get_profiler(), "Dashboard")
+try:  # finally: a run that ends in st.rerun()/st.switch_page() still records its total
+    trace.section("styles")
+
+    # Custom CSS
+    st.markdown("""
 <style>
     .stApp {
         background-color: #f3f4f6;
@@ -590,27 +286,31 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state with optimized data loading
-if 'trades' not in st.session_state:
-    st.session_state.trades = load_trades_from_sheets()
-    st.session_state.last_data_hash = hash(str(st.session_state.trades))
+    # Initialize session state with optimized data loading
+    trace.section("data load")
+    if 'trade_store' not in st.session_state:
+        st.session_state.trade_store, st.session_state.data_version = load_trades()
+        st.session_state.last_data_hash = st.session_state.trade_store.fingerprint()
+
+    trade_store = st.session_state.trade_store
     
-if 'sheets_connected' not in st.session_state:
-    connection = init_connection()
-    st.session_state.sheets_connected = connection is not None
-    # Silently setup Google Sheets if connected (non-blocking)
-    if st.session_state.sheets_connected:
-        try:
-            setup_google_sheet_silently()
-        except:
-            pass
+    if 'sheets_connected' not in st.session_state:
+        connection = init_connection()
+        st.session_state.sheets_connected = connection is not None
+        # Silently setup Google Sheets if connected (non-blocking)
+        if st.session_state.sheets_connected:
+            try:
+                setup_google_sheet_silently()
+            except:
+                pass
 
-# Optimized real-time updates
-if st.session_state.sheets_connected:
-    auto_refresh_trades()
+    # Optimized real-time updates
+    if st.session_state.sheets_connected:
+        auto_refresh_trades()
 
-# Header - The War Zone
-st.markdown("""
+    # Header - The War Zone
+    trace.section("header & refresh")
+    st.markdown("""
 <div class="war-zone-header">
     <h1 class="war-zone-title">THE WAR ZONE</h1>
     <p class="war-zone-subtitle">"Don't be afraid to give up the good to go for the great."</p>
@@ -618,49 +318,62 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-st.markdown('<div class="main-content">', unsafe_allow_html=True)
+    st.markdown('<div class="main-content">', unsafe_allow_html=True)
 
-# Refresh Controls at the top
-refresh_col1, refresh_col2, refresh_col3 = st.columns([1, 2, 1])
+    # Refresh Controls at the top
+    refresh_col1, refresh_col2, refresh_col3 = st.columns([1, 2, 1])
 
-with refresh_col2:
-    refresh_container = st.container()
-    with refresh_container:
-        button_col, timer_col = st.columns([1, 2])
+    with refresh_col2:
+        refresh_container = st.container()
+        with refresh_container:
+            button_col, timer_col = st.columns([1, 2])
         
-        with button_col:
-            if st.button("🔄 Refresh Data", type="primary", use_container_width=True):
-                with st.spinner("Refreshing..."):
-                    force_refresh_data()
-                    st.success("Data refreshed!")
-                    time.sleep(1)
-                    st.rerun()
+            with button_col:
+                if st.button("🔄 Refresh Data", type="primary", use_container_width=True):
+                    with st.spinner("Refreshing..."):
+                        with trace.timed("force refresh"):
+                            force_refresh_data()
+                        st.success("Data refreshed!")
+                        time.sleep(1)
+                        st.rerun()
         
-        with timer_col:
-            if st.session_state.sheets_connected:
-                # Calculate time until next auto-refresh
-                time_since_last = time.time() - st.session_state.get('last_auto_refresh', 0)
-                time_until_next = max(0, REAL_TIME_UPDATE_INTERVAL - time_since_last)
+            with timer_col:
+                if st.session_state.sheets_connected:
+                    # Calculate time until next auto-refresh
+                    time_since_last = time.time() - st.session_state.get('last_auto_refresh', 0)
+                    time_until_next = max(0, REAL_TIME_UPDATE_INTERVAL - time_since_last)
                 
-                if time_until_next > 0:
-                    minutes = int(time_until_next // 60)
-                    seconds = int(time_until_next % 60)
-                    if minutes > 0:
-                        next_refresh_text = f"Next auto-refresh in {minutes}m {seconds}s"
+                    if time_until_next > 0:
+                        minutes = int(time_until_next // 60)
+                        seconds = int(time_until_next % 60)
+                        if minutes > 0:
+                            next_refresh_text = f"Next auto-refresh in {minutes}m {seconds}s"
+                        else:
+                            next_refresh_text = f"Next auto-refresh in {seconds}s"
                     else:
-                        next_refresh_text = f"Next auto-refresh in {seconds}s"
-                else:
-                    next_refresh_text = "Auto-refreshing now..."
+                        next_refresh_text = "Auto-refreshing now..."
                 
-                st.markdown(f"""
+                    st.markdown(f"""
                 <div style="display: flex; align-items: center; height: 2.5rem; padding-left: 1rem;">
                     <span style="color: #10b981; font-size: 0.875rem; font-weight: 500;">
                         ⚡ {next_refresh_text}
                     </span>
                 </div>
                 """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
+                
+                    skipped_rows = {rule: count for rule, count in get_ingest_report().items() if count}
+                    if skipped_rows:
+                        st.caption("🧹 Skipped sheet rows: " + ", ".join(f"{count} {rule.replace('_', ' ')}" for rule, count in skipped_rows.items()))
+                
+                    write_status = start_write_queue().snapshot()
+                    if write_status['pending'] or write_status['last_error']:
+                        st.caption(f"📝 {write_status['pending']} change(s) waiting to sync to Google Sheets"
+                                   + (f" • retrying: {write_status['last_error']}" if write_status['last_error'] else ""))
+                    if write_status['unmatched']:
+                        st.caption("⚠️ Kept in the journal, trade not found in the sheet: "
+                                   + ", ".join(f"#{trade_id}" for trade_id in write_status['unmatched']))
+                else:
+                    st.markdown("""
                 <div style="display: flex; align-items: center; height: 2.5rem; padding-left: 1rem;">
                     <span style="color: #6b7280; font-size: 0.875rem;">
                         📱 Local mode - Manual refresh only
@@ -668,33 +381,42 @@ with refresh_col2:
                 </div>
                 """, unsafe_allow_html=True)
 
-st.markdown("---")
+    st.markdown("---")
 
-# Live Price Monitoring
-st.markdown("### 📊 Live Price Monitor")
+    # Live Price Monitoring
+    trace.section("live monitor")
+    st.markdown("### 📊 Live Price Monitor")
 
-monitor_col1, monitor_col2, monitor_col3 = st.columns([1, 1, 1])
-
-with monitor_col1:
     try:
         api_key_available = bool(st.secrets.get("twelvedata", {}).get("api_key"))
     except:
         api_key_available = False
-    
-    if api_key_available:
-        if st.button("🔍 Check Live Prices", type="secondary", use_container_width=True):
-            with st.spinner("Checking market prices..."):
-                updates = check_and_update_trades()
-                if updates > 0:
-                    st.success(f"✅ Updated {updates} trade(s)!")
-                    time.sleep(1)
-                    st.rerun()
-                else:
-                    st.info("ℹ️ No trades updated")
-    else:
-        st.button("🔑 API Key Required", disabled=True, use_container_width=True)
-        with st.expander("Setup Instructions"):
-            st.markdown("""
+
+    # Background monitor polls and writes hits to the sheet; the page only reads its results
+    price_monitor = None
+    monitor_updates = 0
+    if api_key_available and st.session_state.sheets_connected:
+        price_monitor = start_price_monitor()
+        monitor_updates = apply_monitor_results(price_monitor)
+
+    monitor_col1, monitor_col2, monitor_col3 = st.columns([1, 1, 1])
+
+    with monitor_col1:
+        if api_key_available:
+            if st.button("🔍 Check Live Prices", type="secondary", use_container_width=True):
+                with st.spinner("Checking market prices..."):
+                    with trace.timed("check live prices"):
+                        updates = check_and_update_trades()
+                    if updates > 0:
+                        st.success(f"✅ Updated {updates} trade(s)!")
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.info("ℹ️ No trades updated")
+        else:
+            st.button("🔑 API Key Required", disabled=True, use_container_width=True)
+            with st.expander("Setup Instructions"):
+                st.markdown("""
             **To enable live price monitoring:**
             1. Sign up at [twelvedata.com](https://twelvedata.com) 
             2. Get your free API key
@@ -702,61 +424,93 @@ with monitor_col1:
             ```toml
             [twelvedata]
             api_key = "your_key_here"
+            stream = true  # optional: live ticks over WebSocket instead of polling
             ```
             """)
 
-with monitor_col2:
-    if api_key_available:
-        auto_monitor = st.checkbox("🔄 Auto-monitor trades")
-        if auto_monitor:
-            check_interval = st.selectbox("Check every:", [15, 30, 60, 120], format_func=lambda x: f"{x} seconds")
+    with monitor_col2:
+        if api_key_available:
+            auto_monitor = st.checkbox("🔄 Auto-monitor trades")
+            if auto_monitor:
+                check_interval = st.selectbox("Check every:", [15, 30, 60, 120], format_func=lambda x: f"{x} seconds")
             
-            # Initialize session state for auto-refresh counter
-            if 'auto_refresh_count' not in st.session_state:
-                st.session_state.auto_refresh_count = 0
+                # Initialize session state for auto-refresh counter
+                if 'auto_refresh_count' not in st.session_state:
+                    st.session_state.auto_refresh_count = 0
             
-            # Auto-refresh component
-            count = st_autorefresh(
-                interval=check_interval * 1000, 
-                key="live_monitor",
-                limit=None
-            )
+                # Auto-refresh component
+                count = st_autorefresh(
+                    interval=check_interval * 1000, 
+                    key="live_monitor",
+                    limit=None
+                )
             
-            # Perform automatic check
-            if count > 0:
-                updates = check_and_update_trades()
-                if updates > 0:
-                    st.success(f"🔔 Auto-updated {updates} trade(s)!")
-                    st.session_state.auto_refresh_count += updates
-
-with monitor_col3:
-    # Show monitoring status
-    open_trades = [t for t in st.session_state.trades if t.get("outcome", "") not in ("Target Hit", "SL Hit")]
-    total_open = len(open_trades)
+                # Perform automatic check (inline only when there is no background monitor)
+                if count > 0 and price_monitor is None:
+                    updates = check_and_update_trades()
+                    if updates > 0:
+                        st.success(f"🔔 Auto-updated {updates} trade(s)!")
+                        st.session_state.auto_refresh_count += updates
+        
+            if monitor_updates > 0:
+                st.success(f"🔔 Background monitor closed {monitor_updates} trade(s)!")
+                st.session_state.auto_refresh_count = st.session_state.get('auto_refresh_count', 0) + monitor_updates
+        
+            if price_monitor is not None:
+                monitor_status = price_monitor.snapshot()
+                last_run = monitor_status['last_run'].strftime('%H:%M:%S') if monitor_status['last_run'] else 'pending'
+                st.caption(f"🛰️ Background monitor {'running' if monitor_status['running'] else 'stopped'} • last check {last_run} • every {price_monitor.interval}s")
+                if monitor_status['bars_checked_to']:
+                    st.caption(f"🕯️ Missed-hit scan covers price history to {monitor_status['bars_checked_to'].strftime('%H:%M')} UTC")
+                for flag in monitor_status['ambiguous']:
+                    st.caption(f"⚠️ Trade #{flag['id']} {flag['instrument']}: the {flag['bar_time'].strftime('%H:%M')} UTC bar crossed both SL and target; left open, close or adjust it by hand")
+                stream_status = monitor_status['stream']
+                if stream_status:
+                    if stream_status['connected']:
+                        last_tick = stream_status['last_tick'].strftime('%H:%M:%S') if stream_status['last_tick'] else 'none yet'
+                        st.caption(f"📡 Streaming {stream_status['subscribed']} instrument(s) • {stream_status['ticks']} ticks • last tick {last_tick}")
+                    else:
+                        st.caption(f"📡 Stream reconnecting ({stream_status['reconnects']} retries) • polling meanwhile")
+                    if stream_status['failed']:
+                        st.caption(f"📡 Not streamed, polled instead: {', '.join(stream_status['failed'])}")
+                if monitor_status['last_error']:
+                    st.caption(f"⚠️ {monitor_status['last_error']}")
+
+    with monitor_col3:
+        # Show monitoring status
+        open_trades = trade_store.df[trade_store.open_mask()]
+        total_open = len(open_trades)
     
-    st.metric("📈 Open Trades", total_open)
+        st.metric("📈 Open Trades", total_open)
     
-    if total_open > 0 and api_key_available:
-        unique_instruments = len(set(t.get('instrument', '') for t in open_trades))
-        unique_traders = len(set(t.get('trader', '') for t in open_trades))
+        if total_open > 0 and api_key_available:
+            unique_instruments = open_trades['instrument'].nunique()
+            unique_traders = open_trades['trader'].nunique()
         
-        st.markdown(f"""
+            api_key, base_url, cache_ttl = get_twelvedata_config()
+            quote_stats = get_quote_cache(cache_ttl).stats()
+            price_latency = init_price_client(api_key, base_url).latency
+        
+            st.markdown(f"""
         <div style="font-size: 0.8rem; color: #666; text-align: center; margin-top: 0.5rem;">
             📊 {unique_instruments} instruments<br>
-            👥 {unique_traders} traders
+            👥 {unique_traders} traders<br>
+            🗄️ Quotes: {quote_stats['hits']} hits • {quote_stats['misses']} misses • {quote_stats['coalesced']} coalesced ({quote_stats['saved_pct']:.0f}% saved)<br>
+            ⏱️ API latency p50 ≤{price_latency.percentile(50):g}s • p95 ≤{price_latency.percentile(95):g}s ({price_latency.count} calls)
         </div>
         """, unsafe_allow_html=True)
-    elif total_open == 0:
-        st.markdown("""
+        elif total_open == 0:
+            st.markdown("""
         <div style="font-size: 0.8rem; color: #999; text-align: center; margin-top: 0.5rem;">
             All trades closed
         </div>
         """, unsafe_allow_html=True)
 
-st.markdown("---")
+    st.markdown("---")
 
-# Add New Trade Section
-st.markdown("""
+    # Add New Trade Section
+    trace.section("trade form")
+    st.markdown("""
 <div class="trade-card">
     <div class="card-header">
         <div style="display: flex; align-items: center;">
@@ -775,230 +529,204 @@ st.markdown("""
     <div class="card-body">
 """, unsafe_allow_html=True)
 
-# Information box
-st.info("💡 Enter your trade setup details below. The system will automatically monitor live prices and update outcomes when your target or stop loss is hit.")
-
-# First Row of Form
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.markdown('<div class="form-group"><label>Trader</label></div>', unsafe_allow_html=True)
-    trader = st.selectbox("", ["Select Trader", "Waithaka", "Wallace", "Max"], key="trader_select", label_visibility="collapsed")
-
-with col2:
-    st.markdown('<div class="form-group"><label>Instrument</label></div>', unsafe_allow_html=True)
-    instrument = st.selectbox("", [
-        "Select Instrument", 
-        "XAUUSD", "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "USDCAD", "AUDUSD", "NZDUSD",
-        "EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY",
-        "USOIL", "BTCUSD", "ETHUSD", "XRPUSD", "ADAUSD",
-        "US30", "NAS100", "SPX500", "FTSE100", "DAX30",
-        "NGAS", "COPPER", "SILVER", "XAGUSD", "USTECH"
-    ], key="instrument_select", label_visibility="collapsed")
-
-with col3:
-    st.markdown('<div class="form-group"><label>Entry Price</label></div>', unsafe_allow_html=True)
-    entry_price = st.number_input("", min_value=0.0, format="%.5f", key="entry_input", label_visibility="collapsed")
-
-with col4:
-    st.markdown('<div class="form-group"><label>Date</label></div>', unsafe_allow_html=True)
-    trade_date = st.date_input("", value=date.today(), key="date_input", label_visibility="collapsed")
-
-# Second Row of Form
-col5, col6, col7, col8 = st.columns(4)
-
-with col5:
-    st.markdown('<div class="form-group"><label>Stop Loss (SL)</label></div>', unsafe_allow_html=True)
-    sl_price = st.number_input("", min_value=0.0, format="%.5f", key="sl_input", label_visibility="collapsed")
-
-with col6:
-    st.markdown('<div class="form-group"><label>Target Price</label></div>', unsafe_allow_html=True)
-    target_price = st.number_input("", min_value=0.0, format="%.5f", key="target_input", label_visibility="collapsed")
-
-with col7:
-    # Calculate and display risk automatically
-    if entry_price > 0 and sl_price > 0:
-        risk = abs(entry_price - sl_price)
-        st.markdown(f'<div class="form-group"><label>Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">{risk:.5f}</div></div>', unsafe_allow_html=True)
-    else:
-        st.markdown('<div class="form-group"><label>Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">0.00000</div></div>', unsafe_allow_html=True)
-
-with col8:
-    # Calculate and display reward automatically
-    if entry_price > 0 and target_price > 0:
-        reward = abs(target_price - entry_price)
-        rr_ratio = reward / risk if risk > 0 else 0
-        st.markdown(f'<div class="form-group"><label>Reward/Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">{rr_ratio:.2f}</div></div>', unsafe_allow_html=True)
-    else:
-        st.markdown('<div class="form-group"><label>Reward/Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">0.00</div></div>', unsafe_allow_html=True)
-
-# Submit Button
-submit_col1, submit_col2, submit_col3 = st.columns([1, 2, 1])
-
-with submit_col2:
-    if st.button("🎯 Submit Trade Setup", type="primary", use_container_width=True):
-        # Validation
-        if trader == "Select Trader":
-            st.error("Please select a trader")
-        elif instrument == "Select Instrument":
-            st.error("Please select an instrument")
-        elif entry_price <= 0:
-            st.error("Please enter a valid entry price")
-        elif sl_price <= 0:
-            st.error("Please enter a valid stop loss")
-        elif target_price <= 0:
-            st.error("Please enter a valid target price")
-        elif sl_price == target_price:
-            st.error("Stop loss and target cannot be the same")
-        else:
-            # Create new trade
-            new_trade = {
-                'id': max([t['id'] for t in st.session_state.trades], default=0) + 1,
-                'date': trade_date.strftime("%Y-%m-%d"),
-                'trader': trader,
-                'instrument': instrument,
-                'entry': float(entry_price),
-                'sl': float(sl_price),
-                'target': float(target_price),
-                'risk': abs(float(entry_price) - float(sl_price)),
-                'reward': abs(float(target_price) - float(entry_price)),
-                'rrRatio': round(abs(float(target_price) - float(entry_price)) / abs(float(entry_price) - float(sl_price)), 2) if abs(float(entry_price) - float(sl_price)) > 0 else 0,
-                'outcome': "Open",
-                'result': "Open"
-            }
-            
-            # Save to Google Sheets if connected, otherwise to session state
-            if st.session_state.sheets_connected:
-                success = save_trade_to_sheets(new_trade)
-                if success:
-                    st.session_state.trades.append(new_trade)
-                    st.success("Trade setup saved successfully!")
-                    # Clear form by rerunning
-                    time.sleep(1)
-                    st.rerun()
-                else:
-                    st.error("Failed to save trade to Google Sheets")
-            else:
-                st.session_state.trades.append(new_trade)
-                st.success("Trade setup saved locally!")
-                # Clear form by rerunning
-                time.sleep(1)
-                st.rerun()
-
-st.markdown("</div></div>", unsafe_allow_html=True)
-
-st.markdown("---")
+    # Information box
+    st.info("💡 Enter your trade setup details below. The system will automatically monitor live prices and update outcomes when your target or stop loss is hit.")
 
-# Trading Analytics Dashboard
-st.markdown("### 📈 Trading Analytics Dashboard")
+    # First Row of Form
+    col1, col2, col3, col4 = st.columns(4)
 
-# Calculate metrics
-total_trades = len(st.session_state.trades)
-closed_trades = [t for t in st.session_state.trades if t['outcome'] in ['Target Hit', 'SL Hit']]
-open_trades = [t for t in st.session_state.trades if t['outcome'] == 'Open']
-manual_closures = [t for t in st.session_state.trades if t['outcome'] == 'Manual Close']
-winning_trades = [t for t in closed_trades if t['result'] == 'Win']
+    with col1:
+        st.markdown('<div class="form-group"><label>Trader</label></div>', unsafe_allow_html=True)
+        trader = st.selectbox("", ["Select Trader", *TRADERS], key="trader_select", label_visibility="collapsed")
 
-# Calculate win rate AFTER defining the variables
-win_rate = len(winning_trades) / len(closed_trades) * 100 if closed_trades else 0
-avg_rr = np.mean([t['rrRatio'] for t in closed_trades]) if closed_trades else 0
-total_pnl = sum([t['reward'] if t['result'] == 'Win' else -t['risk'] for t in closed_trades])
+    with col2:
+        st.markdown('<div class="form-group"><label>Instrument</label></div>', unsafe_allow_html=True)
+        instrument = st.selectbox("", ["Select Instrument", *INSTRUMENTS], key="instrument_select", label_visibility="collapsed")
 
-# Display metrics
-metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    with col3:
+        st.markdown('<div class="form-group"><label>Entry Price</label></div>', unsafe_allow_html=True)
+        entry_price = st.number_input("", min_value=0.0, format="%.5f", key="entry_input", label_visibility="collapsed")
 
-with metric_col1:
-    st.metric("Total Trades", total_trades, f"{len(open_trades)} open")
+    with col4:
+        st.markdown('<div class="form-group"><label>Date</label></div>', unsafe_allow_html=True)
+        trade_date = st.date_input("", value=date.today(), key="date_input", label_visibility="collapsed")
 
-with metric_col2:
-    st.metric("Market Closures", len(closed_trades), f"{len(manual_closures)} manual")
+    # Second Row of Form
+    col5, col6, col7, col8 = st.columns(4)
 
-with metric_col3:
-    st.metric("Win Rate", f"{win_rate:.1f}%", f"{len(winning_trades)}/{len(closed_trades)}" if closed_trades else "0/0")
+    with col5:
+        st.markdown('<div class="form-group"><label>Stop Loss (SL)</label></div>', unsafe_allow_html=True)
+        sl_price = st.number_input("", min_value=0.0, format="%.5f", key="sl_input", label_visibility="collapsed")
 
-with metric_col4:
-    st.metric("Total P&L", f"{total_pnl:+.2f}", "Market trades")
+    with col6:
+        st.markdown('<div class="form-group"><label>Target Price</label></div>', unsafe_allow_html=True)
+        target_price = st.number_input("", min_value=0.0, format="%.5f", key="target_input", label_visibility="collapsed")
 
-st.markdown("---")
-# DEBUG FUNCTION - ADD THIS RIGHT HERE
-def debug_close_trade(trade_id):
-    """Debug version to see what's happening"""
-    try:
-        st.write("🔍 DEBUG: Starting close_trade function")
-        st.write(f"🔍 DEBUG: Looking for trade ID: {trade_id}")
-        
-        # Show current trades
-        st.write("🔍 DEBUG: Current trades in session state:")
-        for i, trade in enumerate(st.session_state.trades):
-            st.write(f"  Trade {i}: ID={trade['id']}, Outcome={trade['outcome']}")
-            if trade['id'] == trade_id:
-                st.write(f"  ✅ FOUND TRADE TO CLOSE: {trade}")
-        
-        # Try to close the trade
-        for i, trade in enumerate(st.session_state.trades):
-            if trade['id'] == trade_id:
-                st.write("🔍 DEBUG: Updating trade outcome...")
-                st.session_state.trades[i]['outcome'] = 'Manual Close'
-                st.session_state.trades[i]['result'] = 'Closed'
-                
-                st.write("🔍 DEBUG: After update:")
-                st.write(f"  Trade now: {st.session_state.trades[i]}")
-                
-                # Try to update Google Sheets
+    with col7:
+        # Calculate and display risk automatically
+        if entry_price > 0 and sl_price > 0:
+            risk = abs(entry_price - sl_price)
+            st.markdown(f'<div class="form-group"><label>Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">{risk:.5f}</div></div>', unsafe_allow_html=True)
+        else:
+            st.markdown('<div class="form-group"><label>Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">0.00000</div></div>', unsafe_allow_html=True)
+
+    with col8:
+        # Calculate and display reward automatically
+        if entry_price > 0 and target_price > 0:
+            reward = abs(target_price - entry_price)
+            rr_ratio = reward / risk if risk > 0 else 0
+            st.markdown(f'<div class="form-group"><label>Reward/Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">{rr_ratio:.2f}</div></div>', unsafe_allow_html=True)
+        else:
+            st.markdown('<div class="form-group"><label>Reward/Risk</label><div style="padding: 0.5rem; background: #f8f9fa; border-radius: 0.25rem; margin-top: 0.5rem;">0.00</div></div>', unsafe_allow_html=True)
+
+    # Submit Button
+    submit_col1, submit_col2, submit_col3 = st.columns([1, 2, 1])
+
+    with submit_col2:
+        if st.button("🎯 Submit Trade Setup", type="primary", use_container_width=True):
+            # Validation
+            if trader == "Select Trader":
+                st.error("Please select a trader")
+            elif instrument == "Select Instrument":
+                st.error("Please select an instrument")
+            elif entry_price <= 0:
+                st.error("Please enter a valid entry price")
+            elif sl_price <= 0:
+                st.error("Please enter a valid stop loss")
+            elif target_price <= 0:
+                st.error("Please enter a valid target price")
+            elif sl_price == target_price:
+                st.error("Stop loss and target cannot be the same")
+            else:
+                # Create new trade
+                new_trade = {
+                    'id': trade_store.max_id() + 1,
+                    'date': trade_date.strftime("%Y-%m-%d"),
+                    'trader': trader,
+                    'instrument': instrument,
+                    'entry': float(entry_price),
+                    'sl': float(sl_price),
+                    'target': float(target_price),
+                    'risk': abs(float(entry_price) - float(sl_price)),
+                    'reward': abs(float(target_price) - float(entry_price)),
+                    'rrRatio': round(abs(float(target_price) - float(entry_price)) / abs(float(entry_price) - float(sl_price)), 2) if abs(float(entry_price) - float(sl_price)) > 0 else 0,
+                    'outcome': "Open",
+                    'result': "Open"
+                }
+            
+                # Journal for Google Sheets if connected; the UI updates immediately either way
+                trade_store.append(new_trade)
                 if st.session_state.sheets_connected:
-                    st.write("🔍 DEBUG: Updating Google Sheets...")
-                    success = update_trade_in_sheets(st.session_state.trades[i])
-                    st.write(f"🔍 DEBUG: Google Sheets update result: {success}")
-                
-                st.success("✅ Trade closed successfully!")
-                return True
-        
-        st.error("❌ Trade not found")
-        return False
-        
-    except Exception as e:
-        st.error(f"❌ Error: {str(e)}")
-        return False
-
-# Recent Trades Section
-st.markdown("### 📋 Recent Trade Setups")
+                    journal_trade_write("append", new_trade)
+                    if price_monitor is not None:
+                        price_monitor.wake()  # Start watching the new trade now, not at the next check
+                    st.toast("Trade setup saved successfully!", icon="✅")
+                else:
+                    st.toast("Trade setup saved locally!", icon="✅")
+                # Clear form by rerunning
+                st.rerun()
 
-if st.session_state.trades:
-    recent_trades = sorted(st.session_state.trades, key=lambda x: x['date'], reverse=True)[:10]
+    st.markdown("</div></div>", unsafe_allow_html=True)
+
+    st.markdown("---")
+
+    # Trading Analytics Dashboard
+    trace.section("analytics metrics")
+    st.markdown("### 📈 Trading Analytics Dashboard")
+
+    # Calculate metrics
+    trades_df = trade_store.df
+    total_trades = len(trades_df)
+    closed_trades = trades_df[trades_df['outcome'].isin(['Target Hit', 'SL Hit'])]
+    open_trades = trades_df[trades_df['outcome'] == 'Open']
+    manual_closures = trades_df[trades_df['outcome'] == 'Manual Close']
+    winning_trades = closed_trades[closed_trades['result'] == 'Win']
+
+    # Calculate win rate AFTER defining the variables
+    win_rate = len(winning_trades) / len(closed_trades) * 100 if len(closed_trades) else 0
+    avg_rr = closed_trades['rrRatio'].mean() if len(closed_trades) else 0
+    total_pnl = float(np.where(closed_trades['result'] == 'Win', closed_trades['reward'], -closed_trades['risk']).sum())
+
+    # Display metrics
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+
+    with metric_col1:
+        st.metric("Total Trades", total_trades, f"{len(open_trades)} open")
+
+    with metric_col2:
+        st.metric("Market Closures", len(closed_trades), f"{len(manual_closures)} manual")
+
+    with metric_col3:
+        st.metric("Win Rate", f"{win_rate:.1f}%", f"{len(winning_trades)}/{len(closed_trades)}" if len(closed_trades) else "0/0")
+
+    with metric_col4:
+        st.metric("Total P&L", f"{total_pnl:+.2f}", "Market trades")
+
+    st.markdown("---")
+    # Recent Trades Section
+    trace.section("recent trades")
+    st.markdown("### 📋 Recent Trade Setups")
+
+    if len(trade_store):
+        view_col, size_col, page_col = st.columns([2, 1, 1])
+        with view_col:
+            view_mode = st.radio("View", ['Cards', 'Table'], horizontal=True, key="recent_view")
+        with size_col:
+            page_size = st.selectbox("Per page", RECENT_PAGE_SIZES[view_mode], key=f"recent_page_size_{view_mode}")
+        page_count = max(1, -(-len(trade_store) // page_size))
+        if st.session_state.get("recent_page", 1) > page_count:
+            st.session_state.recent_page = page_count  # History shrank or the page size grew
+        with page_col:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="recent_page")
     
-    for trade in recent_trades:
-        # Determine card color based on outcome
-        if 'Manual Close' in trade['outcome']:
-            border_color = "#8b5cf6"
-            status_emoji = "🏁"
-            show_buttons = False
-            # Extract close price from outcome if available
-            close_price_text = trade['outcome']
-        elif trade['outcome'] == 'Target Hit':
-            border_color = "#10b981"
-            status_emoji = "✅"
-            show_buttons = False
-            close_price_text = f"Target Hit @ {trade['target']:.5f}"
-        elif trade['outcome'] == 'SL Hit':
-            border_color = "#ef4444"
-            status_emoji = "❌"
-            show_buttons = False
-            close_price_text = f"SL Hit @ {trade['sl']:.5f}"
-        else:
-            border_color = "#3b82f6"
-            status_emoji = "⏳"
-            show_buttons = True
-            close_price_text = "Open"
-        
-        # Calculate P&L display
-        if trade['result'] == 'Win':
-            pnl_display = f'<span style="color: #10b981;">+{trade["reward"]:.5f}</span>'
-        elif trade['result'] == 'Loss':
-            pnl_display = f'<span style="color: #ef4444;">-{trade["risk"]:.5f}</span>'
-        else:
-            pnl_display = '<span style="color: #6b7280;">0.00000</span>'
+        # Only the visible page leaves the store; the newest-first order is kept by the store itself
+        first = (page - 1) * page_size
+        visible = trade_store.newest_first(first, first + page_size)
+        st.caption(f"Showing {first + 1}-{first + len(visible)} of {len(trade_store)} trades, newest first")
+        recent_trades = trade_store.records(visible) if view_mode == 'Cards' else []
+    
+        if view_mode == 'Table':
+            page_df = trade_store.df.iloc[visible]
+            st.dataframe(
+                page_df.assign(date=page_df['date'].dt.strftime('%Y-%m-%d')),
+                hide_index=True,
+                use_container_width=True
+            )
+            st.caption("Switch to Cards to close or adjust open trades.")
+    
+        for trade in recent_trades:
+            # Determine card color based on outcome
+            if 'Manual Close' in trade['outcome']:
+                border_color = "#8b5cf6"
+                status_emoji = "🏁"
+                show_buttons = False
+                # Extract close price from outcome if available
+                close_price_text = trade['outcome']
+            elif trade['outcome'] == 'Target Hit':
+                border_color = "#10b981"
+                status_emoji = "✅"
+                show_buttons = False
+                close_price_text = f"Target Hit @ {trade['target']:.5f}"
+            elif trade['outcome'] == 'SL Hit':
+                border_color = "#ef4444"
+                status_emoji = "❌"
+                show_buttons = False
+                close_price_text = f"SL Hit @ {trade['sl']:.5f}"
+            else:
+                border_color = "#3b82f6"
+                status_emoji = "⏳"
+                show_buttons = True
+                close_price_text = "Open"
+        
+            # Calculate P&L display
+            if trade['result'] == 'Win':
+                pnl_display = f'<span style="color: #10b981;">+{trade["reward"]:.5f}</span>'
+            elif trade['result'] == 'Loss':
+                pnl_display = f'<span style="color: #ef4444;">-{trade["risk"]:.5f}</span>'
+            else:
+                pnl_display = '<span style="color: #6b7280;">0.00000</span>'
 
-        st.markdown(f"""
+            st.markdown(f"""
         <div class="trade-card" style="border-left: 4px solid {border_color};">
             <div class="card-header">
                 <div style="display: flex; align-items: center; justify-content: space-between; width: 100%;">
@@ -1030,127 +758,80 @@ if st.session_state.trades:
         </div>
         """, unsafe_allow_html=True)
         
-        # Add buttons for open trades
-        if show_buttons:
-            # Check if adjustment UI should be shown for this trade
-            if st.session_state.get(f"adjust_{trade['id']}", False):
-                st.markdown("---")
-                st.markdown("**Adjust Stop Loss & Take Profit**")
+            # Add buttons for open trades
+            if show_buttons:
+                # Check if adjustment UI should be shown for this trade
+                if st.session_state.get(f"adjust_{trade['id']}", False):
+                    st.markdown("---")
+                    st.markdown("**Adjust Stop Loss & Take Profit**")
                 
-                adj_col1, adj_col2, adj_col3 = st.columns([1, 1, 1])
+                    adj_col1, adj_col2, adj_col3 = st.columns([1, 1, 1])
                 
-                with adj_col1:
-                    new_sl = st.number_input(
-                        "New Stop Loss", 
-                        value=float(trade['sl']),
-                        min_value=0.0,
-                        format="%.5f",
-                        key=f"new_sl_{trade['id']}"
-                    )
+                    with adj_col1:
+                        new_sl = st.number_input(
+                            "New Stop Loss", 
+                            value=float(trade['sl']),
+                            min_value=0.0,
+                            format="%.5f",
+                            key=f"new_sl_{trade['id']}"
+                        )
                 
-                with adj_col2:
-                    new_tp = st.number_input(
-                        "New Take Profit", 
-                        value=float(trade['target']),
-                        min_value=0.0,
-                        format="%.5f",
-                        key=f"new_tp_{trade['id']}"
-                    )
+                    with adj_col2:
+                        new_tp = st.number_input(
+                            "New Take Profit", 
+                            value=float(trade['target']),
+                            min_value=0.0,
+                            format="%.5f",
+                            key=f"new_tp_{trade['id']}"
+                        )
                 
-                with adj_col3:
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    if st.button(f"💾 Save Changes", key=f"save_adj_{trade['id']}", use_container_width=True):
-                        if adjust_trade_sl_tp(trade['id'], new_sl, new_tp):
-                            st.success("✅ Trade adjusted!")
+                    with adj_col3:
+                        st.markdown("<br>", unsafe_allow_html=True)
+                        if st.button(f"💾 Save Changes", key=f"save_adj_{trade['id']}", use_container_width=True):
+                            if adjust_trade_sl_tp(trade['id'], new_sl, new_tp):
+                                st.toast("Trade adjusted!", icon="✅")
+                                st.session_state[f"adjust_{trade['id']}"] = False
+                                st.rerun()
+                            else:
+                                st.error("❌ Failed to adjust trade")
+                    
+                        if st.button(f"❌ Cancel", key=f"cancel_adj_{trade['id']}", use_container_width=True):
                             st.session_state[f"adjust_{trade['id']}"] = False
-                            time.sleep(1)
                             st.rerun()
-                        else:
-                            st.error("❌ Failed to adjust trade")
-                    
-                    if st.button(f"❌ Cancel", key=f"cancel_adj_{trade['id']}", use_container_width=True):
-                        st.session_state[f"adjust_{trade['id']}"] = False
-                        st.rerun()
-            else:
-                # Normal buttons
-                btn_col1, btn_col2 = st.columns(2)
+                else:
+                    # Normal buttons
+                    btn_col1, btn_col2 = st.columns(2)
                 
-                with btn_col1:
-                    if st.button(f"🔴 Close Trade #{trade['id']}", key=f"close_{trade['id']}", use_container_width=True):
-                        # Get current price for P&L calculation
-                        current_price = get_live_price(trade['instrument'])
-                        if current_price:
-                            if close_trade(trade['id'], "manual", current_price):
-                                st.rerun()
-                        else:
-                            # Close as breakeven if can't get price
-                            if close_trade(trade['id'], "manual", None):
+                    with btn_col1:
+                        if st.button(f"🔴 Close Trade #{trade['id']}", key=f"close_{trade['id']}", use_container_width=True):
+                            with trace.timed("close trade", detail=f"#{trade['id']} {trade['instrument']}"):
+                                # Get current price for P&L calculation; closes as breakeven without one
+                                current_price = get_live_price(trade['instrument'])
+                                closed = close_trade(trade['id'], "manual", current_price or None)
+                            if closed:
                                 st.rerun()
                 
-                with btn_col2:
-                    if st.button(f"⚙️ Adjust SL/TP", key=f"adjust_{trade['id']}", use_container_width=True):
-                        st.session_state[f"adjust_{trade['id']}"] = True
-                        st.rerun()
+                    with btn_col2:
+                        if st.button(f"⚙️ Adjust SL/TP", key=f"adjust_btn_{trade['id']}", use_container_width=True):
+                            st.session_state[f"adjust_{trade['id']}"] = True
+                            st.rerun()
 
-else:
-    st.info("No trades recorded yet.")
+    else:
+        st.info("No trades recorded yet.")
 
-# Trader Performance Rankings
-st.markdown("### 🏆 Trader Performance Rankings")
+    # Trader Performance Rankings
+    trace.section("rankings")
+    st.markdown("### 🏆 Trader Performance Rankings")
 
-if st.session_state.trades:
-    # Calculate trader statistics
-    trader_stats = {}
-    
-    for trade in st.session_state.trades:
-        trader_name = trade['trader']
-        if trader_name not in trader_stats:
-            trader_stats[trader_name] = {
-                'total_trades': 0,
-                'winning_trades': 0,
-                'losing_trades': 0,
-                'open_trades': 0,
-                'total_pnl': 0,
-                'total_risk': 0,
-                'total_reward': 0
-            }
-        
-        stats = trader_stats[trader_name]
-        stats['total_trades'] += 1
-        
-        if trade['outcome'] == 'Open':
-            stats['open_trades'] += 1
-        elif trade['result'] == 'Win':
-            stats['winning_trades'] += 1
-            stats['total_pnl'] += trade['reward']
-            stats['total_reward'] += trade['reward']
-        elif trade['result'] == 'Loss':
-            stats['losing_trades'] += 1
-            stats['total_pnl'] -= trade['risk']
-            stats['total_risk'] += trade['risk']
-    
-    # Convert to list and sort by P&L
-    trader_ranking = []
-    for trader, stats in trader_stats.items():
-        closed_trades_count = stats['winning_trades'] + stats['losing_trades']
-        win_rate = (stats['winning_trades'] / closed_trades_count * 100) if closed_trades_count > 0 else 0
-        
-        trader_ranking.append({
-            'trader': trader,
-            'total_pnl': stats['total_pnl'],
-            'win_rate': win_rate,
-            'total_trades': stats['total_trades'],
-            'closed_trades': closed_trades_count,
-            'open_trades': stats['open_trades']
-        })
-    
-    trader_ranking.sort(key=lambda x: x['total_pnl'], reverse=True)
+    if len(trade_store):
+        # Per-trader totals straight from the shared aggregate cube, best P&L first
+        trader_ranking = trader_rankings(trade_store.cube())
     
-    # Display rankings
-    for i, trader_data in enumerate(trader_ranking[:5]):  # Top 5 traders
-        rank_class = "rank-1" if i == 0 else "rank-2" if i == 1 else "rank-3" if i == 2 else ""
+        # Display rankings
+        for i, trader_data in enumerate(trader_ranking[:5]):  # Top 5 traders
+            rank_class = "rank-1" if i == 0 else "rank-2" if i == 1 else "rank-3" if i == 2 else ""
         
-        st.markdown(f"""
+            st.markdown(f"""
         <div class="rank-item">
             <div class="rank-number {rank_class}">{i+1}</div>
             <div style="flex: 1;">
@@ -1176,33 +857,37 @@ if st.session_state.trades:
             </div>
         </div>
         """, unsafe_allow_html=True)
-else:
-    st.info("No trader data available yet. Add trades to see rankings.")
+    else:
+        st.info("No trader data available yet. Add trades to see rankings.")
 
-st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-# Navigation Section
-st.markdown("---")
-st.markdown("### 🚀 Quick Navigation")
+    # Navigation Section
+    trace.section("navigation & footer")
+    st.markdown("---")
+    st.markdown("### 🚀 Quick Navigation")
 
-col1, col2 = st.columns(2)
+    col1, col2 = st.columns(2)
 
-with col1:
-    if st.button("👤 Trader Analysis", use_container_width=True):
-        st.switch_page("pages/Trader Analysis.py")
+    with col1:
+        if st.button("👤 Trader Analysis", use_container_width=True):
+            st.switch_page("pages/Trader Analysis.py")
 
-with col2:
-    if st.button("📊 Pair Analysis", use_container_width=True):
-        st.switch_page("pages/Pair Analysis.py")
+    with col2:
+        if st.button("📊 Pair Analysis", use_container_width=True):
+            st.switch_page("pages/Pair Analysis.py")
 
-# Footer
-st.markdown("---")
-st.markdown("""
+    # Footer
+    st.markdown("---")
+    st.markdown("""
 <div style="text-align: center; color: #666; font-size: 0.875rem; padding: 2rem 0;">
     <strong>The War Zone</strong> • Forex Trading Analytics Dashboard<br>
     Real-time monitoring • Risk management • Performance tracking
 </div>
 """, unsafe_allow_html=True)
+finally:
+    trace.finish(get_perf_log_path())
+show_perf_panel(trace)
 
 
 
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+CLOSED_RESULTS = ('Win', 'Loss', 'Breakeven')
+MEASURES = ('trades', 'open', 'closed', 'wins', 'losses', 'pnl', 'rr_sum')
+PERIODS = {'Daily': 'D', 'Weekly': 'W', 'Monthly': 'M', 'Quarterly': 'Q'}  # Labelled by period start
+
+
+def build_cube(df):
+    """Aggregate trades into a (trader x instrument x day) cube.
+
+    One row per combination that has trades, with counts (trades, open,
+    closed, wins, losses), P&L (reward for wins, -risk for losses) and the
+    sum of R:R over closed trades. Every page statistic is a sum over some
+    slice of these rows, so pages never rescan the trades themselves.
+    Trades without a date keep a NaT day; date filters drop them like the
+    page filters always did.
+    """
+    result = df['result'].astype(str)
+    is_win = (result == 'Win').to_numpy()
+    is_loss = (result == 'Loss').to_numpy()
+    is_closed = result.isin(CLOSED_RESULTS).to_numpy()
+
+    parts = pd.DataFrame({
+        'trader': df['trader'],
+        'instrument': df['instrument'],
+        'day': df['date'].dt.normalize(),
+        'trades': 1,
+        'open': (df['outcome'].astype(str) == 'Open').to_numpy().astype(np.int64),
+        'closed': is_closed.astype(np.int64),
+        'wins': is_win.astype(np.int64),
+        'losses': is_loss.astype(np.int64),
+        'pnl': np.where(is_win, df['reward'], np.where(is_loss, -df['risk'], 0.0)),
+        'rr_sum': np.where(is_closed, df['rrRatio'], 0.0)
+    })
+    cube = parts.groupby(['trader', 'instrument', 'day'], observed=True, dropna=False, sort=False).sum()
+    return cube.reset_index()
+
+
+def slice_cube(cube, traders=None, instruments=None, start=None, end=None):
+    """Rows of the cube for some traders/instruments between two dates (inclusive)"""
+    mask = np.ones(len(cube), dtype=bool)
+    if traders is not None:
+        mask &= cube['trader'].isin(list(traders)).to_numpy()
+    if instruments is not None:
+        mask &= cube['instrument'].isin(list(instruments)).to_numpy()
+    if start is not None:
+        mask &= (cube['day'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (cube['day'] <= pd.Timestamp(end)).to_numpy()
+    return cube[mask]
+
+
+def add_rates(stats):
+    """Win rate (% of closed trades) and average R:R over closed trades"""
+    closed = stats['closed'].where(stats['closed'] > 0)
+    stats['win_rate'] = (stats['wins'] / closed * 100).fillna(0.0)
+    stats['avg_rr'] = (stats['rr_sum'] / closed).fillna(0.0)
+    return stats
+
+
+def period_grouper(period):
+    """Grouper over the cube's day column for a pandas frequency ("2W", "14D", "QS") or pd.Grouper.
+
+    Bins are labelled by their first day, like the PERIODS buckets.
+    """
+    freq = period.freq if isinstance(period, pd.Grouper) else period
+    return pd.Grouper(key='day', freq=freq, label='left', closed='left')
+
+
+def summarize(rows, by=(), period=None):
+    """Sum cube rows by some dimensions, optionally per period.
+
+    period is a PERIODS name or anything period_grouper accepts; either way
+    the result has a 'period' column holding each bucket's start.
+    """
+    rows = rows[['trader', 'instrument', 'day', *MEASURES]]
+    keys = list(by)
+    if period in PERIODS:
+        rows = rows.assign(period=rows['day'].dt.to_period(PERIODS[period]).dt.start_time)
+        keys.append('period')
+    elif period is not None:
+        keys.append(period_grouper(period))
+
+    if not keys:
+        totals = rows[list(MEASURES)].sum().to_frame().T
+        return add_rates(totals.astype({col: np.int64 for col in MEASURES if col not in ('pnl', 'rr_sum')}))
+
+    stats = rows.groupby(keys, observed=True)[list(MEASURES)].sum().reset_index()
+    if 'day' in stats.columns:
+        # Frequency bins come back for every span between the first and last day; keep the ones with trades
+        stats = stats[stats['trades'] > 0].rename(columns={'day': 'period'}).reset_index(drop=True)
+    return add_rates(stats)
+
+
+def trader_rankings(rows):
+    """Dashboard trader rankings, best P&L first; win rate is wins over wins + losses"""
+    stats = summarize(rows, by=['trader'])
+    decided = stats['wins'] + stats['losses']
+    stats['win_rate'] = (stats['wins'] / decided.where(decided > 0) * 100).fillna(0.0)
+    ranking = [
+        {
+            'trader': str(row.trader),
+            'total_pnl': row.pnl,
+            'win_rate': row.win_rate,
+            'total_trades': int(row.trades),
+            'closed_trades': int(row.wins + row.losses),
+            'open_trades': int(row.open)
+        }
+        for row in stats.itertuples(index=False)
+    ]
+    ranking.sort(key=lambda x: x['total_pnl'], reverse=True)
+    return ranking
+
+
+def trader_table(rows, traders):
+    """Per-trader totals for the selected traders, in selection order (zeros for traders without trades)"""
+    stats = summarize(rows, by=['trader']).set_index('trader')
+    stats.index = stats.index.astype(str)
+    return stats.reindex(list(traders), fill_value=0)
+
+
+def pair_comparison(rows, traders):
+    """Pair Analysis trader comparison table"""
+    stats = trader_table(rows, traders)
+    return pd.DataFrame({
+        'Trader': list(traders),
+        'Total Trades': stats['trades'].to_numpy(),
+        'Closed Trades': stats['closed'].to_numpy(),
+        'Wins': stats['wins'].to_numpy(),
+        'Losses': stats['losses'].to_numpy(),
+        'Win Rate %': stats['win_rate'].to_numpy(),
+        'Avg R:R Ratio': stats['avg_rr'].to_numpy(),
+        'Total P&L': stats['pnl'].to_numpy()
+    })
+
+
+def pair_weekly_stats(rows):
+    """Pair Analysis weekly stats over closed trades, one row per trader-week that had any"""
+    weekly = summarize(rows, by=['trader'], period='Weekly')
+    weekly = weekly[weekly['closed'] > 0].sort_values(['period', 'trader'])
+    return pd.DataFrame({
+        'week': weekly['period'].to_numpy(),
+        'trader': weekly['trader'].astype(str).to_numpy(),
+        'win_rate': weekly['win_rate'].to_numpy(),
+        'rrRatio': weekly['avg_rr'].to_numpy(),
+        'trade_count': weekly['closed'].to_numpy(),
+        'pnl': weekly['pnl'].to_numpy()
+    })
+
+
+def trader_period_chart(rows, traders, period):
+    """Trader Analysis progress chart data: one row per trader and period, traders in selection order"""
+    per_period = summarize(rows, by=['trader'], period=period)
+    per_period['trader'] = pd.Categorical(per_period['trader'].astype(str), categories=list(traders))
+    per_period = per_period.sort_values(['trader', 'period'])
+    return pd.DataFrame({
+        'Trader': per_period['trader'].astype(str).to_numpy(),
+        'Time Period': per_period['period'].to_numpy(),
+        'Total Trades': per_period['trades'].to_numpy(),
+        'Wins': per_period['wins'].to_numpy(),
+        'Losses': per_period['losses'].to_numpy(),
+        'Win Rate': per_period['win_rate'].to_numpy(),
+        'P&L': per_period['pnl'].to_numpy(),
+        'Avg R:R': per_period['avg_rr'].to_numpy()
+    })
@@ -0,0 +1,241 @@
+"""Replay the trade log against recorded OHLC bars kept in local files.
+
+Bars are one file per symbol in a directory, named after the symbol
+without its slash (EURUSD.parquet or EURUSD.csv), with a time (or
+datetime) column plus high, low and close, or the bars the monitor keeps
+in a bar_store.BarStore. Every trade is resolved by the
+first bar from its date on that reaches SL or target, with the rules the
+live monitor uses (see evaluator.first_bar_hits): Target Hit/Win or SL
+Hit/Loss, SL first when one bar crosses both. With close_open, trades
+still open when the bars run out are closed at the last close the way the
+Close Trade button does it (evaluator.manual_close).
+
+Each symbol is one task for a process pool. Within a symbol the first
+crossing of every trade comes from a pyramid of block minima/maxima, so
+ten years of minute bars take a few dozen vectorized passes, not a scan
+per trade. Parquet files need pandas' Parquet engine (pyarrow).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, bar_key
+from evaluator import NO_HIT, OUTCOMES, SL_HIT, TARGET_HIT, manual_close
+
+BAR_EXTENSIONS = (".parquet", ".csv")
+TIME_COLUMNS = ("time", "datetime")
+
+
+def bar_file(directory, symbol):
+    """Path of the symbol's bar file in directory, or None"""
+    for extension in BAR_EXTENSIONS:
+        path = os.path.join(directory, bar_key(symbol) + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_bars(path):
+    """Read a bar file into {'time', 'high', 'low', 'close'} arrays sorted by time"""
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    time_column = next(c for c in TIME_COLUMNS if c in frame.columns)
+    times = pd.to_datetime(frame[time_column]).to_numpy().astype("datetime64[s]")
+    order = None if np.all(times[1:] >= times[:-1]) else np.argsort(times, kind="stable")
+    bars = {'time': times}
+    for column in ('high', 'low', 'close'):
+        bars[column] = frame[column].to_numpy(dtype=np.float64)
+    return bars if order is None else {name: values[order] for name, values in bars.items()}
+
+
+def _source_bars(source):
+    """Bars of a bar file path, or of a (BarStore, symbol, interval) source"""
+    if isinstance(source, tuple):
+        store, symbol, interval = source
+        return store.bars(symbol, interval)
+    return load_bars(source)
+
+
+def _pyramid(values):
+    """values padded with +inf to a power of two, then the minima of every aligned block of 2, 4, ..."""
+    level = np.full(1 << max(int(np.ceil(np.log2(max(len(values), 1)))), 0), np.inf)
+    level[:len(values)] = values
+    levels = [level]
+    while len(level) > 1:
+        level = np.minimum(level[0::2], level[1::2])
+        levels.append(level)
+    return levels
+
+
+def _first_at_or_below(levels, start, threshold):
+    """Per query, the first index >= start whose value is <= threshold (-1 when none)"""
+    top = len(levels) - 1
+    size = len(levels[0])
+    pos = np.array(start, dtype=np.int64)
+    found = np.full(len(pos), -1)  # Level of a block starting at pos known to hold the answer
+
+    # Climb: step over aligned blocks, smallest first, until one reaches the threshold
+    for k in range(top):
+        idx = np.flatnonzero((found < 0) & (pos < size) & ((pos >> k) & 1 == 1))
+        hit = levels[k][pos[idx] >> k] <= threshold[idx]
+        found[idx[hit]] = k
+        pos[idx[~hit]] += 1 << k
+    idx = np.flatnonzero((found < 0) & (pos == 0))
+    found[idx[levels[top][0] <= threshold[idx]]] = top
+
+    # Descend: the answer is in the left half of the block unless that half stays above the threshold
+    for k in range(top - 1, -1, -1):
+        idx = np.flatnonzero(found > k)
+        clear = levels[k][pos[idx] >> k] > threshold[idx]
+        pos[idx[clear]] += 1 << k
+        found[idx] = k
+    return np.where(found >= 0, pos, -1)
+
+
+class BarPyramid:
+    """First-crossing searches over one symbol's bars for many trades at once.
+
+    Keeps block minima of the lows and of the negated highs at every
+    power-of-two size (about 4x the bars in memory), so each search takes
+    2*log2(bars) vectorized steps whatever the distance to the crossing.
+    """
+
+    def __init__(self, high, low):
+        self.size = len(low)
+        self._lows = _pyramid(np.asarray(low, dtype=np.float64))
+        self._neg_highs = _pyramid(-np.asarray(high, dtype=np.float64))
+
+    def first_low_at_or_below(self, start, level):
+        """First bar >= start with low <= level, -1 if none"""
+        return _first_at_or_below(self._lows, start, np.asarray(level, dtype=np.float64))
+
+    def first_high_at_or_above(self, start, level):
+        """First bar >= start with high >= level, -1 if none"""
+        return _first_at_or_below(self._neg_highs, start, -np.asarray(level, dtype=np.float64))
+
+
+def resolve_symbol(source, entry, sl, target, opened):
+    """Replay one symbol's trades over its bar file (or store, see _source_bars).
+
+    opened holds each trade's date as datetime64[s]; bars from that date
+    on count. Returns (codes, exit_time, exit_price, last_time, last_close)
+    where exit_* describe the bar and level that decided each hit. Without
+    any bars every trade stays open and the last bar is NaT/NaN.
+    """
+    bars = _source_bars(source)
+    if bars is None or len(bars['time']) == 0:
+        n = len(entry)
+        return (np.full(n, NO_HIT, dtype=np.int8), np.full(n, np.datetime64("NaT"), dtype="datetime64[s]"),
+                np.full(n, np.nan), np.datetime64("NaT", "s"), np.nan)
+    times = bars['time']
+    never = np.iinfo(np.int64).max
+    entry, sl, target = (np.asarray(a, dtype=np.float64) for a in (entry, sl, target))
+    start = np.searchsorted(times, opened)
+
+    valid = (entry != 0) & ~((sl == 0) & (target == 0)) & ~np.isnat(opened)
+    is_long = target > entry
+    pyramid = BarPyramid(bars['high'], bars['low'])
+
+    first_sl = np.full(len(entry), never)
+    first_target = np.full(len(entry), never)
+    for side, low_level, high_level, low_out, high_out in (
+        (is_long, sl, target, first_sl, first_target),  # Long: the low reaches SL, the high reaches target
+        (~is_long, target, sl, first_target, first_sl)  # Short: mirrored
+    ):
+        idx = np.flatnonzero(side & valid)
+        low_at = pyramid.first_low_at_or_below(start[idx], np.where(low_level[idx] > 0, low_level[idx], -np.inf))
+        high_at = pyramid.first_high_at_or_above(start[idx], np.where(high_level[idx] > 0, high_level[idx], np.inf))
+        low_out[idx] = np.where(low_at >= 0, low_at, never)
+        high_out[idx] = np.where(high_at >= 0, high_at, never)
+
+    first = np.minimum(first_sl, first_target)
+    hit = first != never
+    codes = np.where(hit, np.where(first_sl <= first_target, SL_HIT, TARGET_HIT), NO_HIT).astype(np.int8)
+    exit_time = np.full(len(entry), np.datetime64("NaT"), dtype="datetime64[s]")
+    exit_time[hit] = times[first[hit]]
+    exit_price = np.where(codes == SL_HIT, sl, np.where(codes == TARGET_HIT, target, np.nan))
+    return codes, exit_time, exit_price, times[-1], bars['close'][-1]
+
+
+def _resolve_task(task):
+    return resolve_symbol(*task)
+
+
+def replay(trades, bar_dir, workers=None, close_open=False, interval="1min"):
+    """Replay every trade in a trades frame (TradeStore.df) against the bar files in bar_dir.
+
+    bar_dir may also be a BarStore, read at interval.
+
+    Returns one row per trade: id, instrument, the recorded outcome/result,
+    the replayed outcome/result/risk/reward, exit_time, exit_price and
+    ``changed`` where replay and record disagree. Trades with no bar file,
+    or no crossing (unless close_open), replay as Open.
+    """
+    trades = trades.reset_index(drop=True)
+    n = len(trades)
+    entry = pd.to_numeric(trades['entry'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    sl = pd.to_numeric(trades['sl'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    target = pd.to_numeric(trades['target'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    opened = pd.to_datetime(trades['date'], errors='coerce').dt.normalize().to_numpy().astype("datetime64[s]")
+
+    keys = trades['instrument'].astype(str).map(bar_key)
+    groups = {key: idx for key, idx in keys.groupby(keys).indices.items()}
+    stored = set(bar_dir.symbols(interval)) if isinstance(bar_dir, BarStore) else None
+    tasks = {}
+    for key, idx in groups.items():
+        if stored is not None:
+            source = (bar_dir, key, interval) if key in stored else None
+        else:
+            source = bar_file(bar_dir, key)
+        if source is not None:
+            tasks[key] = (source, entry[idx], sl[idx], target[idx], opened[idx])
+
+    codes = np.zeros(n, dtype=np.int8)
+    exit_time = np.full(n, np.datetime64("NaT"), dtype="datetime64[s]")
+    exit_price = np.full(n, np.nan)
+    last_close = {}
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(tasks, pool.map(_resolve_task, tasks.values())))
+    else:
+        results = {key: _resolve_task(task) for key, task in tasks.items()}
+    for key, (symbol_codes, symbol_time, symbol_price, last_time, close) in results.items():
+        idx = groups[key]
+        codes[idx], exit_time[idx], exit_price[idx] = symbol_codes, symbol_time, symbol_price
+        last_close[key] = (last_time, close)
+
+    replayed = pd.DataFrame({
+        'id': trades['id'].to_numpy(),
+        'instrument': trades['instrument'].to_numpy(),
+        'recorded_outcome': trades['outcome'].astype(str).to_numpy(),
+        'recorded_result': trades['result'].astype(str).to_numpy(),
+        'outcome': 'Open',
+        'result': 'Open',
+        'risk': pd.to_numeric(trades['risk'], errors='coerce').to_numpy(dtype=np.float64),
+        'reward': pd.to_numeric(trades['reward'], errors='coerce').to_numpy(dtype=np.float64),
+        'exit_time': exit_time,
+        'exit_price': exit_price
+    })
+    for code, (outcome, result) in OUTCOMES.items():
+        replayed.loc[codes == code, ['outcome', 'result']] = [outcome, result]
+
+    if close_open:
+        for key, idx in groups.items():
+            if key not in last_close:
+                continue
+            last_time, close = last_close[key]
+            for i in idx[(codes[idx] == NO_HIT) & (opened[idx] <= last_time)]:
+                changes = manual_close({'entry': entry[i], 'target': target[i]}, float(close))
+                for field, value in changes.items():
+                    replayed.at[i, field] = value
+                replayed.at[i, 'exit_time'] = last_time
+                replayed.at[i, 'exit_price'] = close
+
+    replayed['changed'] = ((replayed['outcome'] != replayed['recorded_outcome'])
+                           | (replayed['result'] != replayed['recorded_result']))
+    return replayed
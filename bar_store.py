@@ -0,0 +1,248 @@
+"""Local on-disk store of OHLC bars shared by the monitor, backtests and charts.
+
+Bars live in one directory per interval and symbol (<root>/1min/EURUSD/),
+keyed through normalize_symbol so EUR/USD, EURUSD and eurusd share them.
+Each column (time, open, high, low, close) is a flat little-endian file
+next to a meta.json holding the row count and the time range the bars are
+known to be complete for. Reads memory-map the columns and cut [start,
+end) with a binary search on time, so a day out of ten years of minute
+bars is a view onto a few pages of the files, not a load.
+
+New bars are appended; the newest stored bar, which may still have been
+forming when it was fetched, is overwritten when it comes back. Bars from
+before the complete range are merged into a fresh generation of the files
+that readers switch to when meta.json is replaced, so maps already handed
+out stay valid. One process writes (the price monitor); any number read.
+"""
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from quotes import BAR_INTERVALS, MAX_BARS, bar_interval, normalize_symbol
+
+COLUMNS = {'time': np.dtype('<M8[s]'), 'open': np.dtype('<f8'), 'high': np.dtype('<f8'),
+           'low': np.dtype('<f8'), 'close': np.dtype('<f8')}
+META_FILE = "meta.json"
+
+
+def bar_key(symbol):
+    """Directory and file stem for a symbol's bars: EURUSD for EURUSD, EUR/USD or eurusd"""
+    return normalize_symbol(symbol).replace("/", "")
+
+
+def _as_time(value):
+    """datetime, ISO string or datetime64 as datetime64[s] (naive UTC); None stays None"""
+    return None if value is None else np.datetime64(value, 's')
+
+
+def _bar_floor(value, interval):
+    """Open time of the interval's bar containing value"""
+    seconds = dict(BAR_INTERVALS).get(interval, 60)
+    return value - np.timedelta64(int(value.astype(np.int64) % seconds), 's')
+
+
+class BarStore:
+    """Memory-mapped bar columns per (symbol, interval) under root"""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._maps = {}  # directory -> (generation, rows, columns)
+
+    def __reduce__(self):
+        # Process pools get a fresh store on the same files
+        return BarStore, (self.root,)
+
+    def directory(self, symbol, interval):
+        return os.path.join(self.root, interval, bar_key(symbol))
+
+    def symbols(self, interval):
+        """Keys of the symbols with bars stored at interval"""
+        try:
+            names = os.listdir(os.path.join(self.root, interval))
+        except OSError:
+            return []
+        return sorted(n for n in names if os.path.exists(os.path.join(self.root, interval, n, META_FILE)))
+
+    def coverage(self, symbol, interval):
+        """(from, to) as datetime64[s] that the stored bars are complete for, or None"""
+        meta = self._read_meta(self.directory(symbol, interval))
+        if not meta or meta.get('covered_from') is None:
+            return None
+        return _as_time(meta['covered_from']), _as_time(meta['covered_to'])
+
+    def bars(self, symbol, interval, start=None, end=None):
+        """Stored bars with start <= time < end as {'time', 'open', 'high', 'low', 'close'}.
+
+        The arrays are read-only views onto the mapped files. None when
+        nothing is stored for the symbol.
+        """
+        directory = self.directory(symbol, interval)
+        meta = self._read_meta(directory)
+        if meta is None:
+            return None
+        columns = self._columns(directory, meta)
+        times = columns['time']
+        lo = 0 if start is None else int(np.searchsorted(times, _as_time(start), 'left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, _as_time(end), 'left'))
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def ingest(self, symbol, interval, bars, covered_from=None, covered_to=None):
+        """Store bars (oldest first) for a symbol; returns the number of new rows.
+
+        bars is a dict of arrays like quotes.fetch_time_series returns;
+        missing price columns are stored as NaN. covered_from/covered_to
+        give the range the bars are complete for (the fetch window), which
+        fetch_through uses to decide what to fetch next.
+        """
+        times = np.asarray(bars['time']).astype('datetime64[s]')
+        new = {name: times if name == 'time' else
+               np.asarray(bars[name], dtype=np.float64) if name in bars else np.full(len(times), np.nan)
+               for name in COLUMNS}
+        covered_from, covered_to = _as_time(covered_from), _as_time(covered_to)
+        directory = self.directory(symbol, interval)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            meta = self._read_meta(directory) or {
+                'generation': 0, 'rows': 0, 'covered_from': None, 'covered_to': None}
+            stored = self._columns(directory, meta)
+            stored_times = stored['time']
+            complete_from = _as_time(meta['covered_from'])
+            if complete_from is None and len(stored_times):
+                complete_from = stored_times[0]
+            complete_to = _as_time(meta['covered_to'])
+
+            if len(times) and len(stored_times) and times[0] < complete_from:
+                # Older than anything complete: merge into a new generation, new bars winning
+                merged = {name: np.concatenate([new[name], stored[name]]) for name in COLUMNS}
+                _, first = np.unique(merged['time'], return_index=True)
+                added = len(first) - len(stored_times)
+                meta = self._write_generation(directory, meta, {name: v[first] for name, v in merged.items()})
+            else:
+                added = self._append(directory, meta, stored_times, new)
+
+            if covered_from is not None and covered_to is not None:
+                if complete_to is None or covered_from > complete_to or covered_to < complete_from:
+                    meta['covered_from'], meta['covered_to'] = covered_from, covered_to
+                else:
+                    meta['covered_from'] = min(covered_from, complete_from)
+                    meta['covered_to'] = max(covered_to, complete_to)
+            self._write_meta(directory, meta)
+        return added
+
+    def fetch_through(self, fetch_bars, symbols, start, interval=None, now=None):
+        """Bars from start (naive UTC) to now, fetching only what the store does not hold yet.
+
+        fetch_bars(symbols, start, interval) is PriceClient.fetch_bars. One
+        batched call covers every symbol whose complete range does not reach
+        now, starting where the furthest behind needs it. Returns {normalized
+        symbol: bars} like fetch_bars, as views onto the store, each from the
+        bar containing start.
+        """
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        interval = interval or bar_interval((now - start).total_seconds())
+        first, now64 = _bar_floor(_as_time(start), interval), _as_time(now)
+        symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+
+        needed = {}
+        for symbol in symbols:
+            covered = self.coverage(symbol, interval)
+            if covered is None or covered[0] > first:
+                needed[symbol] = first
+            elif covered[1] < now64:
+                needed[symbol] = _bar_floor(covered[1], interval)
+        if needed:
+            fetch_from = min(needed.values())
+            fetched = fetch_bars(list(needed), fetch_from.astype(datetime), interval)
+            for symbol, bars in fetched.items():
+                times = bars['time']
+                if not len(times):
+                    continue
+                # A full page may have been cut short at the old end; the last bar may still be forming
+                complete_from = fetch_from if len(times) < MAX_BARS else times[0]
+                self.ingest(symbol, interval, bars, complete_from, min(now64, times[-1]))
+
+        found = {}
+        for symbol in symbols:
+            bars = self.bars(symbol, interval, first)
+            if bars is not None and len(bars['time']):
+                found[symbol] = bars
+        return found
+
+    def _columns(self, directory, meta):
+        """The generation's columns mapped to meta's row count (cached until either moves on)"""
+        generation, rows = meta['generation'], meta['rows']
+        cached = self._maps.get(directory)
+        if cached is not None and cached[:2] == (generation, rows):
+            return cached[2]
+        files = os.path.join(directory, f"g{generation}")
+        # A crash between data and meta writes can leave meta ahead of a column
+        for name, dtype in COLUMNS.items():
+            try:
+                rows = min(rows, os.path.getsize(os.path.join(files, name)) // dtype.itemsize)
+            except OSError:
+                rows = 0
+        if rows:
+            columns = {name: np.memmap(os.path.join(files, name), dtype=dtype, mode='r', shape=(rows,))
+                       for name, dtype in COLUMNS.items()}
+        else:
+            columns = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._maps[directory] = (generation, meta['rows'], columns)
+        return columns
+
+    def _append(self, directory, meta, stored_times, new):
+        """Append bars newer than the last stored one, overwriting that one if it is fetched again"""
+        rows = len(stored_times)
+        times = new['time']
+        if rows:
+            keep = times >= stored_times[-1]
+            new = {name: values[keep] for name, values in new.items()}
+            times = new['time']
+        if not len(times):
+            return 0
+        at = rows - 1 if rows and times[0] == stored_times[-1] else rows
+
+        files = os.path.join(directory, f"g{meta['generation']}")
+        os.makedirs(files, exist_ok=True)
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(files, name)
+            with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+                # Drop rows a crash left past meta; never cut into rows readers may have mapped
+                if os.fstat(f.fileno()).st_size > rows * dtype.itemsize:
+                    f.truncate(rows * dtype.itemsize)
+                f.seek(at * dtype.itemsize)
+                f.write(np.ascontiguousarray(new[name], dtype=dtype).tobytes())
+        meta['rows'] = at + len(times)
+        return meta['rows'] - rows
+
+    def _write_generation(self, directory, meta, columns):
+        """Write columns as the next generation and retire the current one"""
+        old = os.path.join(directory, f"g{meta['generation']}")
+        meta = dict(meta, generation=meta['generation'] + 1, rows=len(columns['time']))
+        files = os.path.join(directory, f"g{meta['generation']}")
+        shutil.rmtree(files, ignore_errors=True)
+        os.makedirs(files)
+        for name, dtype in COLUMNS.items():
+            np.ascontiguousarray(columns[name], dtype=dtype).tofile(os.path.join(files, name))
+        self._write_meta(directory, meta)
+        # Maps of the old files stay readable on POSIX; elsewhere the delete waits for a later rewrite
+        shutil.rmtree(old, ignore_errors=True)
+        return meta
+
+    def _read_meta(self, directory):
+        try:
+            with open(os.path.join(directory, META_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, directory, meta):
+        meta = {key: str(value) if isinstance(value, np.datetime64) else value for key, value in meta.items()}
+        path = os.path.join(directory, META_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,213 @@
+"""End-to-end script-run latency of the three pages, driven headless through AppTest.
+
+Each (page, size) runs in its own process so the cold start really is cold
+(imports, caches, background threads). The worksheet is an in-memory fake
+filled with synthetic trades, the Twelve Data secrets point at the local
+fake price server and the write-behind journal and bar store at scratch
+paths, so no credentials are needed and the real journal is never
+touched. Timed:
+
+  cold start    first run of the page in a fresh process
+  warm rerun    rerun with nothing changed (best of --repeat)
+  filter change rerun after switching a filter (dashboard: Recent Trade
+                Setups view; Trader Analysis: monthly grouping;
+                Pair Analysis: second pair)
+  trade submit  dashboard only: fill the Add New Trade form and submit;
+                the new trade must also reach the fake sheet, and a session
+                opened after it was flushed must still see it
+
+Each run must also open the spreadsheet and its worksheet only once.
+
+The run fails when a rerun (warm, filter change or submit) takes longer
+than --rerun-budget ms, or, with --compare, gets slower than
+--max-regression times the earlier result file.
+
+Usage:  python benchmarks/bench_apptest.py [--sizes 1000 10000 100000]
+                                            [--compare old.json] [--max-regression 1.5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet, fake_service_account, installed
+from benchmarks.fake_twelvedata import FakeTwelveData
+from benchmarks.synthetic import make_trades, quote_prices, sheet_rows
+from trade_data import SHEET_NAME, WORKSHEET_NAME, start_write_queue
+
+PAGES = {
+    'Dashboard': "Aapp.py",
+    'Trader Analysis': os.path.join("pages", "Trader Analysis.py"),
+    'Pair Analysis': os.path.join("pages", "Pair Analysis.py")
+}
+RERUNS = ('warm rerun', 'filter change', 'trade submit')
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+NOISE_FLOOR_MS = 50.0  # AppTest reruns jitter by tens of ms; smaller changes are not regressions
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    errors = [e.value for e in at.exception]
+    assert not errors, errors
+    return elapsed
+
+
+def labelled(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def change_filter(page, at):
+    if page == 'Dashboard':
+        at.radio(key="recent_view").set_value("Table")
+    elif page == 'Trader Analysis':
+        labelled(at.sidebar.selectbox, "📊 Time Aggregation").set_value("Monthly")
+    else:
+        pair = labelled(at.sidebar.selectbox, "🎯 Select Trading Pair")
+        pair.set_value(pair.options[1])
+
+
+def submit_trade(at):
+    at.selectbox(key="trader_select").set_value("Waithaka")
+    at.selectbox(key="instrument_select").set_value("EURUSD")
+    at.number_input(key="entry_input").set_value(1.085)
+    at.number_input(key="sl_input").set_value(1.08)
+    at.number_input(key="target_input").set_value(1.095)
+    labelled(at.button, "🎯 Submit Trade Setup").click()
+
+
+def run_worker(page, size, repeat, timeout):
+    """Time one page at one size in this process; returns {scenario: ms}"""
+    from streamlit.testing.v1 import AppTest
+
+    worksheet = FakeWorksheet(WORKSHEET_NAME, rows=sheet_rows(make_trades(size)))
+    spreadsheet = FakeSpreadsheet(SHEET_NAME, [worksheet])
+    client = FakeClient([spreadsheet])
+    results = {}
+    with FakeTwelveData(prices=quote_prices()) as server, installed(client), \
+            tempfile.TemporaryDirectory() as scratch:
+        secrets = {
+            "gcp_service_account": fake_service_account(),
+            "twelvedata": {"api_key": "bench", "base_url": server.base_url},
+            "journal_path": os.path.join(scratch, "journal.jsonl"),
+            "bar_store_path": os.path.join(scratch, "bars")
+        }
+
+        def session():
+            at = AppTest.from_file(os.path.join(ROOT, PAGES[page]), default_timeout=timeout)
+            for name, value in secrets.items():
+                at.secrets[name] = value
+            return at
+
+        at = session()
+        results['cold start'] = timed_run(at)
+        assert len(at.session_state.trade_store) == size, "the page did not load the fake sheet"
+        results['warm rerun'] = min(timed_run(at) for _ in range(repeat))
+
+        change_filter(page, at)
+        results['filter change'] = timed_run(at)
+
+        if page == 'Dashboard':
+            writer = start_write_queue()  # The page's own writer (same process, same cache)
+            writer.stop()  # Flushed by hand below, so the pre-flush load is sure to come first
+            submit_trade(at)
+            results['trade submit'] = timed_run(at)
+            assert len(at.session_state.trade_store) == size + 1, "the submitted trade is missing"
+            session().run()  # Caches the sheet as it was before the trade was flushed
+            writer.flush()
+            assert len(worksheet.rows) == size + 2, "the submitted trade never reached the sheet"
+
+            # Its journal entry is gone now, so a new session must not get the cached pre-flush copy
+            fresh = session()
+            fresh.run()
+            assert len(fresh.session_state.trade_store) == size + 1, "a new session lost the flushed trade"
+
+    # The spreadsheet and worksheet handles are opened once per process, not on every sync
+    assert client.calls == {'list_spreadsheet_files': 1}, dict(client.calls)
+    assert spreadsheet.calls['fetch_sheet_metadata'] == 2, dict(spreadsheet.calls)
+    return results
+
+
+def run_isolated(page, size, args):
+    """run_worker in a fresh interpreter"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", page, str(size),
+               "--repeat", str(args.repeat), "--timeout", str(args.timeout)]
+    done = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    if done.returncode != 0:
+        raise RuntimeError(f"{page} at {size} trades failed:\n{done.stderr[-3000:]}")
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def check(results, args):
+    """Reruns over budget or, with --compare, slower than the earlier run allows"""
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)['results']
+        print(f"\ncompared with {args.compare}")
+    failures = []
+    for size, pages in results.items():
+        for page, timings in pages.items():
+            for scenario in RERUNS:
+                if scenario not in timings:
+                    continue
+                ms = timings[scenario]
+                if ms > args.rerun_budget:
+                    failures.append(f"{page} {scenario} at {size}: {ms:.0f} ms over the {args.rerun_budget:.0f} ms budget")
+                old = baseline.get(size, {}).get(page, {}).get(scenario)
+                if old:
+                    ratio = ms / old
+                    print(f"{size:>7} {page:<16} {scenario:<14} {old:>8.0f} -> {ms:>8.0f} ms  x{ratio:.2f}")
+                    if ratio > args.max_regression and ms - old > NOISE_FLOOR_MS:
+                        failures.append(f"{page} {scenario} at {size}: x{ratio:.2f} slower than {args.compare}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per script run")
+    parser.add_argument("--rerun-budget", type=float, default=2000, help="ms any rerun may take")
+    parser.add_argument("--output", help="results file (default benchmarks/results/apptest-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.5)
+    parser.add_argument("--worker", nargs=2, metavar=("PAGE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        page, size = args.worker
+        print(json.dumps(run_worker(page, int(size), args.repeat, args.timeout)))
+        return
+
+    results = {}
+    for size in args.sizes:
+        for page in args.pages:
+            timings = run_isolated(page, size, args)
+            results.setdefault(str(size), {})[page] = timings
+            print(f"{size:>7} {page:<16} " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items()))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"apptest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'results': results}, f, indent=1)
+    print(f"results saved to {output}")
+
+    failures = check(results, args)
+    for failure in failures:
+        print("FAIL", failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
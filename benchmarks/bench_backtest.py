@@ -0,0 +1,171 @@
+"""Time and check the replay engine on years of synthetic minute bars.
+
+Writes --symbols Parquet files of weekday minute bars covering --years
+(random walks; 10 years is about 3.7M bars each) and --trades trades
+entered at the day's opening price with 0.2-1.5% stops, then replays them
+all with backtest.replay. Checks a sample against the monitor's own
+evaluator.first_bar_hits, that a CSV copy of a file (newest first, with a
+datetime column) replays the same, that close_open closes leftovers
+exactly like the Close Trade button, and that an instrument whose bar file
+or store entry is empty replays as Open without failing the others.
+
+Usage:  python benchmarks/bench_backtest.py [--trades 1000000] [--symbols 10] [--years 10]
+                                            [--workers N] [--bars-dir DIR]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from backtest import load_bars, replay
+from bar_store import BarStore
+from evaluator import OUTCOMES, first_bar_hits, manual_close
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "BTCUSD", "AUDUSD", "USDCAD", "NZDUSD", "EURJPY", "US30",
+           "NAS100", "USOIL", "SILVER", "GBPJPY", "ETHUSD", "USDCHF", "EURGBP", "DAX30", "SPX500", "FTSE100"]
+
+
+def write_bars(directory, symbols, years, seed=11):
+    """Weekday minute bars for each symbol as <symbol>.parquet; returns the bar times"""
+    minutes = np.arange(np.datetime64("2014-01-01T00:00", "m"), np.datetime64(f"{2014 + years}-01-01T00:00", "m"))
+    weekday = (minutes.astype("datetime64[D]").astype(np.int64) + 3) % 7 < 5  # 1970-01-01 was a Thursday
+    times = minutes[weekday].astype("datetime64[s]")
+    rng = np.random.default_rng(seed)
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0003, len(times))))
+        spread = close * rng.uniform(0, 0.0004, len(times))
+        pd.DataFrame({'time': times, 'high': close + spread, 'low': close - spread, 'close': close}).to_parquet(
+            os.path.join(directory, f"{symbol}.parquet"), index=False)
+    return times
+
+
+def make_trades(n, symbols, directory, seed=5):
+    rng = np.random.default_rng(seed)
+    frames = []
+    pick = rng.integers(0, len(symbols), n)
+    for s, symbol in enumerate(symbols):
+        count = int((pick == s).sum())
+        bars = load_bars(os.path.join(directory, f"{symbol}.parquet"))
+        days = np.unique(bars['time'].astype("datetime64[D]"))
+        day = days[rng.integers(0, len(days), count)]
+        entry = bars['close'][np.searchsorted(bars['time'], day)]
+        stop = entry * rng.uniform(0.002, 0.015, count)
+        side = np.where(rng.random(count) < 0.5, 1.0, -1.0)
+        rr = rng.uniform(0.8, 3.0, count)
+        frames.append(pd.DataFrame({
+            'date': day.astype("datetime64[s]"), 'instrument': symbol, 'entry': entry,
+            'sl': entry - side * stop, 'target': entry + side * stop * rr, 'risk': stop, 'reward': stop * rr,
+            'outcome': 'Open', 'result': 'Open'
+        }))
+    trades = pd.concat(frames, ignore_index=True)
+    trades.insert(0, 'id', np.arange(1, len(trades) + 1))
+    return trades
+
+
+def check_sample(trades, replayed, directory, sample=200, seed=2):
+    """The replay agrees with the live monitor's bar evaluator on a sample"""
+    rng = np.random.default_rng(seed)
+    bars = {}
+    for i in rng.choice(len(trades), min(sample, len(trades)), replace=False):
+        trade = trades.iloc[i]
+        series = bars.setdefault(trade['instrument'], load_bars(os.path.join(directory, f"{trade['instrument']}.parquet")))
+        start = np.searchsorted(series['time'], np.datetime64(trade['date'], "s"))
+        codes, at = first_bar_hits([trade['entry']], [trade['sl']], [trade['target']],
+                                   series['high'][start:], series['low'][start:])
+        expected = OUTCOMES[int(codes[0])][0] if codes[0] else 'Open'
+        assert replayed.at[i, 'outcome'] == expected, (i, replayed.loc[i].to_dict(), expected)
+        if codes[0]:
+            assert replayed.at[i, 'exit_time'] == series['time'][start + at[0]]
+
+
+def check_csv_and_close(directory, symbol):
+    """A CSV copy (newest first, 'datetime' column) replays like the Parquet file; close_open matches manual_close"""
+    bars = load_bars(os.path.join(directory, f"{symbol}.parquet"))
+    keep = slice(0, 20000)
+    with tempfile.TemporaryDirectory() as csv_dir, tempfile.TemporaryDirectory() as parquet_dir:
+        frame = pd.DataFrame({'datetime': bars['time'][keep], 'high': bars['high'][keep],
+                              'low': bars['low'][keep], 'close': bars['close'][keep]})
+        frame[::-1].to_csv(os.path.join(csv_dir, f"{symbol}.csv"), index=False)
+        frame.rename(columns={'datetime': 'time'}).to_parquet(os.path.join(parquet_dir, f"{symbol}.parquet"))
+
+        entry = float(bars['close'][0])
+        trades = pd.DataFrame({
+            'id': [1, 2], 'date': [str(bars['time'][0])[:10]] * 2, 'instrument': [symbol, symbol],
+            'entry': [entry, entry], 'sl': [entry * 0.999, entry * 0.5], 'target': [entry * 1.001, entry * 2],
+            'risk': [entry * 0.001, entry * 0.5], 'reward': [entry * 0.001, entry], 'outcome': 'Open', 'result': 'Open'
+        })
+        from_csv = replay(trades, csv_dir, workers=1, close_open=True)
+        from_parquet = replay(trades, parquet_dir, workers=1, close_open=True)
+        pd.testing.assert_frame_equal(from_csv, from_parquet)
+
+        close = manual_close(trades.iloc[1], float(bars['close'][keep][-1]))
+        assert from_csv.loc[1, list(close)].to_dict() == close, (from_csv.loc[1].to_dict(), close)
+    print(f"CSV and Parquet replays agree; close_open gives {close['outcome']} / {close['result']}")
+
+
+def check_empty_bars(directory, symbol):
+    """Empty bar files and store entries leave their trades open; the other symbols still replay"""
+    bars = load_bars(os.path.join(directory, f"{symbol}.parquet"))
+    entry = float(bars['close'][0])
+    trades = pd.DataFrame({
+        'id': [1, 2, 3], 'date': [str(bars['time'][0])[:10]] * 3, 'instrument': [symbol, "EMPTY1", "EMPTY2"],
+        'entry': [entry] * 3, 'sl': [entry * 0.999] * 3, 'target': [entry * 1.001] * 3,
+        'risk': [entry * 0.001] * 3, 'reward': [entry * 0.001] * 3, 'outcome': 'Open', 'result': 'Open'
+    })
+    empty = pd.DataFrame({'time': pd.to_datetime([]), 'high': [], 'low': [], 'close': []})
+    with tempfile.TemporaryDirectory() as files, tempfile.TemporaryDirectory() as root:
+        pd.DataFrame({name: values[:20000] for name, values in bars.items()}).to_parquet(
+            os.path.join(files, f"{symbol}.parquet"))
+        empty.to_parquet(os.path.join(files, "EMPTY1.parquet"))
+        empty.rename(columns={'time': 'datetime'}).to_csv(os.path.join(files, "EMPTY2.csv"), index=False)
+        store = BarStore(root)
+        store.ingest(symbol, "1min", {name: values[:20000] for name, values in bars.items()})
+        for key in ("EMPTY1", "EMPTY2"):
+            store.ingest(key, "1min", {name: values[:0] for name, values in bars.items()})
+
+        for source in (files, store):
+            replayed = replay(trades, source, workers=2, close_open=True)
+            assert replayed['outcome'].tolist()[1:] == ['Open', 'Open'], replayed
+            assert replayed['exit_time'][1:].isna().all() and replayed['exit_price'][1:].isna().all()
+            assert replayed.loc[0, 'outcome'] != 'Open'
+    print("empty bar files and store entries replay as Open")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1000000)
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--workers", type=int, help="process pool size (default: one per CPU)")
+    parser.add_argument("--bars-dir", help="keep the generated bar files here (default: a temp dir)")
+    args = parser.parse_args()
+
+    symbols = SYMBOLS[:args.symbols]
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.bars_dir or scratch
+        os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        times = write_bars(directory, symbols, args.years)
+        print(f"{len(symbols)} symbols x {len(times):,} minute bars written in {time.perf_counter() - start:.1f} s")
+
+        trades = make_trades(args.trades, symbols, directory)
+        start = time.perf_counter()
+        replayed = replay(trades, directory, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        counts = replayed['outcome'].value_counts().to_dict()
+        print(f"replayed {len(trades):,} trades in {elapsed:.1f} s ({len(trades) / elapsed:,.0f} trades/s): {counts}")
+
+        check_sample(trades, replayed, directory)
+        print("sample agrees with evaluator.first_bar_hits")
+        check_csv_and_close(directory, symbols[0])
+        check_empty_bars(directory, symbols[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Check and time the on-disk bar store.
+
+First runs BarStore.fetch_through against the fake Twelve Data server: the
+first call fetches and stores everything, repeats fetch only the tail from
+the covered time (the still-forming last bar is overwritten, not
+duplicated), a fresh store on the same directory picks the coverage up,
+and an earlier start backfills without breaking views already handed out.
+
+Then appends --years of weekday minute bars in API-sized pages, times
+[start, end) slices against reading the same bars from a Parquet file,
+checks the slices are views onto the mapped files (resident memory grows
+by the pages read, not the file) and that backtest.replay gives the same
+result from the store as from the file.
+
+Usage:  python benchmarks/bench_bar_store.py [--years 10] [--slices 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from backtest import load_bars, replay
+from bar_store import BarStore
+from benchmarks.bench_backtest import make_trades, write_bars
+from benchmarks.fake_twelvedata import FakeTwelveData
+from quotes import MAX_BARS, PriceClient
+
+
+def resident_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def check_fetch_through(directory):
+    now = datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+    start = now - timedelta(minutes=180)
+    times = [start + timedelta(minutes=i) for i in range(181)]
+    closes = np.linspace(1.08, 1.09, 181)
+    with FakeTwelveData() as server:
+        server.set_bars("EUR/USD", times, closes + 0.0001, closes - 0.0001)
+        server.set_bars("GBP/USD", times, closes + 0.2, closes + 0.18)
+        client = PriceClient("bench", base_url=server.base_url)
+        store = BarStore(directory)
+        bars = store.fetch_through(client.fetch_bars, ["EURUSD", "GBP/USD"], start, "1min", now)
+        assert server.calls['/time_series'] == 1 and server.bars_served == 2 * 181, (server.calls, server.bars_served)
+        assert len(bars["EUR/USD"]['time']) == 181 and bars["GBP/USD"]['high'][-1] == closes[-1] + 0.2
+        held = bars["EUR/USD"]
+        coverage = store.coverage("eurusd", "1min")
+        assert coverage == (np.datetime64(start, 's'), np.datetime64(now, 's')), coverage
+
+        # The forming last bar moved on and one more bar arrived: only those two come back
+        server.bars_served = 0
+        later = now + timedelta(minutes=1)
+        server.set_bars("EUR/USD", times + [later], np.append(closes + 0.0001, 1.095), np.append(closes - 0.0001, 1.07))
+        bars = store.fetch_through(client.fetch_bars, ["EUR/USD", "GBP/USD"], start, "1min", later)
+        assert server.bars_served == 3, server.bars_served  # EUR/USD's last two, GBP/USD's last one
+        assert len(bars["EUR/USD"]['time']) == 182 and bars["EUR/USD"]['low'][-1] == 1.07
+
+        # Another process half a minute on: same directory, only the forming bar is fetched again
+        server.bars_served = 0
+        bars = BarStore(directory).fetch_through(client.fetch_bars, ["EUR/USD"], start + timedelta(minutes=30),
+                                                 "1min", later + timedelta(seconds=30))
+        assert server.bars_served == 1 and bars["EUR/USD"]['time'][0] == np.datetime64(start + timedelta(minutes=30))
+
+        # Backfill before the covered range rewrites the files; the old view still reads
+        earlier = start - timedelta(minutes=60)
+        history = [earlier + timedelta(minutes=i) for i in range(60)] + times + [later]
+        server.set_bars("EUR/USD", history, np.full(len(history), 1.1), np.full(len(history), 1.0))
+        bars = store.fetch_through(client.fetch_bars, ["EUR/USD"], earlier, "1min", later)
+        assert len(bars["EUR/USD"]['time']) == 242 and store.coverage("EUR/USD", "1min")[0] == np.datetime64(earlier)
+        assert len(held['time']) == 181 and held['high'][0] == closes[0] + 0.0001
+        client.close()
+    print("fetch_through: tail-only refetch, forming bar overwritten, coverage shared, backfill safe")
+
+
+def bench_store(args, scratch):
+    files, root = os.path.join(scratch, "files"), os.path.join(scratch, "store")
+    os.makedirs(files)
+    times = write_bars(files, ["EURUSD"], args.years)
+    source = load_bars(os.path.join(files, "EURUSD.parquet"))
+
+    store = BarStore(root)
+    start = time.perf_counter()
+    for page in range(0, len(times), MAX_BARS):
+        chunk = {name: values[page:page + MAX_BARS] for name, values in source.items()}
+        store.ingest("EUR/USD", "1min", chunk, chunk['time'][0], chunk['time'][-1])
+    ingest_s = time.perf_counter() - start
+    stored = store.bars("EURUSD", "1min")
+    assert np.array_equal(stored['time'], source['time']) and np.array_equal(stored['close'], source['close'])
+    size_mb = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs) / 2**20
+    print(f"ingested {len(times):,} bars in {len(times) // MAX_BARS + 1} pages: {ingest_s:.1f} s, {size_mb:.0f} MB on disk")
+
+    rng = np.random.default_rng(1)
+    days = np.unique(times.astype("datetime64[D]"))
+    windows = days[rng.integers(0, len(days) - 1, args.slices)]
+    store = BarStore(root)  # Cold: nothing mapped yet
+    before = resident_mb()
+    start = time.perf_counter()
+    total = 0
+    for day in windows:
+        bars = store.bars("EURUSD", "1min", day, day + np.timedelta64(1, 'D'))
+        total += float(bars['high'].max() - bars['low'].min())
+    slice_us = (time.perf_counter() - start) / len(windows) * 1e6
+    grown = resident_mb() - before
+    base = store.bars("EURUSD", "1min")['high']
+    assert isinstance(bars['high'], np.memmap) and np.shares_memory(bars['high'], base) and not bars['high'].flags.writeable
+
+    start = time.perf_counter()
+    for day in windows[:20]:
+        frame = pd.read_parquet(os.path.join(files, "EURUSD.parquet"))
+        frame = frame[(frame['time'] >= day) & (frame['time'] < day + np.timedelta64(1, 'D'))]
+    parquet_ms = (time.perf_counter() - start) / 20 * 1000
+    print(f"one-day slice: store {slice_us:.0f} us, Parquet read {parquet_ms:.0f} ms "
+          f"(x{parquet_ms * 1000 / slice_us:.0f}); resident +{grown:.0f} MB after {args.slices} slices")
+
+    trades = make_trades(20000, ["EURUSD"], files)
+    from_files = replay(trades, files, workers=1)
+    start = time.perf_counter()
+    from_store = replay(trades, BarStore(root), workers=1)
+    pd.testing.assert_frame_equal(from_files, from_store)
+    print(f"replay from the store matches the Parquet file ({len(trades):,} trades in "
+          f"{time.perf_counter() - start:.1f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--slices", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        check_fetch_through(os.path.join(scratch, "fetched"))
+        bench_store(args, scratch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark the scalar per-trade SL/TP loop against the vectorized evaluator.
+
+Reports the evaluator end-to-end from trade dicts (including building the
+columns) and the NumPy kernel alone on prebuilt arrays, which is the cost
+once trades are held column-wise.
+
+Usage:  python benchmarks/bench_evaluator.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from evaluator import evaluate_hits, evaluate_trades, trade_arrays
+
+
+def scalar_loop(trades, prices):
+    """The original per-trade branch from check_and_update_trades"""
+    hits = []
+    for i, trade in enumerate(trades):
+        live_price = prices.get(trade["instrument"])
+        if live_price is None:
+            continue
+        entry_price, sl_price, target_price = float(trade["entry"]), float(trade["sl"]), float(trade["target"])
+        if entry_price == 0 or (sl_price == 0 and target_price == 0):
+            continue
+        if target_price > entry_price:
+            if target_price > 0 and live_price >= target_price:
+                hits.append((i, "Target Hit", "Win"))
+            elif sl_price > 0 and live_price <= sl_price:
+                hits.append((i, "SL Hit", "Loss"))
+        else:
+            if target_price > 0 and live_price <= target_price:
+                hits.append((i, "Target Hit", "Win"))
+            elif sl_price > 0 and live_price >= sl_price:
+                hits.append((i, "SL Hit", "Loss"))
+    return hits
+
+
+def make_trades(n, instruments, rng):
+    trades = []
+    for i in range(n):
+        entry = rng.uniform(50, 150)
+        distance = rng.uniform(1, 10)
+        direction = rng.choice((1, -1))
+        trades.append({
+            'id': i, 'instrument': rng.choice(instruments), 'entry': entry,
+            'sl': entry - direction * distance, 'target': entry + direction * distance * 1.5
+        })
+    return trades
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    instruments = [f"SYM{i}" for i in range(30)]
+    prices = {s: rng.uniform(50, 150) for s in instruments}
+
+    print(f"{'trades':>8} {'scalar (ms)':>12} {'from dicts (ms)':>16} {'kernel (ms)':>12} {'kernel speedup':>15}")
+    for size in args.sizes:
+        trades = make_trades(size, instruments, rng)
+
+        start = time.perf_counter()
+        expected = scalar_loop(trades, prices)
+        scalar_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        actual = evaluate_trades(trades, prices)
+        vector_ms = (time.perf_counter() - start) * 1000
+
+        entry, sl, target = trade_arrays(trades)
+        price = np.array([prices[t["instrument"]] for t in trades])
+        start = time.perf_counter()
+        evaluate_hits(entry, sl, target, price)
+        kernel_ms = (time.perf_counter() - start) * 1000
+
+        assert actual == expected, "vectorized evaluator disagrees with scalar loop"
+        print(f"{size:>8} {scalar_ms:>12.1f} {vector_ms:>16.1f} {kernel_ms:>12.2f} {scalar_ms / kernel_ms:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Check and time gap recovery of SL/TP hits the spot price checks missed.
+
+First drives a PriceMonitor against the fake Twelve Data server with
+recorded minute bars, moving its clock through them: a stop that was run
+and recovered, a target reached before a later stop, an untouched trade
+and a hit only the live price shows. A trade added later ignores a spike
+from before it was seen but not one after; a bar crossing both levels
+leaves its trade open and flagged, even against the live price, until its
+levels change; and bars coarser than a minute never decide an outcome.
+It also checks that each pass scans only from the time already covered,
+and that hits_since returns only newer hits and drops those on trades that
+load closed.
+
+Then times the vectorized bar scan against a per-trade loop over the same
+bars and checks they agree, ambiguous bars included.
+
+Usage:  python benchmarks/bench_gap_recovery.py [--trades 1000] [--bars 5000] [--symbols 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.fake_twelvedata import FakeTwelveData
+from evaluator import OUTCOMES, recover_trades
+from monitor import GAP_MAX_BAR, PriceMonitor
+from quotes import PriceClient, normalize_symbol
+
+
+def minute_bars(start, closes, spikes=()):
+    """Bars around closes with (minute, high, low) overrides"""
+    closes = np.asarray(closes, dtype=np.float64)
+    times = [start + timedelta(minutes=i) for i in range(len(closes))]
+    high, low = closes * 1.0002, closes * 0.9998
+    for minute, spike_high, spike_low in spikes:
+        high[minute], low[minute] = spike_high, spike_low
+    return times, high, low
+
+
+def check_monitor():
+    now = datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+    start = now - timedelta(minutes=120)
+    day = start.strftime("%Y-%m-%d")
+    trades = [
+        {'id': 1, 'date': day, 'instrument': 'EURUSD', 'entry': 1.085, 'sl': 1.08, 'target': 1.095, 'outcome': 'Open'},
+        {'id': 2, 'date': day, 'instrument': 'GBPUSD', 'entry': 1.265, 'sl': 1.255, 'target': 1.275, 'outcome': 'Open'},
+        {'id': 3, 'date': day, 'instrument': 'XAUUSD', 'entry': 1950.0, 'sl': 1960.0, 'target': 1930.0, 'outcome': 'Open'},
+        {'id': 4, 'date': day, 'instrument': 'EURUSD', 'entry': 1.085, 'sl': 1.07, 'target': 1.10, 'outcome': 'Open'},
+        {'id': 5, 'date': day, 'instrument': 'AUDUSD', 'entry': 0.652, 'sl': 0.645, 'target': 0.658, 'outcome': 'Open'}
+    ]
+    clock = [start]
+
+    prices = {"EUR/USD": 1.085, "GBP/USD": 1.265, "XAU/USD": 1950.0, "AUD/USD": 0.66}
+    with FakeTwelveData(prices=prices) as server:
+        server.set_bars("EUR/USD", *minute_bars(start, [1.085] * 120, [(30, 1.0852, 1.079), (90, 1.0985, 1.0849)]))
+        server.set_bars("GBP/USD", *minute_bars(start, [1.265] * 120, [(50, 1.28, 1.264), (80, 1.266, 1.25)]))
+        server.set_bars("XAU/USD", *minute_bars(start, [1950.0] * 120, [(70, 1965.0, 1925.0)]))
+        server.set_bars("AUD/USD", *minute_bars(start, [0.652] * 120))
+        client = PriceClient("bench", base_url=server.base_url)
+
+        def fetch_prices(pairs):
+            quoted = client.fetch_prices(pairs)
+            return {p: quoted[normalize_symbol(p)] for p in pairs if normalize_symbol(p) in quoted}
+
+        def fetch_bars(pairs, since, interval):
+            # Only the bars that had opened by the monitor's clock
+            bars = client.fetch_bars(pairs, since, interval)
+            upto = np.datetime64(clock[0], "s")
+            return {p: {k: v[bars[normalize_symbol(p)]['time'] < upto] for k, v in bars[normalize_symbol(p)].items()}
+                    for p in pairs if normalize_symbol(p) in bars}
+
+        def save_trades(closed):
+            for trade in closed:
+                trades[[t['id'] for t in trades].index(trade['id'])] = trade
+            return True
+
+        def run(at):
+            clock[0] = at
+            return {hit['id']: (hit['outcome'], hit['result'], hit['via']) for hit in monitor.run_once()}
+
+        monitor = PriceMonitor(lambda: list(trades), fetch_prices, save_trades, fetch_bars=fetch_bars,
+                               gap_interval=0, clock=lambda: clock[0])
+        # Every trade is first seen now: nothing before counts, the live price still does
+        assert run(start) == {5: ("Target Hit", "Win", 'price')}
+        assert list(monitor.hits_since(0)[1]) == [5] and monitor.hits_since(1) == (1, {})
+        assert server.calls == {'/time_series': 1, '/price': 1}, server.calls
+        assert monitor.bars_checked_to == start
+
+        # An hour on: the hits in between are recovered; trade 6 opens after EUR/USD's stop run
+        trades.append({'id': 6, 'date': day, 'instrument': 'EURUSD', 'entry': 1.085, 'sl': 1.0795, 'target': 1.098,
+                       'outcome': 'Open'})
+        found = run(start + timedelta(minutes=60))
+        assert found == {1: ("SL Hit", "Loss", 'bars'), 2: ("Target Hit", "Win", 'bars')}, found
+        # Only hits newer than the caller's version; trade 5 loaded closed this pass, so it was pruned
+        assert sorted(monitor.hits_since(1)[1]) == [1, 2] and sorted(monitor.hits_since(0)[1]) == [1, 2]
+        print(f"first hour: {len(found)} hits from bars, {dict(server.calls)} requests")
+
+        # Trade 6 only counts bars from when it was seen; the XAU/USD bar crossing both levels is not decided
+        found = run(now)
+        assert found == {6: ("Target Hit", "Win", 'bars')}, found
+        assert [(flag['id'], flag['bar_time']) for flag in monitor.snapshot()['ambiguous']] == [
+            (3, start + timedelta(minutes=70))]
+        assert [t['outcome'] for t in trades if t['id'] in (3, 4)] == ['Open', 'Open']
+        assert monitor.bars_checked_to == now and monitor.snapshot()['open_trades'] == 3
+
+        # Flagged trades are left alone even when the live price is through a level, until adjusted by hand
+        server.prices["XAU/USD"] = 1961.0
+        assert run(now) == {} and server.calls['/time_series'] == 4
+        trades[2] = dict(trades[2], sl=1965.0)
+        assert run(now) == {} and monitor.snapshot()['ambiguous'] == []
+        trades[2] = dict(trades[2], sl=1960.5)
+        assert run(now) == {3: ("SL Hit", "Loss", 'price')}
+        run(now)
+        assert monitor.hits_since(0) == (4, {}), "hits on trades that load closed should be pruned"
+        client.close()
+    print("later passes: entry-time starts, ambiguous bar flagged, trade 4 still open")
+
+    # Coarser bars say a level was crossed but not whether it was between two checks
+    quarter = np.datetime64(start, "s") + np.arange(8) * np.timedelta64(15 * 60, "s")
+    coarse = {'EURUSD': {'time': quarter, 'high': np.full(8, 1.0852), 'low': np.full(8, 1.079)}}
+    assert recover_trades(trades[:1], coarse) and recover_trades(trades[:1], coarse, max_bar=GAP_MAX_BAR) == []
+    print("bars coarser than a minute: skipped")
+
+
+def scalar_first_hits(trades, series, ambiguous):
+    """Per-trade loop over the bars: the straightforward version of recover_trades"""
+    hits = []
+    for i, trade in enumerate(trades):
+        is_long = trade['target'] > trade['entry']
+        opened = np.datetime64(trade['date'], 's')
+        for t, high, low in zip(series['time'], series['high'], series['low']):
+            if t < opened:
+                continue
+            sl_hit = low <= trade['sl'] if is_long else high >= trade['sl']
+            target_hit = high >= trade['target'] if is_long else low <= trade['target']
+            if sl_hit and target_hit:
+                ambiguous.append((i, t))
+                break
+            if sl_hit or target_hit:
+                hits.append((i, *OUTCOMES[2 if sl_hit else 1], t))
+                break
+    return hits
+
+
+def bench_scan(n_trades, n_bars, n_symbols):
+    rng = np.random.default_rng(3)
+    start = np.datetime64("2024-03-01T00:00", "s")
+    times = start + np.arange(n_bars) * np.timedelta64(15 * 60, "s")  # 15min bars: ~52 days at 5000
+    days = np.unique(times.astype("datetime64[D]"))
+    bars, trades = {}, []
+    for s in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+        bars[f"SYM{s}"] = {'time': times, 'high': close * 1.0005, 'low': close * 0.9995}
+    for i in range(n_trades):
+        symbol = f"SYM{i % n_symbols}"
+        day = days[rng.integers(0, len(days) // 2)]  # Trades carry a date, not a time
+        entry = bars[symbol]['high'][np.searchsorted(times, day)] / 1.0005
+        stop = entry * rng.uniform(0.0003, 0.03)  # The tightest fit inside one bar, crossing both levels
+        side = 1 if rng.random() < 0.5 else -1
+        trades.append({'id': i, 'instrument': symbol, 'date': str(day), 'entry': entry,
+                       'sl': entry - side * stop, 'target': entry + side * stop * rng.uniform(1, 3)})
+
+    t0 = time.perf_counter()
+    ambiguous = []
+    vectorized = recover_trades(trades, bars, ambiguous=ambiguous)
+    vector_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    looped, looped_ambiguous = [], []
+    for symbol in bars:
+        idx = [i for i, t in enumerate(trades) if t['instrument'] == symbol]
+        both = []
+        looped += [(idx[j], *rest) for j, *rest in scalar_first_hits([trades[i] for i in idx], bars[symbol], both)]
+        looped_ambiguous += [(idx[j], t) for j, t in both]
+    loop_ms = (time.perf_counter() - t0) * 1000
+
+    assert vectorized == sorted(looped), "vectorized and looped scans disagree"
+    assert sorted(ambiguous) == sorted(looped_ambiguous), "vectorized and looped scans disagree on ambiguous bars"
+    print(f"{n_trades} trades x {n_bars} bars x {n_symbols} symbols: "
+          f"per-trade loop {loop_ms:8.1f} ms, vectorized {vector_ms:7.1f} ms "
+          f"(x{loop_ms / vector_ms:.0f}), {len(vectorized)} hits, {len(ambiguous)} ambiguous")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1000)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=20)
+    args = parser.parse_args()
+
+    check_monitor()
+    bench_scan(args.trades, args.bars, args.symbols)
+
+
+if __name__ == "__main__":
+    main()
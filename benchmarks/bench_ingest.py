@@ -0,0 +1,199 @@
+"""Compare the old row-by-row sheet parser with the vectorized ingest stage.
+
+Generates worksheet rows the way get_all_values returns them (all strings,
+ragged, with blank rows, header repeats, junk and zero prices mixed in),
+checks both parsers agree on rows the old loop handled correctly, checks
+parse_trade_dicts keeps and rejects exactly what parse_trade_frame does
+(as does parse_trade_rows_at on a subset of rows, both ways), and prints how many rows each rule rejected. Two timings per size:
+
+  dicts  rows -> list of trade dicts (old loop vs the one-pass
+         parse_trade_dicts loop)
+  store  rows -> TradeStore, what a session load does (old loop followed by
+         TradeStore.from_records vs parse_trade_frame straight into TradeStore)
+
+Usage:  python benchmarks/bench_ingest.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import REJECT_RULES, ROW_LOOP_LIMIT, parse_trade_dicts, parse_trade_frame, parse_trade_rows_at
+from sheets import SHEET_COLUMNS
+from trade_store import TradeStore
+
+TRADERS = ['Waithaka', 'Wallace', 'Max', 'Michael', 'Collins', 'Kipngeno']
+INSTRUMENTS = ['XAUUSD', 'USOIL', 'BTCUSD', 'ustech', 'US30', 'EURUSD', 'nas100']
+
+
+def legacy_parse(all_values):
+    """The parsing loop load_trades_from_sheets used before the ingest stage"""
+    for i, row in enumerate(all_values):
+        if len(row) > 3:
+            instrument = str(row[3]).strip().upper()
+            if instrument == 'USTECH':
+                all_values[i][3] = 'US30'
+            elif instrument == 'NAS100':
+                all_values[i][3] = 'NAS100'
+            elif instrument == 'SPX500':
+                all_values[i][3] = 'SPX500'
+
+    processed_records = []
+    for i, row in enumerate(all_values[1:], 1):
+        if not any(str(cell).strip() for cell in row):
+            continue
+        try:
+            while len(row) < 12:
+                row.append('')
+            if (row[2] and row[3] and row[4] and row[5] and row[6] and
+                str(row[2]).strip() not in ['', 'trader'] and
+                str(row[3]).strip() not in ['', 'instrument'] and
+                str(row[4]).strip() not in ['', '0.0', '0']):
+                try:
+                    entry_val = float(row[4])
+                    sl_val = float(row[5])
+                    target_val = float(row[6])
+                    if entry_val == 0.0 and sl_val == 0.0 and target_val == 0.0:
+                        continue
+                    outcome = str(row[10]).strip() if row[10] and str(row[10]).strip() not in ['', 'outcome'] else "Open"
+                    result = str(row[11]).strip() if row[11] and str(row[11]).strip() not in ['', 'result'] else "Open"
+                    processed_records.append({
+                        'id': int(row[0]) if row[0] and str(row[0]).strip().isdigit() else i,
+                        'date': str(row[1]).strip() if row[1] else '',
+                        'trader': str(row[2]).strip(),
+                        'instrument': str(row[3]).strip(),
+                        'entry': entry_val,
+                        'sl': sl_val,
+                        'target': target_val,
+                        'risk': float(row[7]) if row[7] and str(row[7]).replace('.', '').replace('-', '').isdigit() else abs(entry_val - sl_val),
+                        'reward': float(row[8]) if row[8] and str(row[8]).replace('.', '').replace('-', '').isdigit() else abs(target_val - entry_val),
+                        'rrRatio': float(row[9]) if row[9] and str(row[9]).replace('.', '').replace('-', '').isdigit() else 0.0,
+                        'outcome': outcome,
+                        'result': result
+                    })
+                except (ValueError, TypeError):
+                    continue
+        except (ValueError, TypeError, IndexError):
+            continue
+    return processed_records
+
+
+def make_rows(n, seed=11):
+    """Sheet rows; about 1 in 20 is something the parser has to reject"""
+    rng = random.Random(seed)
+    rows = [list(SHEET_COLUMNS)]
+    for i in range(1, n + 1):
+        kind = rng.random()
+        if kind < 0.01:
+            rows.append([])  # Blank row
+            continue
+        if kind < 0.02:
+            rows.append(list(SHEET_COLUMNS))  # Header pasted again
+            continue
+        entry = rng.uniform(1, 3000)
+        sl, target = entry * 0.99, entry * 1.02
+        row = [str(i), f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+               rng.choice(TRADERS), rng.choice(INSTRUMENTS),
+               f"{entry:.5f}", f"{sl:.5f}", f"{target:.5f}",
+               f"{entry - sl:.5f}", f"{target - entry:.5f}", "2.0",
+               rng.choice(['Target Hit', 'SL Hit', 'Open', '']), rng.choice(['Win', 'Loss', 'Open', ''])]
+        if kind < 0.03:
+            row[4] = 'n/a'  # Unparseable price
+        elif kind < 0.04:
+            row[4] = row[5] = row[6] = '0.0001' if rng.random() < 0.5 else '0.00'  # Zero prices
+        elif kind < 0.05:
+            row = row[:rng.randint(5, 11)]  # Ragged row, sheet trimmed trailing cells
+        rows.append(row)
+    return rows
+
+
+def copy_rows(rows):
+    return [list(row) for row in rows]
+
+
+def timed(fn, rows, repeat=3):
+    """Best of a few runs; the old loop edits rows in place so each run gets a fresh copy"""
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        data = copy_rows(rows)
+        start = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return out, best * 1000
+
+
+def check_number_formats():
+    """Values the old isdigit() check got wrong"""
+    rows = [list(SHEET_COLUMNS),
+            ['1', '2024-01-01', 'Max', 'XAUUSD', '1,820.50', '1,815.00', '1,830.00', '5.5', '9.5', '1.73', '', ''],
+            ['2', '2024-01-01', 'Max', 'EURUSD', '1.1', '1.09999', '1.10002', '1e-5', '2e-5', '2', '', '']]
+    legacy = legacy_parse(copy_rows(rows))
+    vectorized, _ = parse_trade_dicts(rows)
+    assert [t['id'] for t in legacy] == [2], "expected the old loop to drop the comma-formatted row"
+    assert legacy[0]['risk'] != 1e-5, "expected the old loop to ignore the 1e-5 risk"
+    assert [t['entry'] for t in vectorized] == [1820.5, 1.1]
+    assert vectorized[1]['risk'] == 1e-5 and vectorized[1]['reward'] == 2e-5
+    print("number formats: '1,820.50' and '1e-5' now parse (old loop dropped/ignored them)")
+
+
+def check_frame_parity():
+    """The dict loop applies parse_trade_frame's rules, odd cells included"""
+    def row(**cells):
+        values = ['1', '2024-01-01', 'Max', 'XAUUSD', '100', '90', '110', '10', '10', '1', '', '']
+        for column, value in cells.items():
+            values[SHEET_COLUMNS.index(column)] = value
+        return values
+
+    rows = [list(SHEET_COLUMNS), row(), row(entry='1_00'), row(entry='\u0661\u0660\u0660'), row(risk='nan'),
+            row(sl='1e999'), row(entry=' 100 ', date=' 2024-02-02 '), row(id='+5'), row(id='\u00b2'),
+            row(risk='1,000.5'), row(rrRatio='abc'), row(entry='.5', target='+1e3'), row(instrument='ustech'),
+            row(entry='0.00', sl='0', target='0'), row(trader='trader'), row(outcome='outcome', result='result'),
+            [None] * 12, ['', ' ', '\t'], row()[:5], row() + ['extra'],
+            [1, '2024-01-01', 'Max', 'EURUSD', 1.5, 1.4, 1.6, None, None, None, None, None]]
+    rows += make_rows(2000)[1:]
+    dicts, rejected = parse_trade_dicts(rows)
+    frame, frame_rejected = parse_trade_frame(rows)
+    expected = [dict(record, id=int(record['id'])) for record in frame.to_dict('records')]
+    assert dicts == expected and rejected == frame_rejected, "parse_trade_dicts and parse_trade_frame disagree"
+    print(f"dict loop matches parse_trade_frame: {len(dicts)} kept, {sum(rejected.values())} rejected")
+
+    # SheetSync's partial re-parse: the odd rows alone (row loop) against the whole sheet (column-wise)
+    whole, whole_rejected = parse_trade_rows_at(rows, range(2, len(rows) + 1))
+    assert whole.reset_index(drop=True).equals(frame), "parse_trade_rows_at disagrees with parse_trade_frame"
+    odd = range(2, 23)
+    partial, partial_rejected = parse_trade_rows_at([rows[0]] + [rows[n - 1] for n in odd], odd)
+    assert len(odd) <= ROW_LOOP_LIMIT < len(rows)
+    assert partial.equals(whole.loc[:odd[-1]]), "the row loop and the column-wise parse disagree"
+    assert partial_rejected == {n: rule for n, rule in whole_rejected.items() if n in odd}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    check_number_formats()
+    check_frame_parity()
+    print(f"{'rows':>9} {'dicts old':>10} {'dicts new':>10} {'store old':>10} {'store new':>10} {'kept':>9}  rejected by rule")
+    for size in args.sizes:
+        rows = make_rows(size)
+        repeat = 1 if size >= 1000000 else 3
+        legacy, legacy_ms = timed(legacy_parse, rows, repeat)
+        (vectorized, rejected), vector_ms = timed(parse_trade_dicts, rows, repeat)
+        legacy_store, legacy_store_ms = timed(lambda data: TradeStore.from_records(legacy_parse(data)), rows, repeat)
+        store, store_ms = timed(lambda data: TradeStore(parse_trade_frame(data)[0]), rows, repeat)
+
+        assert vectorized == legacy, f"parsers disagree at {size} rows"
+        assert store.records() == legacy_store.records(), f"stores disagree at {size} rows"
+        assert sum(rejected.values()) + len(vectorized) == size
+
+        report = ", ".join(f"{rule}={rejected[rule]}" for rule in REJECT_RULES)
+        print(f"{size:>9} {legacy_ms:>10.0f} {vector_ms:>10.0f} {legacy_store_ms:>10.0f} {store_ms:>10.0f} "
+              f"{len(vectorized):>9}  {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare global st.cache_data.clear() invalidation with data-version keys.
+
+Simulates a desk of sessions on one server process sharing a fake Trades
+worksheet. The old scheme re-loaded and fingerprinted a whole TradeStore on
+every auto-refresh tick of every session and cleared every cached function
+on a forced refresh. The new one keys the loaders on DataVersion: an idle
+tick is a cache hit plus an integer compare, and a write only misses the
+entries that depend on the trades. Reports the cost of an idle tick and how
+many cached functions recompute after one session's write.
+
+Usage:  python benchmarks/bench_invalidation.py [--trades 50000] [--sessions 20]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streamlit as st
+
+from benchmarks.bench_sheet_sync import make_rows
+from benchmarks.fake_gspread import FakeWorksheet
+from data_version import DataVersion
+from ingest import parse_trade_rows_at
+from sync import SheetSync
+from trade_store import TradeStore
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)  # Bare-mode cache warnings
+
+computed = Counter()  # Cached function bodies actually executed
+sheet = None
+mirror = None
+data_version = DataVersion()
+
+
+def sync_sheet():
+    if mirror.sync(sheet) != SheetSync.UNCHANGED:
+        data_version.bump()
+    return mirror
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def legacy_load():
+    computed['trades loader'] += 1
+    return sync_sheet().trades()
+
+
+@st.cache_data(ttl=30, max_entries=4, show_spinner=False)
+def versioned_load(version=0):
+    computed['trades loader'] += 1
+    return sync_sheet().trades()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def unrelated_lookup(key):
+    """Stands in for caches that don't depend on the trades (quotes, config)"""
+    computed['unrelated cache'] += 1
+    return key
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    global sheet, mirror
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=50000)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    sheet = FakeWorksheet(rows=make_rows(args.trades))
+    mirror = SheetSync(parse_trade_rows_at)
+    sync_sheet()
+
+    # Idle tick: nothing changed anywhere
+    session_version = data_version.value
+    legacy_store_hash = TradeStore(legacy_load()).fingerprint()
+    legacy_ms = timed(lambda: TradeStore(legacy_load()).fingerprint() == legacy_store_hash, 5)
+    versioned_ms = timed(lambda: (versioned_load(data_version.value), data_version.value == session_version), 50)
+    print(f"trades: {args.trades}  sessions: {args.sessions}")
+    print(f"idle auto-refresh tick:   {legacy_ms:8.1f} ms legacy  vs {versioned_ms:.3f} ms versioned  (per session)")
+    print(f"idle ticks per minute:    {legacy_ms * args.sessions * 6 / 1000:8.2f} s legacy  vs "
+          f"{versioned_ms * args.sessions * 6 / 1000:.3f} s versioned  (whole desk)")
+
+    # One session closes a trade and forces a refresh; every session then reloads
+    for scheme in ('legacy', 'versioned'):
+        for session in range(args.sessions):
+            unrelated_lookup(session)
+        computed.clear()
+        row = sheet.rows[-1]
+        row[10], row[11] = ('Target Hit', 'Win') if row[10] == 'Open' else ('Open', 'Open')
+        if scheme == 'legacy':
+            st.cache_data.clear()
+        else:
+            sync_sheet()
+        for session in range(args.sessions):
+            if scheme == 'legacy':
+                legacy_load()
+            else:
+                versioned_load(data_version.value)
+            unrelated_lookup(session)
+        print(f"after one write ({scheme:>9}): " + ", ".join(f"{name} ran {n}x" for name, n in sorted(computed.items())))
+        if scheme == 'versioned':
+            assert computed['trades loader'] == 1 and computed['unrelated cache'] == 0
+    assert versioned_ms < legacy_ms
+
+
+if __name__ == "__main__":
+    main()
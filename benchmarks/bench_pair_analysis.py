@@ -0,0 +1,148 @@
+"""Compare the old Pair Analysis loops with the aggregate-cube pipeline.
+
+Builds a synthetic trade history, then computes the Pair Analysis summary,
+trader comparison table and weekly stats for one pair both ways: the old
+nested trader/week filters with iterrows P&L, and the cube slice + groupby
+the page uses now. Checks both produce the same tables. "cold" includes
+building the cube (once per data version); "warm" is every rerun after.
+
+Usage:  python benchmarks/bench_pair_analysis.py [--trades 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from analytics import build_cube, pair_comparison, pair_weekly_stats, slice_cube, summarize
+from benchmarks.bench_trade_store import TRADERS, make_trades
+from trade_store import TradeStore
+
+PAIR = 'XAUUSD'
+
+
+def legacy_tables(df, selected_pair, selected_traders, start_date, end_date):
+    """The page's previous per-trader and per-week loops, unchanged"""
+    filtered_df = df[
+        (df['instrument'] == selected_pair) &
+        (df['trader'].isin(selected_traders)) &
+        (df['date'].dt.date >= start_date) &
+        (df['date'].dt.date <= end_date)
+    ]
+    closed_trades = filtered_df[filtered_df['result'].isin(['Win', 'Loss', 'Breakeven'])]
+
+    total_pnl = 0
+    for _, trade in closed_trades.iterrows():
+        if trade['result'] == 'Win':
+            total_pnl += trade['reward']
+        elif trade['result'] == 'Loss':
+            total_pnl -= trade['risk']
+
+    trader_stats = []
+    for trader in selected_traders:
+        trader_data = filtered_df[filtered_df['trader'] == trader]
+        trader_closed = trader_data[trader_data['result'].isin(['Win', 'Loss', 'Breakeven'])]
+        trader_wins = trader_closed[trader_closed['result'] == 'Win']
+        trader_losses = trader_closed[trader_closed['result'] == 'Loss']
+        trader_pnl = 0
+        for _, trade in trader_closed.iterrows():
+            if trade['result'] == 'Win':
+                trader_pnl += trade['reward']
+            elif trade['result'] == 'Loss':
+                trader_pnl -= trade['risk']
+        trader_stats.append({
+            'Trader': trader,
+            'Total Trades': len(trader_data),
+            'Closed Trades': len(trader_closed),
+            'Wins': len(trader_wins),
+            'Losses': len(trader_losses),
+            'Win Rate %': (len(trader_wins) / len(trader_closed) * 100) if len(trader_closed) > 0 else 0,
+            'Avg R:R Ratio': trader_closed['rrRatio'].mean() if len(trader_closed) > 0 else 0,
+            'Total P&L': trader_pnl
+        })
+
+    weekly_data = closed_trades.copy()
+    weekly_data['week'] = weekly_data['date'].dt.to_period('W').dt.start_time
+    weekly_stats_list = []
+    for week in weekly_data['week'].unique():
+        week_trades = weekly_data[weekly_data['week'] == week]
+        for trader in selected_traders:
+            trader_week = week_trades[week_trades['trader'] == trader]
+            if len(trader_week) > 0:
+                wins = len(trader_week[trader_week['result'] == 'Win'])
+                total = len(trader_week)
+                week_pnl = 0
+                for _, trade in trader_week.iterrows():
+                    if trade['result'] == 'Win':
+                        week_pnl += trade['reward']
+                    elif trade['result'] == 'Loss':
+                        week_pnl -= trade['risk']
+                weekly_stats_list.append({
+                    'week': week,
+                    'trader': trader,
+                    'win_rate': (wins / total * 100) if total > 0 else 0,
+                    'rrRatio': trader_week['rrRatio'].mean(),
+                    'trade_count': total,
+                    'pnl': week_pnl
+                })
+
+    return total_pnl, pd.DataFrame(trader_stats), pd.DataFrame(weekly_stats_list)
+
+
+def cube_tables(cube, selected_pair, selected_traders, start_date, end_date):
+    """What the page does now"""
+    rows = slice_cube(cube, traders=selected_traders, instruments=[selected_pair], start=start_date, end=end_date)
+    totals = summarize(rows).iloc[0]
+    return totals['pnl'], pair_comparison(rows, selected_traders), pair_weekly_stats(rows)
+
+
+def same_table(a, b):
+    a = a.sort_values(list(a.columns[:2])).reset_index(drop=True)
+    b = b.sort_values(list(b.columns[:2])).reset_index(drop=True)
+    for col in a.columns:
+        left, right = a[col].to_numpy(), b[col].to_numpy()
+        if np.issubdtype(np.asarray(left).dtype, np.number):
+            assert np.allclose(left.astype(float), right.astype(float)), f"column {col} differs"
+        else:
+            assert list(map(str, left)) == list(map(str, right)), f"column {col} differs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=200000)
+    args = parser.parse_args()
+
+    df = TradeStore.from_records(make_trades(args.trades)).df
+    start_date, end_date = df['date'].min().date(), df['date'].max().date()
+    filters = (PAIR, TRADERS, start_date, end_date)
+
+    start = time.perf_counter()
+    legacy = legacy_tables(df, *filters)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cube = build_cube(df)
+    cube_tables(cube, *filters)
+    cold_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = cube_tables(cube, *filters)
+    warm_s = time.perf_counter() - start
+
+    assert np.isclose(legacy[0], current[0]), "total P&L differs"
+    same_table(legacy[1], current[1])
+    same_table(legacy[2], current[2])
+
+    print(f"trades: {args.trades}  pair: {PAIR}  weekly rows: {len(current[2])}")
+    print(f"legacy loops:      {legacy_s * 1000:9.1f} ms")
+    print(f"cube (cold):       {cold_s * 1000:9.1f} ms  ({legacy_s / cold_s:.0f}x)")
+    print(f"cube (warm rerun): {warm_s * 1000:9.1f} ms  ({legacy_s / warm_s:.0f}x)")
+    print("tables match")
+
+
+if __name__ == "__main__":
+    main()
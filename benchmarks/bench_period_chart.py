@@ -0,0 +1,109 @@
+"""Compare the old Trader Analysis progress-chart loop with the period aggregator.
+
+Builds a synthetic trade history, then produces the page's chart_df for each
+named grouping three ways: the old per-trader/per-period filters with
+iterrows P&L, one grouped pass over the aggregate cube, and a rerun served
+from the store's per-version memo. Checks the tables match, and that custom
+frequencies ("2W", "14D", "QS") bucket every trade exactly once.
+
+Usage:  python benchmarks/bench_period_chart.py [--trades 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from analytics import slice_cube, trader_period_chart
+from benchmarks.bench_pair_analysis import same_table
+from benchmarks.bench_trade_store import TRADERS, make_trades
+from trade_store import TradeStore
+
+FREQS = {'Daily': None, 'Weekly': 'W', 'Monthly': 'M'}
+
+
+def legacy_chart(filtered_df, selected_traders, time_grouping):
+    """The page's previous loop, unchanged apart from the grouping switch"""
+    time_data = filtered_df.copy()
+    freq = FREQS[time_grouping]
+    if freq is None:
+        time_data['time_period'] = time_data['date'].dt.normalize()
+    else:
+        time_data['time_period'] = time_data['date'].dt.to_period(freq).dt.start_time
+
+    chart_data = []
+    for trader in selected_traders:
+        trader_data = time_data[time_data['trader'] == trader]
+        for period in sorted(trader_data['time_period'].unique()):
+            period_data = trader_data[trader_data['time_period'] == period]
+            closed_trades_period = period_data[period_data['result'].isin(['Win', 'Loss', 'Breakeven'])]
+            period_pnl = 0
+            for _, trade in closed_trades_period.iterrows():
+                if trade['result'] == 'Win':
+                    period_pnl += trade['reward']
+                elif trade['result'] == 'Loss':
+                    period_pnl -= trade['risk']
+            wins = len(closed_trades_period[closed_trades_period['result'] == 'Win'])
+            losses = len(closed_trades_period[closed_trades_period['result'] == 'Loss'])
+            chart_data.append({
+                'Trader': trader,
+                'Time Period': period,
+                'Total Trades': len(period_data),
+                'Wins': wins,
+                'Losses': losses,
+                'Win Rate': (wins / len(closed_trades_period) * 100) if len(closed_trades_period) > 0 else 0,
+                'P&L': period_pnl,
+                'Avg R:R': closed_trades_period['rrRatio'].mean() if len(closed_trades_period) > 0 else 0
+            })
+    return pd.DataFrame(chart_data)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=200000)
+    args = parser.parse_args()
+
+    store = TradeStore.from_records(make_trades(args.trades))
+    df = store.df
+    start_date, end_date = df['date'].min().date(), df['date'].max().date()
+    filtered_df = df[df['trader'].isin(TRADERS)]
+    store.cube()  # Built once per data version, shared with the other pages
+
+    print(f"trades: {args.trades}")
+    print(f"{'grouping':>9} {'rows':>6} {'legacy ms':>10} {'grouped ms':>11} {'memo ms':>8}")
+    for grouping in FREQS:
+        key = ('trader_period_chart', tuple(TRADERS), start_date, end_date, grouping)
+
+        def compute():
+            rows = slice_cube(store.cube(), traders=TRADERS, start=start_date, end=end_date)
+            return trader_period_chart(rows, TRADERS, grouping)
+
+        legacy, legacy_ms = timed(lambda: legacy_chart(filtered_df, TRADERS, grouping))
+        chart, grouped_ms = timed(lambda: store.memo(key, compute))
+        cached, memo_ms = timed(lambda: store.memo(key, compute))
+        same_table(legacy, chart)
+        assert cached is chart, "second lookup should come from the memo"
+        print(f"{grouping:>9} {len(chart):>6} {legacy_ms:>10.0f} {grouped_ms:>11.1f} {memo_ms:>8.3f}")
+
+    rows = slice_cube(store.cube(), traders=TRADERS)
+    for freq in ['2W', '14D', 'QS', pd.Grouper(freq='6W')]:
+        chart = trader_period_chart(rows, TRADERS, freq)
+        assert chart['Total Trades'].sum() == len(df), f"{freq} lost trades"
+        assert (chart['Total Trades'] > 0).all(), f"{freq} kept empty buckets"
+    print("tables match; custom frequencies bucket every trade once")
+
+    store.update(int(df['id'].iloc[0]), result='Win')
+    assert store.memo(key, lambda: 'recomputed') == 'recomputed', "memo should be dropped when the trades change"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Check and time the streaming quote mode against the local WebSocket feed.
+
+First drives a PriceMonitor with a PriceStream pass by pass: instruments
+the feed refuses or has not priced yet are polled from the fake REST
+server and the rest are not, a stop that is crossed and reverts between
+passes still closes, the symbol is unsubscribed once its last trade is
+closed and a new trade's symbol subscribed, a trade closed by hand is not
+overwritten by a later tick, and after the connection drops the stream
+reconnects, resubscribes and keeps catching hits.
+
+Then runs the monitor in the background over --trades open trades on
+--symbols instruments and streams --ticks random-walk ticks, checking
+every outcome against evaluator.replay_trades over the same ticks. Sent as
+fast as the feed goes it reports the ticks/s processed; paced at --rate it
+reports hit latency, from the crossing tick leaving the feed to the trade
+being saved (in the flat-out run that latency is mostly queueing).
+
+Usage:  python benchmarks/bench_price_stream.py [--trades 1000] [--symbols 20] [--ticks 100000]
+                                                [--rate 1000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.fake_price_stream import FakePriceStream
+from benchmarks.fake_twelvedata import FakeTwelveData
+from evaluator import is_trade_open, replay_trades
+from monitor import MONITOR_INTERVAL, PriceMonitor
+from quotes import PriceClient, normalize_symbol
+from streaming import PriceStream
+
+
+def wait_for(condition, timeout=5.0, what="condition"):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"timed out waiting for {what}")
+        time.sleep(0.01)
+
+
+def check_stream():
+    trades = [
+        {'id': 1, 'date': "2024-01-02", 'instrument': 'EURUSD', 'entry': 1.085, 'sl': 1.08, 'target': 1.095, 'outcome': 'Open'},
+        {'id': 2, 'date': "2024-01-02", 'instrument': 'XAUUSD', 'entry': 1950.0, 'sl': 1960.0, 'target': 1930.0, 'outcome': 'Open'},
+        {'id': 3, 'date': "2024-01-02", 'instrument': 'GBPUSD', 'entry': 1.265, 'sl': 1.255, 'target': 1.275, 'outcome': 'Open'}
+    ]
+    polled = []
+    with FakeTwelveData(prices={"EUR/USD": 1.085, "XAU/USD": 1950.0, "GBP/USD": 1.265, "USD/JPY": 149.3}) as rest, \
+            FakePriceStream(refuse={"GBP/USD"}) as feed:
+        client = PriceClient("bench", base_url=rest.base_url)
+
+        def fetch_prices(pairs):
+            polled.append(sorted(pairs))
+            quoted = client.fetch_prices(pairs)
+            return {p: quoted[normalize_symbol(p)] for p in pairs if normalize_symbol(p) in quoted}
+
+        def save_trades(closed):
+            for trade in closed:
+                trades[[t['id'] for t in trades].index(trade['id'])] = trade
+            return True
+
+        stream = PriceStream(feed.url, heartbeat=0.5, timeout=2, backoff=(0.05, 0.2)).start()
+        monitor = PriceMonitor(lambda: list(trades), fetch_prices, save_trades, stream=stream)
+
+        # Nothing streamed yet: everything is polled; GBP/USD is refused by the feed
+        assert monitor.run_once() == [] and polled[-1] == ['EURUSD', 'GBPUSD', 'XAUUSD'], polled
+        feed.wait_subscribed({"EUR/USD", "XAU/USD"})
+        wait_for(lambda: stream.failed == {"GBP/USD"}, what="the refused symbol")
+        feed.play([("EUR/USD", 1.086), ("XAU/USD", 1951.0)])
+        wait_for(lambda: stream.ticks == 2, what="first ticks")
+        assert monitor.run_once() == [] and polled[-1] == ['GBPUSD'], polled
+
+        # A stop run that reverts before the next pass still closes the trade
+        feed.play([("EUR/USD", 1.0795), ("EUR/USD", 1.085)])
+        wait_for(lambda: stream.ticks == 4, what="the stop run")
+        hits = monitor.run_once()
+        assert [(h['id'], h['outcome'], h['via'], h['price']) for h in hits] == [(1, "SL Hit", 'stream', 1.0795)], hits
+
+        # Its last trade closed: EUR/USD is dropped; a new trade's symbol is picked up
+        trades.append({'id': 4, 'date': "2024-01-03", 'instrument': 'USDJPY', 'entry': 149.3, 'sl': 148.5,
+                       'target': 151.0, 'outcome': 'Open'})
+        monitor.run_once()
+        wait_for(lambda: "EUR/USD" not in feed.subscribed() and "USD/JPY" in feed.subscribed(), what="resubscribe")
+        assert feed.actions['unsubscribe'] == 1
+
+        # Closed by hand before the monitor reloaded: a later tick through its stop changes nothing
+        trades[1] = dict(trades[1], outcome="Manual Close @ 1955.00000", result="Loss")
+        feed.play([("XAU/USD", 1961.0)])
+        wait_for(lambda: stream.ticks == 5, what="the late tick")
+        assert monitor.run_once() == [] and trades[1]['outcome'] == "Manual Close @ 1955.00000"
+
+        # Dropped connection: reconnect, resubscribe and keep catching hits
+        feed.drop()
+        wait_for(lambda: stream.reconnects >= 1 and "USD/JPY" in feed.subscribed(), what="the reconnect")
+        feed.play([("USD/JPY", 151.2)])
+        wait_for(lambda: stream.ticks == 6, what="the tick after reconnecting")
+        hits = monitor.run_once()
+        assert [(h['id'], h['outcome'], h['via']) for h in hits] == [(4, "Target Hit", 'stream')], hits
+        assert feed.connections == 2, feed.connections
+        stream.stop()
+        client.close()
+    print(f"stream checks passed: {rest.calls['/price']} polls, {dict(feed.actions)} feed actions")
+
+
+def bench_stream(n_trades, n_symbols, n_ticks, rate=None):
+    rng = np.random.default_rng(8)
+    symbols = [f"S{s:02d}/USD" for s in range(n_symbols)]
+    paths = {s: 100 * np.exp(np.cumsum(rng.normal(0, 0.0002, n_ticks // n_symbols))) for s in symbols}
+    trades = []
+    for i in range(n_trades):
+        symbol = symbols[i % n_symbols]
+        stop = rng.uniform(0.002, 0.02) * 100
+        side = 1 if rng.random() < 0.5 else -1
+        trades.append({'id': i + 1, 'instrument': symbol, 'entry': 100.0, 'sl': 100.0 - side * stop,
+                       'target': 100.0 + side * stop * rng.uniform(1, 3), 'outcome': 'Open'})
+    order = np.argsort(rng.random(n_symbols * len(paths[symbols[0]])), kind="stable") % n_symbols
+    position = dict.fromkeys(symbols, 0)
+    ticks, tick_index = [], {s: [] for s in symbols}  # Per symbol: feed position of each of its ticks
+    for s in order:
+        symbol = symbols[s]
+        tick_index[symbol].append(len(ticks))
+        ticks.append((symbol, float(paths[symbol][position[symbol]])))
+        position[symbol] += 1
+
+    expected = {trades[i]['id']: (outcome, tick_index[trades[i]['instrument']][tick])
+                for i, outcome, _, tick in replay_trades(trades, paths)}
+    saved = {}
+
+    def save_trades(closed):
+        now = time.perf_counter()
+        for trade in closed:
+            saved[trade['id']] = (trade['outcome'], now)
+            trades[trade['id'] - 1] = trade
+        return True
+
+    with FakePriceStream() as feed:
+        stream = PriceStream(feed.url)
+        monitor = PriceMonitor(lambda: [t for t in trades if is_trade_open(t)], lambda pairs: {}, save_trades,
+                               interval=60, stream=stream).start()
+        feed.wait_subscribed(symbols)
+        start = time.perf_counter()
+        sent_at = feed.play(ticks, rate=rate)
+        wait_for(lambda: stream.ticks == len(ticks), timeout=120, what="every tick")
+        elapsed = time.perf_counter() - start
+        wait_for(lambda: len(saved) == len(expected), timeout=10, what="every hit")
+        monitor.stop(5)
+
+    assert {i: o for i, (o, _) in saved.items()} == {i: o for i, (o, _) in expected.items()}, "stream and replay disagree"
+    latency = np.array([saved[i][1] - sent_at[tick] for i, (_, tick) in expected.items()]) * 1000
+    print(f"{n_trades} trades on {n_symbols} symbols, {len(ticks):,} ticks {f'at {rate:g}/s' if rate else 'flat out'}: "
+          f"{len(ticks) / elapsed:,.0f} ticks/s processed, {len(expected)} hits, latency p50 {np.percentile(latency, 50):.1f} ms, "
+          f"p95 {np.percentile(latency, 95):.1f} ms, max {latency.max():.1f} ms "
+          f"(polling every {MONITOR_INTERVAL}s: {MONITOR_INTERVAL / 2 * 1000:,.0f} ms on average)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=1000)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--rate", type=float, default=1000, help="ticks per second for the latency run")
+    args = parser.parse_args()
+
+    check_stream()
+    bench_stream(args.trades, args.symbols, args.ticks)
+    bench_stream(args.trades, args.symbols, min(args.ticks, int(args.rate * 20)), rate=args.rate)
+
+
+if __name__ == "__main__":
+    main()
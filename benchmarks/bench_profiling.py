@@ -0,0 +1,81 @@
+"""Measure what the section profiler costs a page run.
+
+Times Profiler.timed and RunTrace.section against an empty loop, times
+summary() and the JSON/CSV exports over a full rolling log, and records
+from several threads at once (the price monitor and sheet writer do) to
+check no timing is lost and the log stays bounded.
+
+Usage:  python benchmarks/bench_profiling.py [--calls 100000] [--threads 8]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import LOG_SIZE, Profiler, RunTrace
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    profiler = Profiler()
+
+    def timed_block():
+        with profiler.timed("api call"):
+            pass
+
+    trace = RunTrace(profiler, "Dashboard")
+    baseline = per_call_us(lambda: None, args.calls)
+    timed_us = per_call_us(timed_block, args.calls) - baseline
+    section_us = per_call_us(lambda: trace.section("section"), args.calls) - baseline
+    trace.timings.clear()
+
+    start = time.perf_counter()
+    summary = profiler.summary()
+    summary_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    log_json, log_csv = profiler.to_json(), profiler.to_csv()
+    export_ms = (time.perf_counter() - start) * 1000
+
+    print(f"profiler.timed overhead:   {timed_us:6.2f} us per block")
+    print(f"trace.section overhead:    {section_us:6.2f} us per section")
+    print(f"summary of {LOG_SIZE} entries:  {summary_ms:6.2f} ms")
+    print(f"JSON + CSV export:         {export_ms:6.2f} ms")
+    assert [row['section'] for row in summary] == ['section'], "the log should only keep the newest entries"
+    assert len(json.loads(log_json)['entries']) == LOG_SIZE
+    assert len(list(csv.DictReader(io.StringIO(log_csv)))) == LOG_SIZE
+
+    shared = Profiler(size=args.threads * 1000)
+
+    def worker(n):
+        for _ in range(1000):
+            shared.record(f"thread {n}", 0.001)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts = {row['section']: row['count'] for row in shared.summary()}
+    assert counts == {f"thread {n}": 1000 for n in range(args.threads)}, counts
+    print(f"{args.threads} threads x 1000 records: none lost")
+
+
+if __name__ == "__main__":
+    main()
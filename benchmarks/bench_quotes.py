@@ -0,0 +1,93 @@
+"""Benchmark per-trade quote fetching against the batched quote layer.
+
+Simulates a "Check Live Prices" pass over 10/100/500 open trades using the
+local fake Twelve Data server with a fixed per-request latency. First
+checks that a QuoteCache caller waiting on another's fetch never gets a
+price past its TTL when that fetch fails.
+
+Usage:  python benchmarks/bench_quotes.py [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from benchmarks.fake_twelvedata import FakeTwelveData
+from instruments import INSTRUMENTS
+from quotes import QuoteCache, fetch_prices
+
+
+def per_trade(instruments, base_url):
+    """Old behaviour: one request per open trade"""
+    for instrument in instruments:
+        fetch_prices([instrument], "bench", base_url=base_url, http=requests)
+
+
+def batched(instruments, base_url):
+    """New behaviour: one request for the distinct instruments"""
+    fetch_prices(instruments, "bench", base_url=base_url, http=requests)
+
+
+def check_stale_waiters():
+    """A coalesced caller gets nothing, not the expired price, when the fetch it waited on fails"""
+    clock = [0.0]
+    cache = QuoteCache(ttl=10, clock=lambda: clock[0])
+    assert cache.get_many(["EURUSD"], lambda symbols: {"EUR/USD": 1.08}) == {"EUR/USD": 1.08}
+    clock[0] = 20.0
+
+    started, release = threading.Event(), threading.Event()
+
+    def failing_fetch(symbols):
+        started.set()
+        release.wait(5)
+        raise ConnectionError("quote API down")
+
+    results = {}
+    fetching = threading.Thread(target=lambda: results.update(fetcher=cache.get_many(["EURUSD"], failing_fetch)))
+    fetching.start()
+    started.wait(5)
+    waiting = threading.Thread(target=lambda: results.update(waiter=cache.get_many(["EUR/USD"], failing_fetch)))
+    waiting.start()
+    while cache.stats()['coalesced'] == 0:
+        time.sleep(0.001)
+    release.set()
+    fetching.join(5)
+    waiting.join(5)
+    assert results == {'fetcher': {}, 'waiter': {}}, results
+    print("quote cache: waiters on a failed fetch get no stale price")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated API latency (s)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    check_stale_waiters()
+    rng = random.Random(42)
+    print(f"{'trades':>8} {'per-trade (s)':>14} {'requests':>9} {'batched (s)':>12} {'requests':>9}")
+    with FakeTwelveData(latency=args.latency) as server:
+        for size in args.sizes:
+            instruments = [rng.choice(INSTRUMENTS) for _ in range(size)]
+
+            server.request_count = 0
+            start = time.perf_counter()
+            per_trade(instruments, server.base_url)
+            serial_time, serial_calls = time.perf_counter() - start, server.request_count
+
+            server.request_count = 0
+            start = time.perf_counter()
+            batched(instruments, server.base_url)
+            batch_time, batch_calls = time.perf_counter() - start, server.request_count
+
+            print(f"{size:>8} {serial_time:>14.3f} {serial_calls:>9} {batch_time:>12.3f} {batch_calls:>9}")
+
+
+if __name__ == "__main__":
+    main()
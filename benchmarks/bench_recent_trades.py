@@ -0,0 +1,70 @@
+"""Compare per-rerun cost of picking the Recent Trade Setups page.
+
+The old section re-sorted every trade by date on each rerun to show the
+newest ten. The store now keeps a newest-first index that appends extend in
+place, so a rerun only slices out the visible page. Reports both costs as
+the history grows, the cost of appending a trade (index upkeep included), and checks the
+pages match a fresh sort.
+
+Usage:  python benchmarks/bench_recent_trades.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.bench_trade_store import make_trades
+from trade_store import TradeStore
+
+PAGE_SIZE = 10
+
+
+def legacy_page(store, page):
+    newest = store.df['date'].sort_values(ascending=False, kind='stable').index
+    return store.records(newest[page * PAGE_SIZE:(page + 1) * PAGE_SIZE])
+
+
+def indexed_page(store, page):
+    return store.records(store.newest_first(page * PAGE_SIZE, (page + 1) * PAGE_SIZE))
+
+
+def timed(fn, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'trades':>8} {'legacy ms':>10} {'indexed ms':>11} {'append ms':>10}")
+    for size in args.sizes:
+        trades = make_trades(size + 100)
+        store = TradeStore.from_records(trades[:size])
+        store.newest_first()  # Built once, like the first rerun of a session
+
+        legacy_ms = timed(lambda: legacy_page(store, 0))
+        indexed_ms = timed(lambda: indexed_page(store, 0))
+
+        start = time.perf_counter()
+        for trade in trades[size:]:
+            store.append(trade)
+        append_ms = (time.perf_counter() - start) / 100 * 1000
+
+        expected = store.df['date'].sort_values(ascending=False, kind='stable').index.to_numpy()
+        assert np.array_equal(store.newest_first(), expected), "index drifted from a fresh sort"
+        for page in (0, 3, (size // PAGE_SIZE) - 1):
+            assert legacy_page(store, page) == indexed_page(store, page)
+        print(f"{size:>8} {legacy_ms:>10.2f} {indexed_ms:>11.2f} {append_ms:>10.2f}")
+    print("pages match a fresh sort")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Compare full get_all_values reloads with the incremental SheetSync mirror.
+
+Builds a fake Trades worksheet with a long closed history and a handful of
+open trades, then simulates a refresh tick after another session closed a
+trade and appended a new one. Reports rows transferred, API calls, batch_get
+ranges, rows re-parsed and local time for both approaches, and checks the
+mirror matches a fresh full read. Then checks that edits to closed rows are
+found by the rotating row check or a moved modified time, and that patched
+trades and rejected-row counts still match a full parse after rows are
+reopened, broken and deleted.
+Then times an idle tick (nothing changed) without the spreadsheet
+modified-time probe, with it on kept spreadsheet/worksheet handles, and
+with it after reopening both by name (open, worksheet and probe round trips
+all counted), and checks the rolling digest: it matches a fresh mirror's
+and a safety-net full reload of the same content reports UNCHANGED.
+
+Usage:  python benchmarks/bench_sheet_sync.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet
+from ingest import ROW_LOOP_LIMIT, parse_trade_frame, parse_trade_rows_at
+from sheets import SHEET_COLUMNS, trade_to_row
+from sync import VERIFY_ROWS, SheetSync
+
+OPEN_TRADES = 40
+SHEET_NAME = "Forex Trading Analytics"  # As in trade_data.py
+
+
+def parse_rows(all_values):
+    return parse_trade_frame(all_values)[0]
+
+
+def make_rows(n):
+    rows = [SHEET_COLUMNS]
+    for i in range(1, n + 1):
+        is_open = i > n - OPEN_TRADES
+        rows.append(trade_to_row({
+            'id': i, 'date': '2024-01-01', 'trader': 'Max', 'instrument': 'XAUUSD',
+            'entry': 100.0, 'sl': 90.0, 'target': 110.0, 'risk': 10.0, 'reward': 10.0, 'rrRatio': 1.0,
+            'outcome': 'Open' if is_open else 'Target Hit', 'result': 'Open' if is_open else 'Win'
+        }))
+    return rows
+
+
+def other_session_writes(sheet, n):
+    """Another desk closes one open trade and adds a new one"""
+    sheet.rows[n - 5][10] = 'SL Hit'
+    sheet.rows[n - 5][11] = 'Loss'
+    sheet.rows.append(list(sheet.rows[-1]))
+    sheet.rows[-1][0] = str(n + 1)
+    sheet.modified += 1
+
+
+def assert_matches_full_parse(mirror, sheet, what):
+    full, rejected = parse_trade_frame(sheet.get_all_values())
+    assert mirror.trades().equals(full), f"patched trades diverged from a full parse after {what}"
+    assert mirror.rejected() == {rule: n for rule, n in rejected.items() if n}, f"rejected rows diverged after {what}"
+
+
+def sync_until_changed(mirror, sheet, modified=None):
+    """Syncs needed before the mirror reports a change (AssertionError after a full rotation)"""
+    for tick in range(1, mirror.row_count // VERIFY_ROWS + 2):
+        if mirror.sync(sheet, modified=modified) != SheetSync.UNCHANGED:
+            return tick
+    raise AssertionError("the edit was never found")
+
+
+def check_closed_edits(size):
+    """Edits to settled rows are picked up long before the safety-net full reload"""
+    sheet = FakeWorksheet(rows=make_rows(size))
+    mirror = SheetSync(parse_trade_rows_at)
+    mirror.sync(sheet)
+    mirror.trades()
+
+    # Without a modified time the rotating check reaches every closed row within size / VERIFY_ROWS syncs
+    sheet.rows[size - OPEN_TRADES - 10][2] = "Wallace"
+    ticks = sync_until_changed(mirror, sheet)
+    assert mirror.full_syncs == 1, "a rotating check should not need a full read"
+    assert_matches_full_parse(mirror, sheet, "a closed-row edit")
+
+    # A moved modified time that the open, new and checked rows don't explain is one full read away
+    mirror.sync(sheet, modified=sheet.modified)
+    sheet.rows[1][2] = 'Max Power'
+    sheet.modified += 1
+    assert mirror.sync(sheet, modified=sheet.modified) == SheetSync.FULL
+    assert mirror.full_syncs == 2
+    assert_matches_full_parse(mirror, sheet, "a closed-row edit outside the checked rows")
+
+    # Reopened trades are watched like any open row; broken rows are counted as rejected
+    sheet.rows[3][10], sheet.rows[3][11] = 'Open', 'Open'
+    sheet.rows[4][4] = 'n/a'
+    sheet.rows[5] = [''] * len(SHEET_COLUMNS)
+    mirror.invalidate()
+    mirror.sync(sheet)
+    sheet.rows[3][10], sheet.rows[3][11] = 'SL Hit', 'Loss'
+    assert mirror.sync(sheet) == SheetSync.INCREMENTAL, "the reopened row was not re-read"
+    assert_matches_full_parse(mirror, sheet, "reopening and breaking rows")
+
+    # Deleting a row near the end shifts only the rows after it
+    before = mirror.rows_parsed
+    del sheet.rows[-3]
+    assert mirror.sync(sheet) == SheetSync.FULL
+    assert_matches_full_parse(mirror, sheet, "a deletion")
+    assert mirror.rows_parsed - before == 2, "only the two shifted rows should be re-parsed"
+
+    # A bulk edit is patched column-wise rather than row by row
+    for row in sheet.rows[2:ROW_LOOP_LIMIT + 52]:
+        row[3] = 'ustech'
+    mirror.invalidate()
+    mirror.sync(sheet)
+    assert_matches_full_parse(mirror, sheet, "a bulk edit")
+    print(f"closed-row edit found after {ticks} sync(s) without a modified time, 1 with it")
+
+
+def idle_tick(mirror, sheet, spreadsheet=None, client=None):
+    """One auto-refresh tick when nothing changed: (API calls, ms).
+
+    With spreadsheet the tick probes its modified time first; with client it
+    also opens the spreadsheet and worksheet by name, as every tick did
+    before the handles were kept.
+    """
+    counters = [sheet.calls] + [fake.calls for fake in (spreadsheet, client) if fake is not None]
+    for calls in counters:
+        calls.clear()
+    start = time.perf_counter()
+    if client is not None:
+        spreadsheet = client.open(SHEET_NAME)
+        sheet = spreadsheet.worksheet(sheet.title)
+    modified = spreadsheet.get_lastUpdateTime() if spreadsheet is not None else None
+    assert mirror.sync(sheet, modified=modified) == SheetSync.UNCHANGED
+    elapsed = (time.perf_counter() - start) * 1000
+    return sum(sum(calls.values()) for calls in counters), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    mirrors = []
+    print(f"{'rows':>8} {'full rows':>10} {'full ms':>9} {'incr rows':>10} {'incr calls':>11} "
+          f"{'ranges':>7} {'parsed':>7} {'incr ms':>9}")
+    for size in args.sizes:
+        sheet = FakeWorksheet(rows=make_rows(size))
+        mirror = SheetSync(parse_trade_rows_at)
+        mirror.sync(sheet)
+        mirror.trades()
+        other_session_writes(sheet, size)
+
+        sheet.calls.clear()
+        start = time.perf_counter()
+        full = parse_rows(sheet.get_all_values())
+        full_ms = (time.perf_counter() - start) * 1000
+
+        sheet.calls.clear()
+        before, parsed_before = mirror.rows_fetched, mirror.rows_parsed
+        start = time.perf_counter()
+        assert mirror.sync(sheet) == SheetSync.INCREMENTAL
+        incremental = mirror.trades()
+        incr_ms = (time.perf_counter() - start) * 1000
+
+        assert incremental.equals(full), "incremental mirror diverged from a full reload"
+        parsed = mirror.rows_parsed - parsed_before
+        assert parsed == 2, "only the closed trade and the new one should be re-parsed"
+        # The open rows and the new one are adjacent, the rotating closed-row check is the other range
+        assert len(sheet.last_ranges) == 2, sheet.last_ranges
+        print(f"{size:>8} {len(full) + 1:>10} {full_ms:>9.1f} {mirror.rows_fetched - before:>10} "
+              f"{sheet.api_calls:>11} {len(sheet.last_ranges):>7} {parsed:>7} {incr_ms:>9.1f}")
+        mirrors.append((size, mirror, sheet))
+
+    print(f"\n{'rows':>8} {'idle calls':>11} {'idle ms':>9} {'probed calls':>13} {'probed ms':>10} "
+          f"{'reopened calls':>15} {'reopened ms':>12}")
+    for size, mirror, sheet in mirrors:
+        spreadsheet = FakeSpreadsheet(SHEET_NAME, [sheet])
+        client = FakeClient([spreadsheet])
+        plain_calls, plain_ms = idle_tick(mirror, sheet)
+        mirror.sync(sheet, modified=spreadsheet.get_lastUpdateTime())  # Remember the current modified time
+        probed_calls, probed_ms = idle_tick(mirror, sheet, spreadsheet)
+        reopened_calls, reopened_ms = idle_tick(mirror, sheet, spreadsheet, client)
+        assert probed_calls == 1, "an unchanged modified time on kept handles should be the only call"
+        assert reopened_calls == 4, "open by name is a search and a metadata fetch, worksheet() another fetch"
+        print(f"{size:>8} {plain_calls:>11} {plain_ms:>9.2f} {probed_calls:>13} {probed_ms:>10.3f} "
+              f"{reopened_calls:>15} {reopened_ms:>12.3f}")
+
+        fresh = SheetSync(parse_trade_rows_at)
+        fresh.sync(sheet)
+        assert fresh.digest == mirror.digest, "rolling digest diverged from a fresh read"
+        mirror.invalidate()
+        assert mirror.sync(sheet) == SheetSync.UNCHANGED, "full reload of unchanged rows should report UNCHANGED"
+    print("digest checks passed")
+
+    check_closed_edits(min(args.sizes))
+
+
+if __name__ == "__main__":
+    main()
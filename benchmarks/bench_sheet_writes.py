@@ -0,0 +1,188 @@
+"""Count Google Sheets API calls for closing and deleting trades.
+
+Replays the original update_trade_in_sheets pattern (find + 12 update_cell
+per trade) and the batched path (one batch_update for a whole monitoring
+pass, rows taken from the id index) against the in-memory fake worksheet.
+Deletes are checked the same way: find + delete_rows vs index + delete_rows,
+with the index kept correct as rows shift. Fails if the new paths write
+different contents or do not use fewer calls, or if the write-behind queue
+drops an update for a trade id the sheet does not have, indexes an append
+whose row it could not parse, or appends a row twice when it retries.
+
+Usage:  python benchmarks/bench_sheet_writes.py [--closed 1 5 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_gspread import FakeWorksheet
+from sheets import (SHEET_COLUMNS, RowIndex, append_trade_rows, delete_trade_row, trade_to_row,
+                    update_trade_rows)
+from write_queue import WriteBehindQueue
+
+
+def make_sheet(n):
+    rows = [SHEET_COLUMNS]
+    for i in range(1, n + 1):
+        rows.append(trade_to_row({
+            'id': i, 'date': '2024-01-01', 'trader': 'Max', 'instrument': 'XAUUSD',
+            'entry': 100.0, 'sl': 90.0, 'target': 110.0, 'risk': 10.0, 'reward': 10.0,
+            'rrRatio': 1.0, 'outcome': 'Open', 'result': 'Open'
+        }))
+    return FakeWorksheet(rows=rows)
+
+
+def closed_trades(sheet, count):
+    trades = []
+    for row in sheet.rows[1:count + 1]:
+        trade = dict(zip(SHEET_COLUMNS, row))
+        trade.update(outcome='Target Hit', result='Win')
+        trades.append(trade)
+    return trades
+
+
+def legacy_updates(sheet, trades):
+    """Original pattern: sheet.find + update_cell for every column"""
+    for trade in trades:
+        cell = sheet.find(str(trade['id']))
+        if cell and cell.col == 1:
+            for col, value in enumerate(trade_to_row(trade), 1):
+                sheet.update_cell(cell.row, col, value)
+
+
+def legacy_deletes(sheet, trade_ids):
+    """Original pattern: sheet.find + delete_rows"""
+    for trade_id in trade_ids:
+        cell = sheet.find(str(trade_id))
+        if cell and cell.col == 1:
+            sheet.delete_rows(cell.row)
+
+
+def warm_index(sheet):
+    """Index built from the snapshot the loader already downloaded (no API call)"""
+    index = RowIndex()
+    index.rebuild(sheet.rows)
+    return index
+
+
+def check_unmatched_updates():
+    """Updates for ids missing from the sheet stay journaled and are only retried with other writes"""
+    sheet = make_sheet(5)
+    index = warm_index(sheet)
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "journal.jsonl")
+        queue = WriteBehindQueue(path, lambda: sheet, lambda: index)
+        trades = closed_trades(sheet, 2)
+        queue.record_many("update", [trades[0], dict(trades[1], id=99)])
+        assert queue.flush() == 1 and sheet.rows[1][10] == 'Target Hit'
+        assert [e['trade']['id'] for e in queue.pending()] == [99] and queue.snapshot()['unmatched'] == ['99']
+
+        sheet.calls.clear()
+        assert queue.flush() == 0 and sheet.api_calls == 0, dict(sheet.calls)
+        assert [e['trade']['id'] for e in WriteBehindQueue(path, lambda: sheet, lambda: index).pending()] == [99]
+
+        # Row 99 turns up (another desk appended it): the next write carries the retry
+        sheet.rows.append(trade_to_row(dict(trades[1], id=99)))
+        queue.record("update", trades[1])
+        queue.flush()
+        assert queue.pending() == [] and queue.snapshot()['unmatched'] == []
+        assert sheet.rows[-1][10] == 'Target Hit'
+    print("unmatched updates: kept in the journal, retried alongside the next write")
+
+
+def check_unknown_append_row():
+    """An append whose row can't be parsed is never indexed at a guessed row (row 1 is the header)"""
+    sheet = make_sheet(5)
+    index = warm_index(sheet)
+    index.invalidate()
+    trade = dict(closed_trades(sheet, 1)[0], id=6)
+    append_trade_rows(sheet, [trade], index)  # The fake returns no updatedRange
+    assert index.row_for(6) is None
+    assert update_trade_rows(sheet, [dict(trade, outcome='SL Hit', result='Loss')], index) == ([6], [])
+    assert sheet.rows[0] == SHEET_COLUMNS and sheet.rows[6][10] == 'SL Hit', sheet.rows[:2]
+    print("append without a row number: left unindexed, header untouched")
+
+
+def check_append_retries():
+    """A retried or replayed append never duplicates its row, and the sheet is re-read before the journal drops it"""
+    sheet = make_sheet(5)
+    index = warm_index(sheet)
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "journal.jsonl")
+        written = []
+        queue = WriteBehindQueue(path, lambda: sheet, lambda: index, on_written=lambda: written.append(queue.pending()))
+
+        # The call times out after the rows went in: the retry finds them and writes the newer state over them
+        append_rows = sheet.append_rows
+        def timed_out(values, **kwargs):
+            append_rows(values, **kwargs)
+            raise TimeoutError("read timed out")
+        sheet.append_rows = timed_out
+        trade = dict(closed_trades(sheet, 1)[0], id=6, outcome='Open', result='Open')
+        queue.record("append", trade)
+        try:
+            queue.flush()
+            raise AssertionError("expected the append to time out")
+        except TimeoutError:
+            pass
+        sheet.append_rows = append_rows
+        queue.record("update", dict(trade, outcome='SL Hit', result='Loss'))
+        assert queue.flush() == 2 and queue.pending() == []
+        assert [row[0] for row in sheet.rows[1:]] == ['1', '2', '3', '4', '5', '6'] and sheet.rows[6][10] == 'SL Hit'
+        assert written and all(pending for pending in written), "on_written should run before entries leave the journal"
+
+        # A crash between the append and its commit: the replayed entry finds its row instead of appending again
+        queue.record("append", dict(trade, id=7))
+        sheet.rows.append(trade_to_row(dict(trade, id=7)))
+        queue = WriteBehindQueue(path, lambda: sheet, lambda: index)
+        queue.record("append", dict(trade, id=8))  # Never sent: appended as usual
+        sheet.calls.clear()
+        assert queue.flush() == 2 and queue.pending() == []
+        assert [row[0] for row in sheet.rows[1:]] == ['1', '2', '3', '4', '5', '6', '7', '8'], sheet.rows
+        assert sheet.calls == {'col_values': 1, 'append_rows': 1, 'batch_update': 1}, dict(sheet.calls)
+    print("append retries: no duplicate rows after a timeout or a crash before commit")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--closed", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'trades':>7} {'legacy update':>14} {'batched update':>15} {'legacy delete':>14} {'indexed delete':>15}")
+    for count in args.closed:
+        legacy_sheet = make_sheet(args.rows)
+        legacy_updates(legacy_sheet, closed_trades(legacy_sheet, count))
+        legacy_update_calls = legacy_sheet.api_calls
+
+        batched_sheet = make_sheet(args.rows)
+        index = warm_index(batched_sheet)
+        update_trade_rows(batched_sheet, closed_trades(batched_sheet, count), index)
+        batched_update_calls = batched_sheet.api_calls
+
+        assert legacy_sheet.rows == batched_sheet.rows, "batched write produced different sheet contents"
+        assert batched_update_calls == 1, dict(batched_sheet.calls)
+
+        # Delete every other trade from the top so the rows below keep shifting
+        doomed = list(range(1, 2 * count + 1, 2))
+        legacy_sheet.calls.clear()
+        legacy_deletes(legacy_sheet, doomed)
+        batched_sheet.calls.clear()
+        for trade_id in doomed:
+            assert delete_trade_row(batched_sheet, trade_id, index)
+
+        assert legacy_sheet.rows == batched_sheet.rows, "indexed delete removed different rows"
+        assert batched_sheet.api_calls == len(doomed), dict(batched_sheet.calls)
+        assert index.mapping() == warm_index(batched_sheet).mapping(), "index drifted from the sheet"
+
+        print(f"{count:>7} {legacy_update_calls:>14} {batched_update_calls:>15} "
+              f"{legacy_sheet.api_calls:>14} {batched_sheet.api_calls:>15}")
+    check_unmatched_updates()
+    check_unknown_append_row()
+    check_append_retries()
+
+if __name__ == "__main__":
+    main()
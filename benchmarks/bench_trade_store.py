@@ -0,0 +1,129 @@
+"""Compare memory and per-rerun cost of list-of-dict trades vs the TradeStore.
+
+The old layout kept trades as a list of 12-key dicts in session state, and
+every rerun of an analytics page copied them (``cleaned_trades``) and built a
+fresh DataFrame. The store holds one typed frame shared by every page.
+Reports retained memory (tracemalloc) and the cost of what each rerun does,
+and checks the store round-trips the trades unchanged.
+
+Usage:  python benchmarks/bench_trade_store.py [--trades 100000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from trade_store import TradeStore
+
+TRADERS = ['Waithaka', 'Wallace', 'Max', 'Michael', 'Collins', 'Kipngeno']
+INSTRUMENTS = ['XAUUSD', 'USOIL', 'BTCUSD', 'USTECH', 'US30', 'EURUSD', 'GBPUSD', 'USDJPY']
+OUTCOMES = [('Target Hit', 'Win'), ('SL Hit', 'Loss'), ('Open', 'Open'), ('Manual Close @ 1.10000', 'Breakeven')]
+
+
+def make_trades(n, seed=7):
+    rng = random.Random(seed)
+    trades = []
+    for i in range(1, n + 1):
+        entry = round(rng.uniform(1, 3000), 5)
+        sl = round(entry * 0.99, 5)
+        target = round(entry * 1.02, 5)
+        outcome, result = rng.choice(OUTCOMES)
+        trades.append({
+            'id': i, 'date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'trader': rng.choice(TRADERS), 'instrument': rng.choice(INSTRUMENTS),
+            'entry': entry, 'sl': sl, 'target': target,
+            'risk': round(entry - sl, 5), 'reward': round(target - entry, 5),
+            'rrRatio': round((target - entry) / (entry - sl), 2),
+            'outcome': outcome, 'result': result
+        })
+    return trades
+
+
+def retained(build):
+    """Bytes still allocated after build() returns (the object is kept alive)"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def warm(store):
+    """Do one lookup so the lazily built id hash table is counted too"""
+    store.get(1)
+    return store
+
+
+def legacy_page_frame(trades):
+    """What each analytics page did on every rerun before the store"""
+    cleaned = []
+    for trade in trades:
+        cleaned_trade = trade.copy()
+        if cleaned_trade.get('instrument', '').upper() == 'USTECH':
+            cleaned_trade['instrument'] = 'US30'
+        cleaned.append(cleaned_trade)
+    df = pd.DataFrame(cleaned)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trades", type=int, default=100000)
+    args = parser.parse_args()
+
+    source = make_trades(args.trades)
+
+    # Each side builds its own copy so the source list isn't counted
+    dicts, dict_bytes = retained(lambda: [dict(t) for t in source])
+    store, store_bytes = retained(lambda: warm(TradeStore.from_records(source)))
+    frame_bytes = int(store.df.memory_usage(deep=True).sum())
+
+    legacy_ms = timed(lambda: legacy_page_frame(dicts))
+    store_ms = timed(lambda: store.df)
+    lookup_ms = timed(lambda: [store.get(i) for i in range(1, 1001)])
+
+    mb = 1024 * 1024
+    print(f"trades:                     {args.trades}")
+    print(f"list of dicts retained:     {dict_bytes / mb:8.1f} MB")
+    print(f"TradeStore retained:        {store_bytes / mb:8.1f} MB  (frame {frame_bytes / mb:.1f} MB)")
+    print(f"memory saved:               {(1 - store_bytes / dict_bytes) * 100:8.1f} %")
+    print(f"page frame per rerun:       {legacy_ms:8.1f} ms legacy  vs {store_ms:.3f} ms store")
+    print(f"1000 lookups by id:         {lookup_ms:8.1f} ms")
+
+    # Round trip: same trades back out, with the USTECH alias applied
+    expected = [dict(t, instrument='US30' if t['instrument'] == 'USTECH' else t['instrument']) for t in source]
+    assert store.records() == expected, "TradeStore did not round-trip the trades"
+    assert store_bytes < dict_bytes, "TradeStore should use less memory than the list of dicts"
+
+    # get() reads cached column views; they must follow every kind of mutation
+    store.update(1, outcome='Target Hit', result='Win', entry=1.5, date='2024-02-03', trader='Newcomer')
+    store.append(dict(source[1], id=args.trades + 1, instrument='NEWPAIR', outcome=''))
+    store.delete(2)
+    for trade_id in (1, 3, args.trades, args.trades + 1):
+        pos = store._position(trade_id)
+        assert store.get(trade_id) == store.records([pos])[0], f"get({trade_id}) disagrees with records()"
+    assert store.get(2) is None
+    print("round-trip check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""In-memory stand-ins for gspread's Client, Spreadsheet and Worksheet.
+
+Only the calls this app makes are implemented. Every method that would be a
+Google API round-trip increments ``calls[<method>]`` on the object it was
+made on (client, spreadsheet or worksheet), so benchmarks can compare call
+patterns without credentials or quota. Like gspread, opening a spreadsheet
+by name is a Drive search plus a metadata fetch, by key only the fetch, and
+every worksheet() lookup fetches the metadata again.
+
+For whole-app runs (AppTest), fake_service_account() gives secrets that
+google-auth accepts and installed(client) makes gspread.authorize hand out
+the fake client instead of talking to Google.
+"""
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+import gspread
+
+
+class FakeCell:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class FakeWorksheet:
+    def __init__(self, title="Trades", rows=None):
+        self.title = title
+        self.rows = [list(map(str, r)) for r in (rows or [])]
+        self.calls = Counter()
+        self.modified = 0  # Bumped by every write, like the Drive modifiedTime
+        self.last_ranges = []  # Ranges of the latest batch_get
+
+    @property
+    def api_calls(self):
+        return sum(self.calls.values())
+
+    def _cell_value(self, value):
+        return str(value)
+
+    def _ensure_row(self, row_number):
+        while len(self.rows) < row_number:
+            self.rows.append([])
+
+    def _set(self, row, col, value):
+        self.modified += 1
+        self._ensure_row(row)
+        cells = self.rows[row - 1]
+        while len(cells) < col:
+            cells.append('')
+        cells[col - 1] = self._cell_value(value)
+
+    def _write_range(self, range_name, values):
+        start = re.match(r"([A-Z]+)(\d+)", range_name)
+        col = gspread.utils.a1_to_rowcol(f"{start.group(1)}1")[1]
+        row = int(start.group(2))
+        for r, row_values in enumerate(values):
+            for c, value in enumerate(row_values):
+                self._set(row + r, col + c, value)
+
+    # Reads
+    def get_all_values(self):
+        self.calls['get_all_values'] += 1
+        return [list(r) for r in self.rows]
+
+    def get_values(self, range_name=None):
+        self.calls['get_values'] += 1
+        if range_name is None:
+            return [list(r) for r in self.rows]
+        match = re.match(r"[A-Z]+(\d+):[A-Z]+(\d+)?", range_name)
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else len(self.rows)
+        return [list(r) for r in self.rows[first - 1:last]]
+
+    def batch_get(self, ranges, **kwargs):
+        self.calls['batch_get'] += 1
+        self.last_ranges = list(ranges)
+        results = []
+        for range_name in ranges:
+            match = re.match(r"[A-Z]+(\d+):[A-Z]+(\d+)", range_name)
+            first, last = int(match.group(1)), int(match.group(2))
+            rows = [list(r) for r in self.rows[first - 1:last]]
+            while rows and not any(rows[-1]):
+                rows.pop()  # Like the API, trailing empty rows are omitted
+            results.append(rows)
+        return results
+
+    def row_values(self, row):
+        self.calls['row_values'] += 1
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self.calls['col_values'] += 1
+        return [r[col - 1] if len(r) >= col else '' for r in self.rows]
+
+    def find(self, query):
+        self.calls['find'] += 1
+        for r, cells in enumerate(self.rows, 1):
+            for c, value in enumerate(cells, 1):
+                if value == query:
+                    return FakeCell(r, c, value)
+        return None
+
+    # Writes
+    def update_cell(self, row, col, value):
+        self.calls['update_cell'] += 1
+        self._set(row, col, value)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self.calls['update'] += 1
+        self._write_range(range_name, values)
+
+    def batch_update(self, data, **kwargs):
+        self.calls['batch_update'] += 1
+        for item in data:
+            self._write_range(item['range'], item['values'])
+
+    def append_row(self, values, **kwargs):
+        self.calls['append_row'] += 1
+        self.modified += 1
+        self.rows.append([self._cell_value(v) for v in values])
+
+    def append_rows(self, values, **kwargs):
+        self.calls['append_rows'] += 1
+        self.modified += 1
+        for row in values:
+            self.rows.append([self._cell_value(v) for v in row])
+
+    def delete_rows(self, start_index, end_index=None):
+        self.calls['delete_rows'] += 1
+        self.modified += 1
+        end_index = end_index or start_index
+        del self.rows[start_index - 1:end_index]
+
+    def clear(self):
+        self.calls['clear'] += 1
+        self.modified += 1
+        self.rows = []
+
+
+class FakeSpreadsheet:
+    def __init__(self, title, worksheets=None, key=None):
+        self.title = title
+        self.id = key or title
+        self._worksheets = {ws.title: ws for ws in (worksheets or [])}
+        self.calls = Counter()
+
+    @property
+    def api_calls(self):
+        return sum(self.calls.values())
+
+    def fetch_sheet_metadata(self):
+        self.calls['fetch_sheet_metadata'] += 1
+
+    def worksheet(self, title):
+        self.fetch_sheet_metadata()
+        if title not in self._worksheets:
+            raise gspread.WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def get_lastUpdateTime(self):
+        self.calls['get_lastUpdateTime'] += 1
+        return f"2024-01-01T00:00:00.{sum(ws.modified for ws in self._worksheets.values()):06d}Z"
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self._worksheets[title] = FakeWorksheet(title)
+        return self._worksheets[title]
+
+
+class FakeClient:
+    def __init__(self, spreadsheets=None):
+        self._spreadsheets = {s.title: s for s in (spreadsheets or [])}
+        self.calls = Counter()
+
+    def open(self, title):
+        self.calls['list_spreadsheet_files'] += 1  # Drive search by name
+        if title not in self._spreadsheets:
+            raise gspread.SpreadsheetNotFound(title)
+        self._spreadsheets[title].fetch_sheet_metadata()
+        return self._spreadsheets[title]
+
+    def open_by_key(self, key):
+        spreadsheet = next((s for s in self._spreadsheets.values() if s.id == key), None)
+        if spreadsheet is None:
+            raise gspread.SpreadsheetNotFound(key)
+        spreadsheet.fetch_sheet_metadata()
+        return spreadsheet
+
+    def create(self, title):
+        self._spreadsheets[title] = FakeSpreadsheet(title)
+        return self._spreadsheets[title]
+
+
+def fake_service_account():
+    """gcp_service_account secrets with a throwaway key; parses, but never signs a real request"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode()
+    return {
+        "type": "service_account",
+        "project_id": "bench",
+        "private_key_id": "bench",
+        "private_key": pem,
+        "client_email": "bench@bench.iam.gserviceaccount.com",
+        "client_id": "0",
+        "token_uri": "http://127.0.0.1:9/token"
+    }
+
+
+@contextmanager
+def installed(client):
+    """Make gspread.authorize return client while the block runs"""
+    authorize = gspread.authorize
+    gspread.authorize = lambda *args, **kwargs: client
+    try:
+        yield client
+    finally:
+        gspread.authorize = authorize
@@ -0,0 +1,154 @@
+"""Local stand-in for the Twelve Data WebSocket price feed.
+
+Speaks the feed's protocol - subscribe, unsubscribe, reset and heartbeat
+actions answered with subscribe-status, unsubscribe-status and heartbeat
+events - and play() streams recorded (symbol, price) ticks as price events
+to every connection subscribed to the symbol. It counts connections and
+actions and returns the time each tick went out, so benchmarks can measure
+throughput and hit latency offline; drop() closes every connection to
+exercise reconnects, and symbols in refuse come back under "fails".
+
+Run standalone to replay a CSV of symbol,price rows in a loop:
+    python benchmarks/fake_price_stream.py ticks.csv --port 8766 --rate 50
+then set  [twelvedata] stream = true  and  ws_url = "ws://127.0.0.1:8766"
+"""
+import argparse
+import csv
+import json
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+
+class FakePriceStream:
+    """Threaded WebSocket server that replays ticks like the Twelve Data price feed"""
+
+    def __init__(self, host="127.0.0.1", port=0, refuse=()):
+        self.refuse = set(refuse)
+        self.connections = 0
+        self.actions = Counter()  # action -> messages received
+        self.sent = 0  # Price events sent
+        self._clients = {}  # connection -> subscribed symbols
+        self._lock = threading.Lock()
+        self._server = serve(self._serve, host, port)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    def subscribed(self):
+        """Symbols at least one connection is subscribed to"""
+        with self._lock:
+            return set().union(*self._clients.values())
+
+    def wait_subscribed(self, symbols, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not set(symbols) <= self.subscribed():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"not subscribed to {sorted(set(symbols) - self.subscribed())}")
+            time.sleep(0.01)
+
+    def play(self, ticks, rate=None):
+        """Send (symbol, price) ticks in order, at rate per second or as fast as possible.
+
+        Returns the time.perf_counter() each tick was sent.
+        """
+        sent_at = np.empty(len(ticks))
+        start = time.perf_counter()
+        for n, (symbol, price) in enumerate(ticks):
+            if rate:
+                delay = start + n / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            payload = json.dumps({"event": "price", "symbol": symbol, "timestamp": int(time.time()), "price": price})
+            with self._lock:
+                targets = [ws for ws, symbols in self._clients.items() if symbol in symbols]
+            for ws in targets:
+                try:
+                    ws.send(payload)
+                except ConnectionClosed:
+                    pass
+            sent_at[n] = time.perf_counter()
+            self.sent += len(targets)
+        return sent_at
+
+    def drop(self):
+        """Close every client connection"""
+        with self._lock:
+            clients = list(self._clients)
+        for ws in clients:
+            ws.close()
+
+    def _serve(self, ws):
+        with self._lock:
+            self.connections += 1
+            self._clients[ws] = set()
+        try:
+            for raw in ws:
+                message = json.loads(raw)
+                action = message.get("action")
+                symbols = [s for s in message.get("params", {}).get("symbols", "").split(",") if s]
+                with self._lock:
+                    self.actions[action] += 1
+                if action == "subscribe":
+                    accepted = [s for s in symbols if s not in self.refuse]
+                    with self._lock:
+                        self._clients[ws].update(accepted)
+                    ws.send(json.dumps({"event": "subscribe-status", "status": "ok",
+                                        "success": [{"symbol": s} for s in accepted],
+                                        "fails": [{"symbol": s} for s in symbols if s in self.refuse]}))
+                elif action == "unsubscribe":
+                    with self._lock:
+                        self._clients[ws].difference_update(symbols)
+                    ws.send(json.dumps({"event": "unsubscribe-status", "status": "ok",
+                                        "success": [{"symbol": s} for s in symbols], "fails": []}))
+                elif action == "reset":
+                    with self._lock:
+                        self._clients[ws].clear()
+                    ws.send(json.dumps({"event": "reset-status", "status": "ok"}))
+                elif action == "heartbeat":
+                    ws.send(json.dumps({"event": "heartbeat", "status": "ok"}))
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                self._clients.pop(ws, None)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.drop()
+        self._server.shutdown()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ticks", help="CSV file of symbol,price rows")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--rate", type=float, default=50.0, help="ticks per second")
+    args = parser.parse_args()
+
+    with open(args.ticks, newline="", encoding="utf-8") as f:
+        ticks = [(row[0], float(row[1])) for row in csv.reader(f) if len(row) >= 2 and row[1] != "price"]
+    with FakePriceStream(port=args.port) as server:
+        print(f"Fake price stream on {server.url}, replaying {len(ticks)} ticks at {args.rate:g}/s")
+        try:
+            while True:
+                server.play(ticks, rate=args.rate)
+        except KeyboardInterrupt:
+            pass
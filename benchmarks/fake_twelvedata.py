@@ -0,0 +1,151 @@
+"""Local stand-in for the Twelve Data REST API.
+
+Serves /price for one or many comma-separated symbols with a configurable
+artificial latency, and counts the requests it receives so benchmarks can
+compare call patterns without touching the real API or burning quota.
+/time_series serves OHLC bars recorded with set_bars() (newest first, like
+the real API), filtered by start_date and capped at outputsize; symbols
+without recorded bars get a flat series at their /price level. Bars sent
+are counted in bars_served.
+
+Run standalone with:  python benchmarks/fake_twelvedata.py --port 8765
+then point secrets at it:  [twelvedata] base_url = "http://127.0.0.1:8765"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PRICES = {
+    "XAU/USD": 1820.50, "EUR/USD": 1.0625, "GBP/USD": 1.2210, "USD/JPY": 149.30,
+    "BTC/USD": 27450.0, "ETH/USD": 1650.0,
+}
+INTERVAL_SECONDS = {"1min": 60, "5min": 300, "15min": 900, "1h": 3600, "4h": 14400, "1day": 86400}
+
+
+class FakeTwelveData:
+    """Threaded HTTP server that mimics the Twelve Data /price endpoint"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, prices=None):
+        self.latency = latency
+        self.prices = dict(prices or DEFAULT_PRICES)
+        self.bars = {}  # symbol -> list of bar dicts, oldest first
+        self.request_count = 0
+        self.calls = Counter()  # path -> requests
+        self.bars_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def price_for(self, symbol):
+        if symbol not in self.prices:
+            self.prices[symbol] = round(random.uniform(1, 1000), 5)
+        return self.prices[symbol]
+
+    def set_bars(self, symbol, times, high, low):
+        """Record bars for symbol: bar open times (datetime or ISO strings) with their highs and lows"""
+        self.bars[symbol] = [
+            {"datetime": str(t).replace("T", " ")[:19], "open": str(h), "high": str(h), "low": str(l), "close": str(l)}
+            for t, h, l in zip(times, high, low)
+        ]
+
+    def time_series(self, symbol, interval, start_date, outputsize):
+        bars = self.bars.get(symbol)
+        if bars is None:
+            seconds = INTERVAL_SECONDS.get(interval, 60)
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            start = datetime.strptime(start_date[:19], "%Y-%m-%d %H:%M:%S") if start_date else now
+            count = min(int((now - start).total_seconds() // seconds) + 1, outputsize)
+            price = str(self.price_for(symbol))
+            bars = [{"datetime": (start + timedelta(seconds=seconds * i)).strftime("%Y-%m-%d %H:%M:%S"),
+                     "open": price, "high": price, "low": price, "close": price} for i in range(count)]
+        values = [b for b in bars if not start_date or b["datetime"] >= start_date[:19]][-outputsize:]
+        if not values:
+            return {"code": 400, "message": "No data is available on the specified dates", "status": "error"}
+        with self._lock:
+            self.bars_served += len(values)
+        return {"meta": {"symbol": symbol, "interval": interval}, "values": values[::-1], "status": "ok"}
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                with fake._lock:
+                    fake.request_count += 1
+                    fake.calls[url.path] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                params = parse_qs(url.query)
+                symbols = [s for s in params.get("symbol", [""])[0].split(",") if s]
+                if url.path == "/time_series":
+                    interval = params.get("interval", ["1min"])[0]
+                    start_date = params.get("start_date", [""])[0]
+                    outputsize = int(params.get("outputsize", ["30"])[0])
+                    series = {s: fake.time_series(s, interval, start_date, outputsize) for s in symbols}
+                    self._send(series[symbols[0]] if len(symbols) == 1 else series)
+                    return
+                if url.path != "/price":
+                    self._send({"code": 404, "message": "not found", "status": "error"}, 404)
+                    return
+
+                if len(symbols) == 1:
+                    payload = {"price": str(fake.price_for(symbols[0]))}
+                else:
+                    payload = {s: {"price": str(fake.price_for(s))} for s in symbols}
+                self._send(payload)
+
+            def _send(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    server = FakeTwelveData(port=args.port, latency=args.latency)
+    print(f"Fake Twelve Data listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,194 @@
+"""Offline performance suite: the app's hot paths on synthetic data and fake backends.
+
+No Google or Twelve Data credentials needed. For each size it builds a
+synthetic history (benchmarks/synthetic.py) and times:
+
+  sheet load          full read of an in-memory worksheet through SheetSync,
+                      parsed into a TradeStore (what load_trades_from_sheets does)
+  sheet refresh       incremental sync after another desk closes 10 trades and adds one
+  check live prices   Aapp.check_and_update_trades against the local fake price server
+  rankings cold/warm  dashboard rankings incl. / excl. building the aggregate cube
+  trader analysis     Trader Analysis totals, leaderboard and weekly chart data
+  pair analysis       Pair Analysis totals, comparison table and weekly stats
+
+Results go to benchmarks/results/suite-<timestamp>.json. Pass --compare with
+an earlier file to print ratios; with --max-regression the run exits 1 when
+any timing above the noise floor got slower than that factor.
+
+The sheet stages hold the raw rows several times over (sheet, API copy,
+mirror) - about 4 GB at 1M rows - so they are skipped above --sheet-max-rows.
+
+Usage:  python benchmarks/run_suite.py [--sizes 1000 10000 100000 1000000]
+                                        [--compare old.json] [--max-regression 1.5]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from analytics import (pair_comparison, pair_weekly_stats, slice_cube, summarize, trader_period_chart,
+                       trader_rankings, trader_table)
+from benchmarks.fake_gspread import FakeWorksheet
+from benchmarks.fake_twelvedata import FakeTwelveData
+from benchmarks.synthetic import make_trades, quote_prices, sheet_rows
+from ingest import parse_trade_rows_at
+from quotes import PriceClient, QuoteCache, normalize_symbol
+from sync import SheetSync
+from trade_store import TradeStore
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+NOISE_FLOOR_MS = 5.0  # Timings below this are too jittery to flag as regressions
+
+
+def best_of(fn, repeat):
+    """(best ms, last result)"""
+    best, out = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, out
+
+
+def bench_sheet(frame, repeat):
+    rows = sheet_rows(frame)
+    sheet = FakeWorksheet()
+    sheet.rows = rows  # Already strings; skip the constructor's copy
+
+    def full_load():
+        mirror = SheetSync(parse_trade_rows_at)
+        mirror.sync(sheet)
+        return mirror, TradeStore(mirror.trades())
+
+    load_ms, (mirror, store) = best_of(full_load, repeat)
+    assert len(store) == len(frame)
+
+    # Another desk closes ten open trades and adds one
+    open_rows = [n for n in range(2, len(rows) + 1) if rows[n - 1][10] == 'Open'][:10]
+    for n in open_rows:
+        rows[n - 1][10], rows[n - 1][11] = 'Target Hit', 'Win'
+    rows.append(list(rows[-1]))
+    rows[-1][0] = str(len(frame) + 1)
+    sheet.calls.clear()
+    start = time.perf_counter()
+    assert mirror.sync(sheet) == SheetSync.INCREMENTAL
+    TradeStore(mirror.trades())
+    refresh_ms = (time.perf_counter() - start) * 1000
+    return {
+        'sheet load': {'ms': load_ms},
+        'sheet refresh': {'ms': refresh_ms, 'api_calls': sheet.api_calls}
+    }
+
+
+def check_live_prices(store, client, cache):
+    """Aapp.check_and_update_trades with prices from the fake server and no journal write"""
+    pairs = store.open_instruments()
+    prices = cache.get_many(pairs, client.fetch_prices)
+    live_prices = {pair: prices[normalize_symbol(pair)] for pair in pairs if normalize_symbol(pair) in prices}
+    return len(store.close_hits(store.find_hits(live_prices)))
+
+
+def trader_analysis(store, traders, start, end):
+    rows = slice_cube(store.cube(), traders=traders, start=start, end=end)
+    return summarize(rows).iloc[0], trader_table(rows, traders), trader_period_chart(rows, traders, 'Weekly')
+
+
+def pair_analysis(store, pair, traders, start, end):
+    rows = slice_cube(store.cube(), traders=traders, instruments=[pair], start=start, end=end)
+    return summarize(rows).iloc[0], pair_comparison(rows, traders), pair_weekly_stats(rows)
+
+
+def run_size(size, server, args):
+    repeat = 1 if size >= 1000000 else 3
+    frame = make_trades(size)
+    results = {}
+    if size <= args.sheet_max_rows:
+        results.update(bench_sheet(frame, repeat))
+    else:
+        results['sheet load'] = results['sheet refresh'] = {'skipped': f"over --sheet-max-rows {args.sheet_max_rows}"}
+
+    store = TradeStore(frame)
+    client, cache = PriceClient("bench", base_url=server.base_url), QuoteCache(ttl=0)
+    before = server.request_count
+    ms, hits = best_of(lambda: check_live_prices(TradeStore(frame), client, cache), repeat)
+    results['check live prices'] = {'ms': ms, 'hits': hits, 'requests': (server.request_count - before) // repeat}
+
+    cold_ms, _ = best_of(lambda: trader_rankings(TradeStore(frame).cube()), repeat)
+    trader_rankings(store.cube())
+    warm_ms, _ = best_of(lambda: trader_rankings(store.cube()), repeat)
+    results['rankings cold'] = {'ms': cold_ms}
+    results['rankings warm'] = {'ms': warm_ms}
+
+    traders = sorted(store.df['trader'].dropna().unique().astype(str))
+    start, end = store.df['date'].min().date(), store.df['date'].max().date()
+    pair = str(store.df['instrument'].value_counts().index[0])
+    results['trader analysis'] = {'ms': best_of(lambda: trader_analysis(store, traders, start, end), repeat)[0]}
+    results['pair analysis'] = {'ms': best_of(lambda: pair_analysis(store, pair, traders, start, end), repeat)[0]}
+    client.close()
+    return results
+
+
+def compare(current, baseline_path, max_regression):
+    """Print current/baseline ratios; returns the regressions over max_regression"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    print(f"\ncompared with {baseline_path}")
+    for size, benches in current.items():
+        for name, result in benches.items():
+            old = baseline.get(size, {}).get(name, {})
+            if 'ms' not in result or 'ms' not in old:
+                continue
+            ratio = result['ms'] / old['ms'] if old['ms'] else float('inf')
+            flagged = max_regression is not None and ratio > max_regression and result['ms'] > NOISE_FLOOR_MS
+            if flagged:
+                regressions.append((size, name, ratio))
+            print(f"{size:>9} {name:<18} {old['ms']:>10.1f} -> {result['ms']:>10.1f} ms  x{ratio:.2f}"
+                  + ("  REGRESSION" if flagged else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--sheet-max-rows", type=int, default=100000)
+    parser.add_argument("--output", help="results file (default benchmarks/results/suite-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, help="fail when a timing grows by more than this factor")
+    args = parser.parse_args()
+
+    results = {}
+    with FakeTwelveData(prices=quote_prices()) as server:
+        for size in args.sizes:
+            results[str(size)] = run_size(size, server, args)
+            line = ", ".join(f"{name} {r['ms']:.1f} ms" for name, r in results[str(size)].items() if 'ms' in r)
+            print(f"{size:>9}: {line}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    meta = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'machine': platform.machine(), 'cpus': os.cpu_count()
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=1)
+    print(f"results saved to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print(f"{len(regressions)} timing(s) regressed past x{args.max_regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Synthetic trade history for benchmarks.
+
+make_trades builds a frame in the sheet layout (vectorized, so a million
+trades take about a second) with configurable traders, instruments (the Add
+New Trade form's list by default), share of open trades and date span.
+Entries sit near each instrument's BASE_PRICES level with stops 0.5-1.5%
+away, so a price server quoting BASE_PRICES hits only a realistic handful
+of open trades. sheet_rows turns the frame into get_all_values() output.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from instruments import INSTRUMENTS, TRADERS
+from quotes import normalize_symbol
+from sheets import SHEET_COLUMNS
+
+BASE_PRICES = {
+    "XAUUSD": 1950.0, "EURUSD": 1.085, "GBPUSD": 1.265, "USDJPY": 149.5, "USDCHF": 0.88, "USDCAD": 1.36,
+    "AUDUSD": 0.655, "NZDUSD": 0.605, "EURGBP": 0.858, "EURJPY": 162.2, "GBPJPY": 189.1, "EURCHF": 0.955,
+    "AUDJPY": 97.9, "CADJPY": 109.9, "USOIL": 78.5, "BTCUSD": 43000.0, "ETHUSD": 2300.0, "XRPUSD": 0.62,
+    "ADAUSD": 0.52, "US30": 37500.0, "NAS100": 16800.0, "SPX500": 4750.0, "FTSE100": 7650.0, "DAX30": 16700.0,
+    "NGAS": 2.6, "COPPER": 3.85, "SILVER": 23.1, "XAGUSD": 23.1, "USTECH": 16800.0
+}
+CLOSED_OUTCOMES = [('Target Hit', 'Win'), ('SL Hit', 'Loss'), ('Manual Close @ N/A', 'Breakeven')]
+CLOSED_WEIGHTS = [0.45, 0.45, 0.10]
+
+
+def make_trades(n, traders=TRADERS, instruments=INSTRUMENTS, open_share=0.2,
+                start="2023-01-01", days=365, seed=7):
+    """n synthetic trades as a DataFrame in the sheet layout (ids 1..n)"""
+    rng = np.random.default_rng(seed)
+    instruments = list(instruments)
+    pick = rng.integers(0, len(instruments), n)
+    base = np.array([BASE_PRICES.get(i, 100.0) for i in instruments])[pick]
+
+    entry = base * (1 + rng.normal(0, 0.002, n))
+    stop = base * rng.uniform(0.005, 0.015, n)
+    rr = rng.uniform(0.8, 3.0, n)
+    direction = np.where(rng.random(n) < 0.5, 1.0, -1.0)  # Long or short
+    sl = entry - direction * stop
+    target = entry + direction * stop * rr
+
+    is_open = rng.random(n) < open_share
+    closed = rng.choice(len(CLOSED_OUTCOMES), n, p=CLOSED_WEIGHTS)
+    outcome = np.array([o for o, _ in CLOSED_OUTCOMES], dtype=object)[closed]
+    result = np.array([r for _, r in CLOSED_OUTCOMES], dtype=object)[closed]
+    outcome[is_open] = 'Open'
+    result[is_open] = 'Open'
+
+    entry, sl, target = (np.round(v, 5) for v in (entry, sl, target))
+    risk = np.round(np.abs(entry - sl), 5)
+    reward = np.round(np.abs(target - entry), 5)
+    dates = np.datetime64(start, 'D') + rng.integers(0, days, n)
+
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'date': dates.astype(str),
+        'trader': np.array(list(traders), dtype=object)[rng.integers(0, len(traders), n)],
+        'instrument': np.array(instruments, dtype=object)[pick],
+        'entry': entry,
+        'sl': sl,
+        'target': target,
+        'risk': risk,
+        'reward': reward,
+        'rrRatio': np.round(np.divide(reward, risk, out=np.zeros(n), where=risk > 0), 2),
+        'outcome': outcome,
+        'result': result
+    }, columns=SHEET_COLUMNS)
+
+
+def sheet_rows(frame):
+    """Header plus one list of strings per trade, as worksheet.get_all_values() returns them"""
+    columns = [frame[col].astype(str).tolist() for col in SHEET_COLUMNS]
+    return [list(SHEET_COLUMNS)] + [list(row) for row in zip(*columns)]
+
+
+def quote_prices(instruments=INSTRUMENTS):
+    """BASE_PRICES keyed the way the price server expects (EUR/USD)"""
+    return {normalize_symbol(i): BASE_PRICES.get(i, 100.0) for i in instruments}
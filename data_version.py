@@ -0,0 +1,26 @@
+import threading
+
+
+class DataVersion:
+    """Process-wide counter of trade data changes.
+
+    Bumped whenever a write is journaled or a sheet sync sees new content.
+    Cached loaders take the current value as an argument, so a change only
+    misses the entries that depend on the trades instead of clearing every
+    cache for every session; entries for old versions age out through the
+    caches' own size limits.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        """Record a change; returns the new version"""
+        with self._lock:
+            self._value += 1
+            return self._value
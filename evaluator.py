@@ -0,0 +1,245 @@
+import numpy as np
+
+# Outcome codes returned by the evaluators
+NO_HIT = 0
+TARGET_HIT = 1
+SL_HIT = 2
+
+OUTCOMES = {TARGET_HIT: ("Target Hit", "Win"), SL_HIT: ("SL Hit", "Loss")}
+CLOSED_OUTCOMES = ("Target Hit", "SL Hit", "Manual Close")
+
+
+def is_trade_open(trade) -> bool:
+    """True while a trade still needs SL/TP monitoring"""
+    outcome = str(trade.get("outcome", ""))
+    return outcome not in CLOSED_OUTCOMES and not outcome.startswith("Manual Close")
+
+
+def evaluate_hits(entry, sl, target, price):
+    """Vectorized SL/TP check for many trades against one price each.
+
+    Uses the same rules as the original per-trade loop: a trade is long when
+    target > entry, target is checked before SL, zero SL/target levels are
+    ignored and trades with no entry (or neither level) never hit. NaN prices
+    never hit. Returns an int8 array of NO_HIT / TARGET_HIT / SL_HIT codes.
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    sl = np.asarray(sl, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+
+    valid = (entry != 0) & ~((sl == 0) & (target == 0))
+    is_long = target > entry
+
+    target_hit = (target > 0) & np.where(is_long, price >= target, price <= target)
+    sl_hit = (sl > 0) & np.where(is_long, price <= sl, price >= sl)
+
+    codes = np.where(target_hit, TARGET_HIT, np.where(sl_hit, SL_HIT, NO_HIT)).astype(np.int8)
+    return np.where(valid, codes, NO_HIT).astype(np.int8)
+
+
+def first_hits(entry, sl, target, prices):
+    """Replay a (ticks x trades) price matrix and find each trade's first hit.
+
+    Returns (codes, tick_index); tick_index is -1 for trades never hit.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, np.newaxis]
+
+    codes = evaluate_hits(entry, sl, target, prices)
+    hit_any = codes != NO_HIT
+    first = np.argmax(hit_any, axis=0)
+    was_hit = hit_any[first, np.arange(codes.shape[1])]
+
+    first_codes = np.where(was_hit, codes[first, np.arange(codes.shape[1])], NO_HIT).astype(np.int8)
+    return first_codes, np.where(was_hit, first, -1)
+
+
+def manual_close(trade, price):
+    """Field changes for closing a trade by hand at price (None when no price was available).
+
+    A trade is long when target > entry; its P&L at price replaces reward on
+    a win or risk on a loss, and the close price goes into the outcome.
+    """
+    if price is None:
+        return {'outcome': 'Manual Close @ N/A', 'result': 'Breakeven'}
+
+    entry, target = float(trade['entry']), float(trade['target'])
+    pnl = price - entry if target > entry else entry - price
+    changes = {'outcome': f'Manual Close @ {price:.5f}'}
+    if pnl > 0:
+        changes.update(result='Win', reward=abs(pnl))
+    elif pnl < 0:
+        changes.update(result='Loss', risk=abs(pnl))
+    else:
+        changes.update(result='Breakeven')
+    return changes
+
+
+def trade_arrays(trades):
+    """Pull entry/sl/target columns out of a list of trade dicts"""
+    entry = np.fromiter((float(t.get("entry", 0) or 0) for t in trades), dtype=np.float64, count=len(trades))
+    sl = np.fromiter((float(t.get("sl", 0) or 0) for t in trades), dtype=np.float64, count=len(trades))
+    target = np.fromiter((float(t.get("target", 0) or 0) for t in trades), dtype=np.float64, count=len(trades))
+    return entry, sl, target
+
+
+def evaluate_trades(trades, prices):
+    """Evaluate trade dicts against {instrument: price}.
+
+    Returns a list of (index, outcome, result) for the trades that were hit.
+    """
+    if not trades:
+        return []
+
+    entry, sl, target = trade_arrays(trades)
+    price = np.fromiter(
+        (prices.get(t.get("instrument", ""), np.nan) for t in trades),
+        dtype=np.float64, count=len(trades)
+    )
+    codes = evaluate_hits(entry, sl, target, price)
+    return [(int(i), *OUTCOMES[int(codes[i])]) for i in np.flatnonzero(codes)]
+
+
+def replay_trades(trades, price_paths):
+    """Replay recorded prices {instrument: sequence of prices} over open trades.
+
+    Every instrument's path is evaluated for all of its trades at once and the
+    first tick that crosses SL or target decides the outcome. Returns a list of
+    (index, outcome, result, tick_index) for trades that were hit.
+
+    This is the replay mode for tick paths a caller has recorded itself;
+    bench_price_stream checks the streaming monitor against it. The app
+    keeps no tick history (Twelve Data serves quotes and OHLC bars, and
+    streamed ticks are not stored), so history is replayed from bars with
+    backtest.replay and recover_trades instead.
+    """
+    by_instrument = {}
+    for i, trade in enumerate(trades):
+        by_instrument.setdefault(trade.get("instrument", ""), []).append(i)
+
+    entry, sl, target = trade_arrays(trades)
+    resolved = []
+    for instrument, indices in by_instrument.items():
+        path = price_paths.get(instrument)
+        if path is None or len(path) == 0:
+            continue
+        idx = np.asarray(indices)
+        codes, ticks = first_hits(entry[idx], sl[idx], target[idx], np.asarray(path, dtype=np.float64))
+        for j in np.flatnonzero(codes):
+            resolved.append((int(idx[j]), *OUTCOMES[int(codes[j])], int(ticks[j])))
+    return sorted(resolved)
+
+
+def bar_crossings(entry, sl, target, high, low):
+    """(target reached, SL reached) for bars with these highs/lows, broadcasting like numpy"""
+    is_long = target > entry
+    target_hit = (target > 0) & np.where(is_long, high >= target, low <= target)
+    sl_hit = (sl > 0) & np.where(is_long, low <= sl, high >= sl)
+    return target_hit, sl_hit
+
+
+def first_bar_hits(entry, sl, target, high, low, start=None):
+    """Find each trade's first SL/TP crossing in one symbol's OHLC bars.
+
+    high/low are the bars oldest first and start[i] is the first bar trade i
+    may use. A long trade reaches its target when a bar's high does and its
+    SL when a bar's low does (mirrored for shorts); level rules are the same
+    as evaluate_hits. A bar that crosses both levels can't tell which came
+    first, so SL is assumed. Returns (codes, bar_index) like first_hits.
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    sl = np.asarray(sl, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)[:, np.newaxis]
+    low = np.asarray(low, dtype=np.float64)[:, np.newaxis]
+
+    valid = (entry != 0) & ~((sl == 0) & (target == 0))
+    target_hit, sl_hit = bar_crossings(entry, sl, target, high, low)
+    if start is not None:
+        usable = np.arange(len(high))[:, np.newaxis] >= np.asarray(start)
+        target_hit &= usable
+        sl_hit &= usable
+
+    never = len(high)
+    first_target = np.where(target_hit.any(axis=0), target_hit.argmax(axis=0), never)
+    first_sl = np.where(sl_hit.any(axis=0), sl_hit.argmax(axis=0), never)
+    first = np.minimum(first_target, first_sl)
+    was_hit = valid & (first < never)
+
+    codes = np.where(first_sl <= first_target, SL_HIT, TARGET_HIT)
+    return np.where(was_hit, codes, NO_HIT).astype(np.int8), np.where(was_hit, first, -1)
+
+
+def trade_dates(trades):
+    """Trade dates as datetime64[s] midnights (NaT where missing or unreadable)"""
+    dates = np.full(len(trades), np.datetime64("NaT"), dtype="datetime64[s]")
+    for i, trade in enumerate(trades):
+        try:
+            dates[i] = np.datetime64(str(trade.get("date") or "")[:10], "s")
+        except ValueError:
+            pass
+    return dates
+
+
+def trade_starts(trades, since=None, opened=None):
+    """Where a bar scan starts for each trade: max(since, opened), NaT when opened is unknown.
+
+    opened defaults to the trade dates, which only give the day a trade was
+    entered; callers that know when each trade was first seen open pass that.
+    """
+    opened = trade_dates(trades) if opened is None else np.asarray(opened, dtype="datetime64[s]")
+    if since is not None:
+        since = np.datetime64(since, "s")
+        opened = np.where(~np.isnat(opened) & (opened < since), since, opened)
+    return opened
+
+
+def recover_trades(trades, bars, since=None, opened=None, max_bar=None, ambiguous=None):
+    """Find hits the spot checks missed, from bars {instrument: {'time', 'high', 'low'}}.
+
+    Only bars opening at or after a trade's opened time (see trade_starts
+    for the default) and from the bar containing since on count, so moves
+    before the last check or before the trade don't. Instruments whose
+    bars are longer than max_bar (a timedelta64) are skipped. A bar crossing
+    both levels is read as SL unless an ambiguous list is given; those trades
+    are then appended to it as (index, bar_time) and left out of the result.
+    Returns a list of (index, outcome, result, bar_time) like replay_trades.
+    """
+    by_instrument = {}
+    for i, trade in enumerate(trades):
+        by_instrument.setdefault(trade.get("instrument", ""), []).append(i)
+
+    entry, sl, target = trade_arrays(trades)
+    opened = trade_dates(trades) if opened is None else np.asarray(opened, dtype="datetime64[s]")
+
+    resolved = []
+    for instrument, indices in by_instrument.items():
+        series = bars.get(instrument)
+        if not series or len(series['time']) == 0:
+            continue
+        idx = np.asarray(indices)
+        times = series['time']
+        step = np.diff(times).min() if len(times) > 1 else np.timedelta64(0, "s")
+        if max_bar is not None and step > max_bar:
+            continue
+        start = np.searchsorted(times, opened[idx], side="left")
+        if since is not None:
+            # The bar containing since was only partly checked, so it counts again
+            since_start = np.searchsorted(times, np.datetime64(since, "s") - step, side="right" if step else "left")
+            start = np.maximum(start, since_start)
+        start = np.where(np.isnat(opened[idx]), len(times), start)
+        codes, at = first_bar_hits(entry[idx], sl[idx], target[idx], series['high'], series['low'], start)
+        hit = np.flatnonzero(codes)
+        both = np.zeros(len(hit), dtype=bool)
+        if ambiguous is not None and len(hit):
+            k, j = at[hit], idx[hit]
+            both = np.logical_and(*bar_crossings(entry[j], sl[j], target[j], np.asarray(series['high'])[k],
+                                                 np.asarray(series['low'])[k]))
+        for j, is_both in zip(hit, both):
+            if is_both:
+                ambiguous.append((int(idx[j]), times[at[j]]))
+            else:
+                resolved.append((int(idx[j]), *OUTCOMES[int(codes[j])], times[at[j]]))
+    return sorted(resolved)
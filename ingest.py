@@ -0,0 +1,229 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from sheets import SHEET_COLUMNS
+
+# Instrument spellings normalised on load (Fix USTECH to US30 for Wallace)
+INSTRUMENT_FIXES = {'USTECH': 'US30', 'NAS100': 'NAS100', 'SPX500': 'SPX500'}
+TEXT_COLUMNS = ('id', 'date', 'trader', 'instrument', 'outcome', 'result')
+NUMBER_COLUMNS = ('entry', 'sl', 'target', 'risk', 'reward', 'rrRatio')
+
+# Rejection rules, in the order they are applied
+BLANK = 'blank'
+MISSING_FIELDS = 'missing_fields'
+BAD_PRICE = 'bad_price'
+ZERO_PRICES = 'zero_prices'
+REJECT_RULES = (BLANK, MISSING_FIELDS, BAD_PRICE, ZERO_PRICES)
+
+FRAME_DTYPES = {col: np.float64 if col in NUMBER_COLUMNS else 'str' for col in SHEET_COLUMNS}
+FRAME_DTYPES['id'] = np.int64
+ROW_LOOP_LIMIT = 200  # Below this many rows the one-pass loop beats the column-wise setup cost
+
+
+NUMBER_PATTERN = r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?'
+
+
+def to_number(column):
+    """Stripped sheet strings -> float64, NaN where a cell isn't a finite number.
+
+    Accepts what Sheets displays: exponents ("1e-5") and thousands
+    separators ("1,820.50") included.
+    """
+    column = column.str.replace(',', '', regex=False)
+    valid = column.str.fullmatch(NUMBER_PATTERN).to_numpy(dtype=bool, na_value=False)
+    values = np.full(len(column), np.nan)
+    values[valid] = column[valid].astype(np.float64).to_numpy()
+    values[~np.isfinite(values)] = np.nan
+    return pd.Series(values, index=column.index)
+
+
+def raw_frame(all_values):
+    """Data rows (header skipped) as stripped strings, one column per sheet field ('' when missing)"""
+    frame = pd.DataFrame(all_values[1:], dtype='str')
+    frame = frame.reindex(columns=range(len(SHEET_COLUMNS)))
+    frame.columns = SHEET_COLUMNS
+    # Columns the sheet never filled come back from reindex as all-NaN floats
+    for col in SHEET_COLUMNS:
+        frame[col] = frame[col].fillna('').astype('str').str.strip()
+    return frame
+
+
+def parse_trade_frame(all_values):
+    """Turn raw worksheet rows (header first) into a trades frame, column-wise.
+
+    Returns (frame, rejected) where rejected counts the rows dropped by each
+    rule in REJECT_RULES. Row ids that aren't whole numbers fall back to the
+    row's position, risk/reward fall back to the distance between prices and
+    a missing outcome/result means the trade is still open.
+    """
+    frame, keep, rejects = check_rows(all_values, np.arange(1, len(all_values), dtype=np.int64))
+    rejected = {rule: int(mask.sum()) for rule, mask in rejects.items()}
+    return frame[keep].reset_index(drop=True), rejected
+
+
+def parse_trade_rows_at(all_values, row_numbers):
+    """parse_trade_frame for some of the sheet's rows (header first, then one row per row number).
+
+    Ids fall back to the same position a full parse would give, so SheetSync
+    can re-parse only the rows that changed. Returns (frame indexed by sheet
+    row number, {row number: rule} for the rows that were dropped).
+    """
+    if len(row_numbers) > ROW_LOOP_LIMIT:
+        row_numbers = np.asarray(row_numbers, dtype=np.int64)
+        frame, keep, rejects = check_rows(all_values, row_numbers - 1)
+        frame.index = row_numbers
+        rejected = {int(n): rule for rule, mask in rejects.items() for n in row_numbers[mask]}
+        return frame[keep], rejected
+
+    header = list(all_values[:1])
+    trades, index, rejected = [], [], {}
+    for row_number, row in zip(row_numbers, all_values[1:]):
+        row_number = int(row_number)
+        parsed, counts = parse_trade_dicts(header + [row], first_position=row_number - 1)
+        if parsed:
+            trades += parsed
+            index.append(row_number)
+        else:
+            rejected[row_number] = next(rule for rule, count in counts.items() if count)
+    frame = pd.DataFrame(trades, columns=SHEET_COLUMNS, index=pd.Index(index, dtype=np.int64))
+    return frame.astype(FRAME_DTYPES), rejected
+
+
+def check_rows(all_values, positions):
+    """Every data row parsed, plus (keep mask, {rule: rows that rule dropped}).
+
+    positions is each row's place in the sheet data (first data row is 1),
+    the id used when the row's own id isn't a whole number.
+    """
+    raw = raw_frame(all_values)
+    text = raw
+    numbers = {col: to_number(raw[col]) for col in NUMBER_COLUMNS}
+    entry, sl, target = numbers['entry'], numbers['sl'], numbers['target']
+
+    missing = (
+        text['trader'].isin(['', 'trader']) | text['instrument'].isin(['', 'instrument']) |
+        text['entry'].isin(['', '0.0', '0']) | (text['sl'] == '') | (text['target'] == '')
+    ).to_numpy()
+    # Blank rows always lack the required fields; only those rows need the full check
+    blank = np.zeros(len(raw), dtype=bool)
+    if missing.any():
+        blank[missing] = ~raw[missing].ne('').any(axis=1).to_numpy()
+    rejects = {BLANK: blank, MISSING_FIELDS: missing & ~blank}
+    keep = ~missing
+
+    bad_price = (entry.isna() | sl.isna() | target.isna()).to_numpy()
+    rejects[BAD_PRICE] = keep & bad_price
+    keep = keep & ~bad_price
+
+    zero = ((entry == 0) & (sl == 0) & (target == 0)).to_numpy()
+    rejects[ZERO_PRICES] = keep & zero
+    keep = keep & ~zero
+
+    # Non-numeric ids fall back to the row's position in the sheet data
+    ids = np.array(positions, dtype=np.int64)
+    numeric_id = text['id'].str.fullmatch(r'\d+').to_numpy(dtype=bool, na_value=False)
+    ids[numeric_id] = text['id'][numeric_id].astype(np.int64).to_numpy()
+    instrument = text['instrument'].str.upper().map(INSTRUMENT_FIXES).fillna(text['instrument'])
+
+    frame = pd.DataFrame({
+        'id': pd.Series(ids, index=raw.index),
+        'date': text['date'],
+        'trader': text['trader'],
+        'instrument': instrument,
+        'entry': entry,
+        'sl': sl,
+        'target': target,
+        'risk': numbers['risk'].fillna((entry - sl).abs()),
+        'reward': numbers['reward'].fillna((target - entry).abs()),
+        'rrRatio': numbers['rrRatio'].fillna(0.0),
+        'outcome': text['outcome'].where(~text['outcome'].isin(['', 'outcome']), 'Open'),
+        'result': text['result'].where(~text['result'].isin(['', 'result']), 'Open')
+    }, columns=SHEET_COLUMNS)
+    return frame, keep, rejects
+
+
+def _number(text):
+    """One stripped cell -> float, None unless it matches NUMBER_PATTERN and is finite (as to_number)"""
+    text = text.replace(',', '')
+    if not text.isascii() or '_' in text:
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def parse_trade_dicts(all_values, first_position=1):
+    """Same rules as parse_trade_frame, in one pass over the rows, returning trade dicts.
+
+    For dict output a plain loop beats building the frame and converting it
+    back (see benchmarks/bench_ingest.py); the app keeps the frame and hands
+    it to TradeStore. This is for tooling that wants dicts with the same
+    validation and rejection counts. first_position is the position (and
+    fallback id) of the first data row.
+    """
+    rejected = dict.fromkeys(REJECT_RULES, 0)
+    width = len(SHEET_COLUMNS)
+    padding = [''] * width
+    instruments = {}  # Sheet spelling -> fixed instrument
+    trades = []
+    for position, row in enumerate(all_values[1:], first_position):
+        if len(row) != width:
+            row = row[:width] if len(row) > width else row + padding[len(row):]
+        try:
+            (row_id, date, trader, instrument, entry_text, sl_text, target_text,
+             risk_text, reward_text, rr_text, outcome, result) = map(str.strip, row)
+        except TypeError:  # Cells that aren't strings (get_all_values only returns strings)
+            (row_id, date, trader, instrument, entry_text, sl_text, target_text,
+             risk_text, reward_text, rr_text, outcome, result) = [
+                ('' if cell is None else str(cell)).strip() for cell in row]
+
+        if (trader in ('', 'trader') or instrument in ('', 'instrument') or entry_text in ('', '0.0', '0')
+                or not sl_text or not target_text):
+            blank = not any(cell is not None and str(cell).strip() for cell in row)
+            rejected[BLANK if blank else MISSING_FIELDS] += 1
+            continue
+
+        # The usual row holds six plain numbers; anything else (commas, blanks, junk) goes cell by cell
+        texts = entry_text + sl_text + target_text + risk_text + reward_text + rr_text
+        plain = texts.isascii() and '_' not in texts and ',' not in texts
+        if plain:
+            try:
+                entry, sl, target = float(entry_text), float(sl_text), float(target_text)
+                risk, reward, rr_ratio = float(risk_text), float(reward_text), float(rr_text)
+            except ValueError:
+                plain = False
+        if not plain or not math.isfinite(entry + sl + target + risk + reward + rr_ratio):
+            entry, sl, target, risk, reward, rr_ratio = map(
+                _number, (entry_text, sl_text, target_text, risk_text, reward_text, rr_text))
+            if entry is None or sl is None or target is None:
+                rejected[BAD_PRICE] += 1
+                continue
+            risk = abs(entry - sl) if risk is None else risk
+            reward = abs(target - entry) if reward is None else reward
+            rr_ratio = 0.0 if rr_ratio is None else rr_ratio
+        if entry == 0 and sl == 0 and target == 0:
+            rejected[ZERO_PRICES] += 1
+            continue
+
+        fixed = instruments.get(instrument)
+        if fixed is None:
+            fixed = instruments[instrument] = INSTRUMENT_FIXES.get(instrument.upper(), instrument)
+        trades.append({
+            'id': int(row_id) if row_id.isdigit() and row_id.isascii() else position,
+            'date': date,
+            'trader': trader,
+            'instrument': fixed,
+            'entry': entry,
+            'sl': sl,
+            'target': target,
+            'risk': risk,
+            'reward': reward,
+            'rrRatio': rr_ratio,
+            'outcome': outcome if outcome not in ('', 'outcome') else 'Open',
+            'result': result if result not in ('', 'result') else 'Open'
+        })
+    return trades, rejected
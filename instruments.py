@@ -0,0 +1,9 @@
+# Choices offered by the Add New Trade form
+TRADERS = ["Waithaka", "Wallace", "Max"]
+INSTRUMENTS = [
+    "XAUUSD", "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "USDCAD", "AUDUSD", "NZDUSD",
+    "EURGBP", "EURJPY", "GBPJPY", "EURCHF", "AUDJPY", "CADJPY",
+    "USOIL", "BTCUSD", "ETHUSD", "XRPUSD", "ADAUSD",
+    "US30", "NAS100", "SPX500", "FTSE100", "DAX30",
+    "NGAS", "COPPER", "SILVER", "XAGUSD", "USTECH"
+]
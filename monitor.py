@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from evaluator import (NO_HIT, OUTCOMES, evaluate_hits, evaluate_trades, is_trade_open, recover_trades, trade_arrays,
+                       trade_starts)
+from quotes import MAX_BARS
+
+MONITOR_INTERVAL = 30  # Seconds between background price checks
+GAP_CHECK_INTERVAL = 300  # Seconds between OHLC passes for hits that happened between price checks
+GAP_BAR_INTERVAL = "1min"  # Finest Twelve Data bars; coarser ones can't place a crossing between two checks
+GAP_MAX_BAR = np.timedelta64(60, "s")  # Bars longer than this never decide an outcome
+MAX_RECENT_HITS = 50
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class PriceMonitor:
+    """Background worker that polls quotes for open trades and records SL/TP hits.
+
+    The worker owns all network access; the UI only reads ``snapshot()`` and
+    ``hits_since()``, so rendering never waits on Sheets or Twelve Data.
+
+    A spot price only shows where the market is now, so a move through SL
+    or target that reverses before the next check is missed. With
+    fetch_bars, the first pass and then one every ``gap_interval`` seconds
+    also scans one-minute OHLC bars from the last covered time and closes
+    trades at the first level crossed. Trades carry a date, not an entry
+    time, so a trade's bars only count from the pass that first saw it
+    open. A bar crossing both levels can't tell which came first: the trade
+    is left open, listed under 'ambiguous' in the snapshot and not closed
+    by the monitor until its levels change.
+
+    With a stream (streaming.PriceStream) every pass subscribes the open
+    trades' instruments and each streamed tick is checked against them as
+    it arrives. A crossing is only noted and a pass started at once, which
+    closes the trade if it is still open with the same levels, so the UI
+    and the sheet stay the single source of truth. Passes poll /price only
+    for instruments without a live streamed price.
+
+    load_trades() -> list of trade dicts
+    fetch_prices(instruments) -> {instrument: price}
+    save_trades(trades) -> bool, persists all trades closed in one pass
+    fetch_bars(instruments, start, interval) -> {instrument: {'time', 'high', 'low'}}, optional
+    clock() -> the current time as a naive UTC datetime
+    """
+
+    def __init__(self, load_trades, fetch_prices, save_trades, interval=MONITOR_INTERVAL,
+                 fetch_bars=None, gap_interval=GAP_CHECK_INTERVAL, stream=None, clock=utc_now):
+        self.load_trades = load_trades
+        self.fetch_prices = fetch_prices
+        self.save_trades = save_trades
+        self.interval = interval
+        self.fetch_bars = fetch_bars
+        self.gap_interval = gap_interval
+        self.stream = stream
+        self.clock = clock
+        if stream is not None:
+            stream.on_tick = self.on_tick
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.version = 0  # Bumped every time a hit is published
+        self.last_run = None
+        self.last_error = None
+        self.open_count = 0
+        self.runs = 0
+        self.bars_checked_to = None  # UTC time the OHLC passes have covered up to
+        self._next_gap_check = 0.0  # time.monotonic() of the next OHLC pass
+        self._hits = {}  # trade id -> (version it was published at, hit), until the trade loads closed
+        self._recent = deque(maxlen=MAX_RECENT_HITS)
+        self._watching = {}  # instrument -> (open trades, entry, sl, target) checked on each streamed tick
+        self._pending = {}  # trade id -> (outcome, result, price, sl, target) crossed by a tick
+        self._seen = {}  # open trade id -> datetime64 of the first pass that saw it open
+        self._ambiguous = {}  # trade id -> flag for a bar that crossed both of its levels
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-monitor", daemon=True)
+            self._thread.start()
+        if self.stream is not None:
+            self.stream.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self.stream is not None:
+            self.stream.stop(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        """Ask the worker to run a check now instead of waiting for the next tick"""
+        self._wake.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()  # Before the pass, so a tick arriving during it triggers the next one
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e)
+            self._wake.wait(self.interval)
+
+    def run_once(self):
+        """Run a single monitoring pass and return the hits it found"""
+        now = self.clock()
+        open_trades = [t for t in self.load_trades() if is_trade_open(t)]
+        trades = self._track(open_trades, now)
+        instruments = sorted({t.get("instrument", "") for t in trades if t.get("instrument")})
+        if self.stream is not None:
+            self._watch(trades, instruments)
+
+        hits = {}  # trade index -> (outcome, result, price, via)
+        bars_to = self._recover_gaps(trades, instruments, hits, now) if instruments else None
+        self._take_stream_hits(trades, hits)
+        prices = self._current_prices(instruments) if instruments else {}
+        for i, outcome, result in evaluate_trades(trades, prices):
+            hits.setdefault(i, (outcome, result, prices[trades[i].get('instrument', '')], 'price'))
+
+        closed, found = [], []
+        for i, (outcome, result, price, via) in sorted(hits.items()):
+            trade = trades[i]
+            if trade.get('id') in self._ambiguous:
+                continue  # Flagged by this pass's bars: left open for review
+            closed.append(dict(trade, outcome=outcome, result=result))
+            found.append({
+                'id': trade['id'],
+                'instrument': trade.get('instrument', ''),
+                'trader': trade.get('trader', ''),
+                'outcome': outcome,
+                'result': result,
+                'price': price,
+                'via': via,
+                'time': datetime.now()
+            })
+
+        # One batched write per pass; on failure nothing is published and the
+        # hits are found again next pass because the sheet still shows them open
+        if closed and not self.save_trades(closed):
+            found = []
+            self._next_gap_check = 0.0
+        elif bars_to is not None:
+            self.bars_checked_to = bars_to
+
+        with self._lock:
+            # Hits on trades that now load closed are in every reloaded store (the save bumped the data version)
+            open_ids = {t.get('id') for t in open_trades}
+            for trade_id in [i for i in self._hits if i not in open_ids]:
+                del self._hits[trade_id]
+            if found:
+                self.version += 1
+            for hit in found:
+                self._hits[hit['id']] = (self.version, hit)
+                self._recent.appendleft(hit)
+            self.last_run = datetime.now()
+            self.last_error = None
+            self.open_count = len(open_trades)
+            self.runs += 1
+        return found
+
+    def on_tick(self, instrument, price):
+        """Check a streamed price against the open trades on instrument; a crossing starts a pass now"""
+        with self._lock:
+            watched = self._watching.get(instrument)
+            if watched is None:
+                return
+            group, entry, sl, target = watched
+            codes = evaluate_hits(entry, sl, target, price)
+            crossed = np.flatnonzero(codes)
+            if not len(crossed):
+                return
+            for i in crossed:
+                self._pending.setdefault(group[i]['id'], (*OUTCOMES[int(codes[i])], price, sl[i], target[i]))
+            keep = codes == NO_HIT
+            self._watching[instrument] = ([t for t, k in zip(group, keep) if k], entry[keep], sl[keep], target[keep])
+        self._wake.set()
+
+    def _watch(self, trades, instruments):
+        """Index the open trades by instrument for on_tick and have the stream follow those instruments"""
+        groups = {}
+        for trade in trades:
+            if trade.get("instrument"):
+                groups.setdefault(trade["instrument"], []).append(trade)
+        with self._lock:
+            self._watching = {instrument: (group, *trade_arrays(group)) for instrument, group in groups.items()}
+        self.stream.set_instruments(instruments)
+
+    def _take_stream_hits(self, trades, hits):
+        """Add the crossings ticks noted since the last pass for trades still open at the same levels"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        entry, sl, target = trade_arrays(trades)
+        for i, trade in enumerate(trades):
+            crossing = pending.get(trade.get('id'))
+            if crossing is not None and crossing[3:] == (sl[i], target[i]):
+                hits.setdefault(i, (*crossing[:3], 'stream'))
+
+    def _current_prices(self, instruments):
+        """Live streamed prices, polling /price only for instruments the stream does not cover"""
+        prices = self.stream.prices(instruments) if self.stream is not None else {}
+        polled = [i for i in instruments if i not in prices]
+        if polled:
+            prices.update(self.fetch_prices(polled))
+        return prices
+
+    def _track(self, trades, now):
+        """Note when each open trade was first seen and hold back the ones flagged as ambiguous"""
+        seen_at = np.datetime64(now, "s")
+        self._seen = {t.get('id'): self._seen.get(t.get('id'), seen_at) for t in trades}
+        levels = {t.get('id'): (t.get('sl'), t.get('target')) for t in trades}
+        with self._lock:
+            # A flag lasts until the trade is closed or its levels are changed by hand
+            self._ambiguous = {trade_id: flag for trade_id, flag in self._ambiguous.items()
+                               if levels.get(trade_id) == (flag['sl'], flag['target'])}
+            return [t for t in trades if t.get('id') not in self._ambiguous]
+
+    def _recover_gaps(self, trades, instruments, hits, now):
+        """OHLC pass when one is due: adds bar hits to hits, returns the time now covered (or None)"""
+        if self.fetch_bars is None or time.monotonic() < self._next_gap_check:
+            return None
+        opened = np.array([self._seen[t.get('id')] for t in trades], dtype="datetime64[s]")
+        # Minute bars only reach MAX_BARS minutes back; older gaps are left to the spot checks
+        oldest = np.datetime64(now - timedelta(minutes=MAX_BARS), "s")
+        start = max(trade_starts(trades, self.bars_checked_to, opened).min(), oldest)
+
+        self._next_gap_check = time.monotonic() + self.gap_interval
+        bars = self.fetch_bars(instruments, start.astype(datetime), GAP_BAR_INTERVAL)
+        ambiguous = []
+        for i, outcome, result, _ in recover_trades(trades, bars, self.bars_checked_to, opened,
+                                                    GAP_MAX_BAR, ambiguous):
+            level = trades[i].get('target' if outcome == "Target Hit" else 'sl')
+            hits[i] = (outcome, result, float(level), 'bars')
+        with self._lock:
+            for i, bar_time in ambiguous:
+                trade = trades[i]
+                self._ambiguous[trade.get('id')] = {
+                    'id': trade.get('id'), 'instrument': trade.get('instrument', ''), 'bar_time': bar_time.astype(datetime),
+                    'sl': trade.get('sl'), 'target': trade.get('target')
+                }
+        return now if bars else None
+
+    def hits_since(self, version):
+        """Return (current version, {trade id: hit} published after version)"""
+        with self._lock:
+            if version >= self.version:
+                return self.version, {}
+            return self.version, {trade_id: hit for trade_id, (published, hit) in self._hits.items()
+                                  if published > version}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'version': self.version,
+                'last_run': self.last_run,
+                'last_error': self.last_error,
+                'open_trades': self.open_count,
+                'runs': self.runs,
+                'bars_checked_to': self.bars_checked_to,
+                'stream': self.stream.snapshot() if self.stream is not None else None,
+                'ambiguous': sorted(self._ambiguous.values(), key=lambda flag: flag['bar_time']),
+                'recent_hits': list(self._recent)
+            }
@@ -0,0 +1,50 @@
+import pandas as pd
+import streamlit as st
+
+from profiling import EXPORT_INTERVAL, get_profiler
+
+
+def perf_debug_enabled():
+    """The timing panel is opt-in: open any page with ?debug=1"""
+    return st.query_params.get("debug") == "1"
+
+
+def get_perf_log_path():
+    """Where finished runs export the timing log; off unless a perf_log_path secret (.csv or .json) is set"""
+    try:
+        return st.secrets.get("perf_log_path")
+    except:
+        return None
+
+
+def show_perf_panel(trace):
+    """Sidebar panel with this run's section timings and rolling p50/p95 per section"""
+    if not perf_debug_enabled():
+        return
+    profiler = get_profiler()
+    with st.sidebar.expander("🛠️ Performance", expanded=True):
+        st.markdown(f"**This run ({trace.page})**")
+        st.dataframe(
+            pd.DataFrame(trace.timings, columns=['section', 'ms', 'detail']).round({'ms': 1}),
+            hide_index=True,
+            use_container_width=True
+        )
+
+        st.markdown("**Rolling p50 / p95 (ms)**")
+        summary = pd.DataFrame(profiler.summary(), columns=['page', 'section', 'count', 'p50', 'p95', 'last'])
+        st.dataframe(summary.round(1), hide_index=True, use_container_width=True)
+
+        # Built only when clicked, so the panel doesn't serialize the log on every rerun
+        json_col, csv_col = st.columns(2)
+        with json_col:
+            st.download_button("JSON log", profiler.to_json, file_name="perf_log.json",
+                               mime="application/json", use_container_width=True)
+        with csv_col:
+            st.download_button("CSV log", profiler.to_csv, file_name="perf_log.csv",
+                               mime="text/csv", use_container_width=True)
+        export_path = get_perf_log_path()
+        if export_path:
+            st.caption(f"⚠️ Export failed: {profiler.export_error}" if profiler.export_error
+                       else f"Exported to {export_path} every {EXPORT_INTERVAL}s")
+        if st.button("Clear timings", use_container_width=True):
+            profiler.clear()
@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+LOG_SIZE = 5000  # Timings kept in the rolling log; the oldest are dropped first
+LOG_COLUMNS = ('time', 'page', 'section', 'ms', 'detail')
+API = 'api'  # Page name for outbound calls, whoever made them
+EXPORT_INTERVAL = 60  # Seconds between exports of the log from finished runs
+
+
+class Profiler:
+    """Process-wide rolling log of page section and API call timings.
+
+    Thread-safe, so the background price monitor and sheet writer record
+    their calls next to the page sections. summary() gives count, p50, p95
+    and last per (page, section); to_json()/to_csv()/export() write the log.
+    """
+
+    def __init__(self, size=LOG_SIZE, clock=time.time):
+        self._log = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._next_export = 0.0
+        self.export_error = None
+
+    def record(self, section, seconds, page=API, detail=''):
+        entry = {'time': self._clock(), 'page': page, 'section': section,
+                 'ms': seconds * 1000, 'detail': str(detail)}
+        with self._lock:
+            self._log.append(entry)
+        return entry
+
+    @contextmanager
+    def timed(self, section, page=API, detail=''):
+        """Time the with-block, recorded even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(section, time.perf_counter() - start, page, detail)
+
+    def entries(self):
+        with self._lock:
+            return list(self._log)
+
+    def summary(self, page=None):
+        """Per-section timings in ms, slowest p95 first (optionally one page only)"""
+        groups = {}
+        for entry in self.entries():
+            if page is None or entry['page'] == page:
+                groups.setdefault((entry['page'], entry['section']), []).append(entry['ms'])
+        rows = []
+        for (page_name, section), ms in groups.items():
+            p50, p95 = np.percentile(ms, [50, 95])
+            rows.append({'page': page_name, 'section': section, 'count': len(ms),
+                         'p50': float(p50), 'p95': float(p95), 'last': ms[-1]})
+        return sorted(rows, key=lambda row: row['p95'], reverse=True)
+
+    def to_json(self):
+        return json.dumps({'entries': self.entries(), 'summary': self.summary()}, indent=1)
+
+    def to_csv(self):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=LOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(self.entries())
+        return out.getvalue()
+
+    def export(self, path):
+        """Write the log to path (.csv, anything else is JSON), replacing the previous export"""
+        text = self.to_csv() if path.endswith('.csv') else self.to_json()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+    def export_due(self, path, interval=EXPORT_INTERVAL):
+        """export(path) unless another export happened in the last interval seconds.
+
+        Returns the path written, or None; a failed write is kept in export_error.
+        """
+        with self._lock:
+            now = self._clock()
+            if now < self._next_export:
+                return None
+            self._next_export = now + interval
+        try:
+            self.export(path)
+        except OSError as e:
+            self.export_error = f"{path}: {e}"
+            return None
+        self.export_error = None
+        return path
+
+    def clear(self):
+        with self._lock:
+            self._log.clear()
+
+
+class RunTrace:
+    """Times one script run of a page, section by section.
+
+    Call section(name) where each part of the page starts; the previous
+    section ends there, so the page code needs no re-indenting. timed()
+    wraps one action (a trade close, a forced refresh) inside a section.
+    Everything is recorded in the profiler under the page name, and
+    ``timings`` keeps this run's breakdown for the debug panel. Pages call
+    finish() from a ``finally:`` so runs that st.rerun() or st.switch_page()
+    cut short still record their total.
+    """
+
+    def __init__(self, profiler, page):
+        self.profiler = profiler
+        self.page = page
+        self.timings = []  # (section, ms, detail) for this run
+        self._current = None
+        self._started = None
+        self._run_started = time.perf_counter()
+
+    def section(self, name):
+        self._close()
+        self._current = name
+        self._started = time.perf_counter()
+
+    def _close(self):
+        if self._current is not None:
+            entry = self.profiler.record(self._current, time.perf_counter() - self._started, self.page)
+            self.timings.append((self._current, entry['ms'], ''))
+            self._current = None
+
+    @contextmanager
+    def timed(self, name, detail=''):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.profiler.record(name, time.perf_counter() - start, self.page, detail)
+            self.timings.append((name, entry['ms'], entry['detail']))
+
+    def finish(self, export_path=None):
+        """Close the last section and record the whole run as 'total'.
+
+        With export_path the profiler's log is written there too, at most once per EXPORT_INTERVAL.
+        """
+        self._close()
+        entry = self.profiler.record('total', time.perf_counter() - self._run_started, self.page)
+        self.timings.append(('total', entry['ms'], ''))
+        if export_path:
+            self.profiler.export_due(export_path)
+        return self.timings
+
+
+_profiler = Profiler()
+
+
+def get_profiler():
+    """The profiler shared by every page and worker thread in this process"""
+    return _profiler
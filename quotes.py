@@ -0,0 +1,325 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from profiling import get_profiler
+
+# Twelve Data configuration
+TWELVE_DATA_URL = "https://api.twelvedata.com"
+MAX_SYMBOLS_PER_REQUEST = 120  # Twelve Data batch limit per call
+QUOTE_TIMEOUT = 10
+QUOTE_CACHE_TTL = 5  # Seconds a quote is shared across sessions before refetching
+POOL_SIZE = 10
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Upper bounds in seconds
+MAX_BARS = 5000  # Twelve Data time_series outputsize limit per symbol
+BAR_INTERVALS = (("1min", 60), ("5min", 300), ("15min", 900), ("1h", 3600), ("4h", 14400), ("1day", 86400))
+
+
+def normalize_symbol(pair: str) -> str:
+    """Convert pair formats (EURUSD or BTCUSD) => 'EUR/USD' or 'BTC/USD'"""
+    pair = pair.strip().upper()
+    if "/" in pair:
+        return pair
+    if len(pair) >= 6:
+        return f"{pair[:3]}/{pair[3:]}"
+    return pair
+
+
+def parse_price_payload(data, symbols):
+    """Turn a Twelve Data /price response into {symbol: price}"""
+    prices = {}
+    if not isinstance(data, dict):
+        return prices
+
+    # Single-symbol requests return {"price": "..."} instead of a keyed map
+    if len(symbols) == 1 and "price" in data:
+        data = {symbols[0]: data}
+
+    for symbol in symbols:
+        entry = data.get(symbol)
+        if not isinstance(entry, dict) or "price" not in entry:
+            continue
+        try:
+            prices[symbol] = float(entry["price"])
+        except (ValueError, TypeError):
+            continue
+    return prices
+
+
+def fetch_prices(symbols, api_key, base_url=TWELVE_DATA_URL, timeout=QUOTE_TIMEOUT, http=None):
+    """Fetch live prices for many symbols with one request per batch of symbols.
+
+    Returns a dict keyed by normalized symbol. Symbols Twelve Data could not
+    price are simply missing from the result.
+    """
+    unique_symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+    if not unique_symbols or not api_key:
+        return {}
+
+    http = http or requests
+    prices = {}
+    for start in range(0, len(unique_symbols), MAX_SYMBOLS_PER_REQUEST):
+        batch = unique_symbols[start:start + MAX_SYMBOLS_PER_REQUEST]
+        try:
+            resp = http.get(
+                f"{base_url}/price",
+                params={"symbol": ",".join(batch), "apikey": api_key},
+                timeout=timeout
+            )
+            prices.update(parse_price_payload(resp.json(), batch))
+        except Exception:
+            continue
+    return prices
+
+
+def bar_interval(span_seconds):
+    """Finest Twelve Data interval that covers span_seconds in at most MAX_BARS bars"""
+    for name, seconds in BAR_INTERVALS:
+        if span_seconds <= seconds * MAX_BARS:
+            return name
+    return BAR_INTERVALS[-1][0]
+
+
+def parse_time_series_payload(data, symbols):
+    """Turn a Twelve Data /time_series response into {symbol: {'time', 'open', 'high', 'low', 'close'}}.
+
+    Arrays are oldest bar first; 'time' is each bar's open as datetime64[s].
+    """
+    bars = {}
+    if not isinstance(data, dict):
+        return bars
+
+    # Single-symbol requests return the series itself instead of a keyed map
+    if len(symbols) == 1 and "values" in data:
+        data = {symbols[0]: data}
+
+    for symbol in symbols:
+        entry = data.get(symbol)
+        if not isinstance(entry, dict) or entry.get("status", "ok") != "ok" or not entry.get("values"):
+            continue
+        try:
+            values = sorted(entry["values"], key=lambda v: v["datetime"])
+            bars[symbol] = {
+                'time': np.array([v["datetime"] for v in values], dtype="datetime64[s]"),
+                **{column: np.array([v[column] for v in values], dtype=np.float64)
+                   for column in ('open', 'high', 'low', 'close')}
+            }
+        except (KeyError, ValueError, TypeError):
+            continue
+    return bars
+
+
+def fetch_time_series(symbols, api_key, start, interval=None, base_url=TWELVE_DATA_URL,
+                      timeout=QUOTE_TIMEOUT, http=None, now=None):
+    """Fetch OHLC bars from start (naive UTC datetime) to now for many symbols.
+
+    One request per batch of symbols, like fetch_prices. Without an interval
+    the finest one that covers the whole span is used. Returns a dict keyed
+    by normalized symbol; symbols without bars are missing from the result.
+    """
+    unique_symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+    if not unique_symbols or not api_key:
+        return {}
+
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    interval = interval or bar_interval((now - start).total_seconds())
+    # Start on a bar boundary so the bar containing start is included
+    seconds = dict(BAR_INTERVALS).get(interval, 60)
+    start -= timedelta(seconds=(start - datetime(1970, 1, 1)).total_seconds() % seconds)
+    http = http or requests
+    bars = {}
+    for batch_start in range(0, len(unique_symbols), MAX_SYMBOLS_PER_REQUEST):
+        batch = unique_symbols[batch_start:batch_start + MAX_SYMBOLS_PER_REQUEST]
+        try:
+            resp = http.get(
+                f"{base_url}/time_series",
+                params={
+                    "symbol": ",".join(batch),
+                    "interval": interval,
+                    "start_date": start.strftime("%Y-%m-%d %H:%M:%S"),
+                    "timezone": "UTC",
+                    "outputsize": MAX_BARS,
+                    "apikey": api_key
+                },
+                timeout=timeout
+            )
+            bars.update(parse_time_series_payload(resp.json(), batch))
+        except Exception:
+            continue
+    return bars
+
+
+class LatencyHistogram:
+    """Thread-safe bucketed histogram of request latencies"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, pct):
+        """Approximate percentile as the upper bound of the bucket it falls in"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = pct / 100 * self.count
+            seen = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return bound
+            return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}s" for b in self.buckets] + [f">{self.buckets[-1]}s"]
+            return {
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0.0,
+                'buckets': dict(zip(labels, self._counts))
+            }
+
+
+class PriceClient:
+    """Twelve Data client over a keep-alive, pooled requests.Session.
+
+    Retries 429/5xx responses with exponential backoff (honouring Retry-After)
+    and records the latency of every call.
+    """
+
+    def __init__(self, api_key, base_url=TWELVE_DATA_URL, pool_size=POOL_SIZE,
+                 retries=3, backoff=0.5, timeout=QUOTE_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.latency = LatencyHistogram()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs):
+        """Timed GET on the pooled session (same signature as requests.get)"""
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            return self.session.get(url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.latency.observe(elapsed)
+            get_profiler().record("twelvedata: " + url.rsplit("/", 1)[-1], elapsed)
+
+    def fetch_prices(self, symbols):
+        """Batched /price lookup, keyed by normalized symbol"""
+        return fetch_prices(symbols, self.api_key, base_url=self.base_url, timeout=self.timeout, http=self)
+
+    def fetch_bars(self, symbols, start, interval=None):
+        """Batched /time_series lookup from start, keyed by normalized symbol"""
+        return fetch_time_series(symbols, self.api_key, start, interval=interval, base_url=self.base_url,
+                                 timeout=self.timeout, http=self)
+
+    def close(self):
+        self.session.close()
+
+
+class QuoteCache:
+    """Process-wide TTL cache of live prices with single-flight fetching.
+
+    Concurrent callers asking for a symbol that is already being fetched wait
+    for that request instead of issuing their own, so every session inside the
+    TTL window shares one upstream call per symbol.
+    """
+
+    def __init__(self, ttl=QUOTE_CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._prices = {}  # symbol -> (price, fetched_at)
+        self._inflight = {}  # symbol -> threading.Event
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_many(self, symbols, fetcher):
+        """Return {normalized symbol: price}, calling fetcher(symbols) only for stale ones"""
+        wanted = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+        result = {}
+        to_fetch, to_wait = [], []
+
+        with self._lock:
+            now = self._clock()
+            for symbol in wanted:
+                cached = self._prices.get(symbol)
+                if cached and now - cached[1] < self.ttl:
+                    result[symbol] = cached[0]
+                    self.hits += 1
+                elif symbol in self._inflight:
+                    to_wait.append((symbol, self._inflight[symbol]))
+                    self.coalesced += 1
+                else:
+                    self._inflight[symbol] = threading.Event()
+                    to_fetch.append(symbol)
+                    self.misses += 1
+
+        if to_fetch:
+            fetched = {}
+            try:
+                fetched = fetcher(to_fetch) or {}
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    fetched_at = self._clock()
+                    for symbol in to_fetch:
+                        if symbol in fetched:
+                            self._prices[symbol] = (fetched[symbol], fetched_at)
+                        self._inflight.pop(symbol).set()
+            result.update({s: fetched[s] for s in to_fetch if s in fetched})
+
+        for symbol, event in to_wait:
+            event.wait(QUOTE_TIMEOUT * 2)
+            with self._lock:
+                cached = self._prices.get(symbol)
+                fresh = cached and self._clock() - cached[1] < self.ttl
+            # After a failed or timed-out fetch only the old price is left; don't serve it stale
+            if fresh:
+                result[symbol] = cached[0]
+
+        return result
+
+    def stats(self):
+        """Hit/miss/coalesced counters for the quota panel"""
+        with self._lock:
+            requests_saved = self.hits + self.coalesced
+            total = requests_saved + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'cached_symbols': len(self._prices),
+                'saved_pct': (requests_saved / total * 100) if total else 0.0
+            }
@@ -0,0 +1,164 @@
+# Worksheet row helpers shared by the app, the background monitor and benchmarks.
+# Every function takes a gspread worksheet so the API call pattern is explicit.
+import re
+import threading
+
+SHEET_COLUMNS = ['id', 'date', 'trader', 'instrument', 'entry', 'sl', 'target', 'risk', 'reward', 'rrRatio', 'outcome', 'result']
+LAST_COLUMN = 'L'
+
+
+def trade_to_row(trade_data):
+    """Convert a trade dict into the worksheet row layout"""
+    return [
+        str(trade_data['id']), str(trade_data['date']), str(trade_data['trader']),
+        str(trade_data['instrument']), float(trade_data['entry']), float(trade_data['sl']),
+        float(trade_data['target']), float(trade_data['risk']), float(trade_data['reward']),
+        float(trade_data['rrRatio']), str(trade_data['outcome']), str(trade_data['result'])
+    ]
+
+
+def row_range(row_number):
+    """A1 range covering one full trade row"""
+    return f"A{row_number}:{LAST_COLUMN}{row_number}"
+
+
+class RowIndex:
+    """Trade id -> worksheet row number, kept in step with our own writes.
+
+    Built from the get_all_values snapshot the loader already downloads, then
+    updated locally on append and delete so updates and deletes need no
+    find() lookups. When an id is missing (for example another session
+    appended it) the index rebuilds from a single read of the ID column.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self.row_count = 0
+        self.rebuilds = 0
+        self.mismatches = 0
+
+    def rebuild(self, all_values):
+        """Rebuild from a full worksheet snapshot (header is row 1)"""
+        self.rebuild_from_column([row[0] if row else '' for row in all_values])
+
+    def rebuild_from_column(self, id_column):
+        rows = {}
+        for row_number, value in enumerate(id_column[1:], 2):
+            key = str(value).strip()
+            if key:
+                rows.setdefault(key, row_number)
+        with self._lock:
+            if self._rows and rows != self._rows:
+                self.mismatches += 1
+            self._rows = rows
+            self.row_count = len(id_column)
+            self.rebuilds += 1
+
+    def row_for(self, trade_id):
+        with self._lock:
+            return self._rows.get(str(trade_id).strip())
+
+    def mapping(self):
+        with self._lock:
+            return dict(self._rows)
+
+    def locate(self, sheet, trade_id):
+        """Row for trade_id, refreshing from the ID column once if it is unknown"""
+        row_number = self.row_for(trade_id)
+        if row_number is None:
+            self.rebuild_from_column(sheet.col_values(1))
+            row_number = self.row_for(trade_id)
+        return row_number
+
+    def appended(self, trade_id, row_number=None):
+        """Record a row added at the bottom of the sheet.
+
+        Without a row number (no parsable updatedRange) nothing is guessed:
+        the id stays unindexed, so its next lookup rebuilds from the ID column.
+        """
+        if not row_number:
+            return
+        with self._lock:
+            self._rows.setdefault(str(trade_id).strip(), row_number)
+            self.row_count = max(self.row_count, row_number)
+
+    def deleted(self, row_number):
+        """Record a deleted row; every row below it moves up by one"""
+        with self._lock:
+            self._rows = {
+                key: (row - 1 if row > row_number else row)
+                for key, row in self._rows.items() if row != row_number
+            }
+            self.row_count = max(self.row_count - 1, 0)
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = {}
+            self.row_count = 0
+
+
+def appended_row_number(response):
+    """Row number of an append_row call, parsed from its updatedRange"""
+    try:
+        updated_range = response['updates']['updatedRange']
+        return int(re.search(r"[A-Z]+(\d+)", updated_range.split('!')[-1]).group(1))
+    except (KeyError, TypeError, AttributeError, ValueError):
+        return None
+
+
+def append_trade_row(sheet, trade_data, index=None):
+    """Append one trade and record its row in the index"""
+    response = sheet.append_row(trade_to_row(trade_data), value_input_option='RAW')
+    if index is not None:
+        index.appended(trade_data['id'], appended_row_number(response))
+    return response
+
+
+def append_trade_rows(sheet, trades, index=None):
+    """Append many trades with one append_rows call and index their rows"""
+    if not trades:
+        return None
+    response = sheet.append_rows([trade_to_row(t) for t in trades], value_input_option='RAW')
+    if index is not None:
+        first_row = appended_row_number(response)
+        for offset, trade in enumerate(trades):
+            index.appended(trade['id'], first_row + offset if first_row else None)
+    return response
+
+
+def update_trade_rows(sheet, trades, index):
+    """Write many trades back in one batch_update; returns (ids written, ids skipped).
+
+    Rows come from the id index, so a warm index costs exactly one API call.
+    Trades whose id is not in the sheet are skipped.
+    """
+    if not trades:
+        return [], []
+
+    # Unknown ids trigger at most one ID-column refresh for the whole batch
+    if any(index.row_for(trade['id']) is None for trade in trades):
+        index.rebuild_from_column(sheet.col_values(1))
+
+    data, written, skipped = [], [], []
+    for trade in trades:
+        row_number = index.row_for(trade['id'])
+        if row_number is None:
+            skipped.append(trade['id'])
+            continue
+        data.append({'range': row_range(row_number), 'values': [trade_to_row(trade)]})
+        written.append(trade['id'])
+
+    if data:
+        sheet.batch_update(data, value_input_option='RAW')
+    return written, skipped
+
+
+def delete_trade_row(sheet, trade_id, index):
+    """Delete a trade's row; returns False if the id is not in the sheet"""
+    row_number = index.locate(sheet, trade_id)
+    if row_number is None:
+        return False
+    sheet.delete_rows(row_number)
+    index.deleted(row_number)
+    return True
@@ -0,0 +1,196 @@
+"""Streaming quotes from the Twelve Data WebSocket price feed.
+
+PriceStream keeps one connection open in a background thread, subscribed to
+whatever instruments it was last given, and hands every price event to
+on_tick(instrument, price). Subscriptions are diffed against the wanted set,
+so trades opening and closing only send the symbols that changed. A dropped
+or silent connection is retried with jittered exponential backoff and every
+symbol is subscribed again.
+
+Prices only count as live while the connection is up and the feed has
+confirmed the symbol; prices() leaves everything else out so the monitor
+polls /price for it instead. Needs the websockets package; without it the
+stream never connects and the monitor keeps polling.
+"""
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+try:
+    from websockets.sync.client import connect
+except ImportError:  # Streaming is optional; the monitor falls back to polling
+    connect = None
+
+from quotes import normalize_symbol
+
+TWELVE_DATA_WS_URL = "wss://ws.twelvedata.com/v1/quotes/price"
+HEARTBEAT_INTERVAL = 10  # Seconds between heartbeats; Twelve Data drops quiet connections
+STREAM_TIMEOUT = 30  # Seconds without any message (heartbeat replies included) before reconnecting
+RECONNECT_BACKOFF = (1.0, 60.0)  # First and longest wait between connection attempts
+RECV_POLL = 0.5  # Seconds a receive waits before subscriptions and heartbeats are looked at again
+
+
+class PriceStream:
+    """Background WebSocket subscription to live prices for a changing set of instruments"""
+
+    def __init__(self, url=TWELVE_DATA_WS_URL, api_key=None, on_tick=None,
+                 heartbeat=HEARTBEAT_INTERVAL, timeout=STREAM_TIMEOUT, backoff=RECONNECT_BACKOFF):
+        self.url = f"{url}?apikey={api_key}" if api_key else url
+        self.on_tick = on_tick
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.backoff = backoff
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._wanted = {}  # normalized symbol -> instruments trading it
+        self._requested = set()  # Symbols asked for on the current connection
+        self._confirmed = set()  # Symbols the feed accepted
+        self._prices = {}  # normalized symbol -> last streamed price on this connection
+
+        self.connected = False
+        self.ticks = 0
+        self.reconnects = 0
+        self.last_tick = None
+        self.last_error = None
+        self.failed = set()  # Symbols the feed refused
+
+    def start(self):
+        if connect is None:
+            self.last_error = "websockets is not installed; polling instead"
+            return self
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_instruments(self, instruments):
+        """Follow these instruments from now on; the connection subscribes the difference"""
+        wanted = {}
+        for instrument in instruments:
+            if instrument:
+                wanted.setdefault(normalize_symbol(instrument), []).append(instrument)
+        with self._lock:
+            self._wanted = wanted
+
+    def prices(self, instruments):
+        """Live streamed prices {instrument: price} for the instruments that have one"""
+        with self._lock:
+            if not self.connected:
+                return {}
+            live = {}
+            for instrument in instruments:
+                symbol = normalize_symbol(instrument)
+                if symbol in self._confirmed and symbol in self._prices:
+                    live[instrument] = self._prices[symbol]
+            return live
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'connected': self.connected,
+                'subscribed': len(self._confirmed),
+                'failed': sorted(self.failed),
+                'ticks': self.ticks,
+                'reconnects': self.reconnects,
+                'last_tick': self.last_tick,
+                'last_error': self.last_error
+            }
+
+    def _run(self):
+        delay = self.backoff[0]
+        while not self._stop.is_set():
+            try:
+                with connect(self.url, open_timeout=self.timeout) as ws:
+                    if self._session(ws):
+                        delay = self.backoff[0]  # Only a connection that delivered resets the backoff
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e) or type(e).__name__
+            finally:
+                with self._lock:
+                    self.connected = False
+                    self._requested, self._confirmed, self._prices = set(), set(), {}
+            if self._stop.wait(random.uniform(delay / 2, delay)):
+                break
+            delay = min(delay * 2, self.backoff[1])
+            with self._lock:
+                self.reconnects += 1
+
+    def _session(self, ws):
+        """Serve one connection until it drops or the stream stops; True once a message arrived"""
+        with self._lock:
+            self.connected = True
+        delivered = False
+        last_message = last_heartbeat = time.monotonic()
+        while not self._stop.is_set():
+            self._sync_subscriptions(ws)
+            now = time.monotonic()
+            if now - last_heartbeat >= self.heartbeat:
+                ws.send(json.dumps({"action": "heartbeat"}))
+                last_heartbeat = now
+            if now - last_message > self.timeout:
+                raise TimeoutError(f"no messages for {self.timeout}s")
+            try:
+                raw = ws.recv(timeout=RECV_POLL)
+            except TimeoutError:
+                continue
+            last_message = time.monotonic()
+            delivered = True
+            self._handle(json.loads(raw))
+        return delivered
+
+    def _sync_subscriptions(self, ws):
+        with self._lock:
+            wanted = set(self._wanted)
+            add, drop = wanted - self._requested, self._requested - wanted
+            self._requested = wanted
+            self._confirmed -= drop
+            for symbol in drop:
+                self._prices.pop(symbol, None)
+        if add:
+            ws.send(json.dumps({"action": "subscribe", "params": {"symbols": ",".join(sorted(add))}}))
+        if drop:
+            ws.send(json.dumps({"action": "unsubscribe", "params": {"symbols": ",".join(sorted(drop))}}))
+
+    def _handle(self, message):
+        event = message.get("event")
+        if event == "price":
+            symbol, price = message.get("symbol"), message.get("price")
+            if price is None:
+                return
+            price = float(price)
+            with self._lock:
+                if symbol not in self._requested:
+                    return  # Late tick for a symbol just unsubscribed
+                self._prices[symbol] = price
+                self.ticks += 1
+                self.last_tick = datetime.now()
+                instruments = list(self._wanted.get(symbol, ()))
+            if self.on_tick is not None:
+                for instrument in instruments:
+                    try:
+                        self.on_tick(instrument, price)
+                    except Exception as e:
+                        with self._lock:
+                            self.last_error = f"tick handler: {e}"
+        elif event == "subscribe-status":
+            accepted = {s.get("symbol") for s in message.get("success") or []}
+            refused = {s.get("symbol") for s in message.get("fails") or []}
+            with self._lock:
+                self._confirmed |= accepted & self._requested
+                self.failed = (self.failed - accepted) | refused
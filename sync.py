@@ -0,0 +1,285 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+
+from evaluator import is_trade_open
+from sheets import LAST_COLUMN, SHEET_COLUMNS, row_range
+
+FULL_SYNC_INTERVAL = 600  # Seconds between safety-net full reloads
+PROBE_MAX_AGE = 60  # Seconds an unchanged modified-time probe may stand in for reading the sheet
+VERIFY_ROWS = 500  # Closed rows re-read per sync, in rotation, to catch edits to settled trades
+OUTCOME_COLUMN = SHEET_COLUMNS.index('outcome')
+
+
+def row_fingerprint(row):
+    """Stable digest of one worksheet row (same value in every process)"""
+    cells = [str(cell).strip() for cell in row]
+    while cells and not cells[-1]:
+        cells.pop()  # The API trims trailing blanks inconsistently
+    return hashlib.blake2b("\x1f".join(cells).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def row_digest(row_number, fingerprint):
+    """Row fingerprint mixed with its position, XOR-ed into the sheet digest"""
+    key = f"{row_number}\x1f{fingerprint}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def row_ranges(row_numbers):
+    """Sorted row numbers -> A1 ranges, one per run of adjacent rows"""
+    ranges = []
+    for n in row_numbers:
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return [f"A{first}:{LAST_COLUMN}{last}" for first, last in ranges]
+
+
+def is_row_open(row):
+    """Rows whose outcome can still change (open trades)"""
+    outcome = row[OUTCOME_COLUMN] if len(row) > OUTCOME_COLUMN else ""
+    return is_trade_open({'outcome': str(outcome).strip() or "Open"})
+
+
+class SheetSync:
+    """Local mirror of the Trades worksheet kept current with small reads.
+
+    Each sync reads the ID column once. Rows past the last known row count,
+    rows of still-open trades (the only rows the app ever rewrites) and the
+    next VERIFY_ROWS closed rows in rotation are then fetched in a single
+    batch_get, adjacent rows sharing one range, and merged by fingerprint.
+    When the caller's modified time moved but none of that changed, the edit
+    is in a closed row outside the window and the sync falls back to a full
+    read. A full get_all_values also happens on the first sync, when the ID
+    column shows rows were deleted or reordered, and every FULL_SYNC_INTERVAL
+    seconds as a safety net.
+
+    ``digest`` combines every row's fingerprint and is updated row by row, so
+    a safety-net reload that finds the same content reports UNCHANGED. When
+    the caller passes the spreadsheet's modified time (one small Drive
+    metadata call) and it hasn't moved, sync skips reading the sheet at all;
+    at least every PROBE_MAX_AGE seconds it reads anyway, since the Drive
+    timestamp can lag behind edits.
+
+    trades() re-parses only the rows whose fingerprint changed since the last
+    call and patches them into the parsed frame.
+
+    parse_rows(all_values, row_numbers) -> (DataFrame of trades indexed by
+    row number, {row number: reject rule}), all_values being the header row
+    followed by the rows to parse (see ingest.parse_trade_rows_at)
+    """
+
+    FULL = "full"
+    INCREMENTAL = "incremental"
+    UNCHANGED = "unchanged"
+
+    def __init__(self, parse_rows, index=None, full_sync_interval=FULL_SYNC_INTERVAL,
+                 probe_max_age=PROBE_MAX_AGE, verify_rows=VERIFY_ROWS, clock=time.monotonic):
+        self.parse_rows = parse_rows
+        self.index = index
+        self.full_sync_interval = full_sync_interval
+        self.probe_max_age = probe_max_age
+        self.verify_rows = verify_rows
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.rows = []  # Raw rows including the header
+        self.fingerprints = []
+        self._ids = []
+        self._open_rows = set()  # Row numbers whose trade is still open
+        self._verify_from = 2  # First row of the next closed-row check
+        self._parsed = None  # Trades indexed by row number, None until the first parse
+        self._rejected = {}  # Row number -> reject rule, for rows the parse dropped
+        self._stale = set()  # Rows changed, added or removed since the last parse
+        self.last_full_sync = None
+        self.digest = 0
+        self.modified = None  # Spreadsheet modified time as of the last read
+        self._last_read = None
+
+        self.full_syncs = 0
+        self.probe_skips = 0
+        self.incremental_syncs = 0
+        self.rows_fetched = 0
+        self.rows_parsed = 0
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def sync(self, sheet, modified=None):
+        """Bring the mirror up to date; returns FULL, INCREMENTAL or UNCHANGED.
+
+        modified is the spreadsheet's last-modified time, when the caller has it.
+        """
+        with self._lock:
+            now = self._clock()
+            full_due = (not self.rows or self.last_full_sync is None or
+                        now - self.last_full_sync > self.full_sync_interval)
+            if (not full_due and modified is not None and modified == self.modified and
+                    now - self._last_read <= self.probe_max_age):
+                self.probe_skips += 1
+                return self.UNCHANGED
+
+            previous_modified = self.modified
+            self.modified = modified
+            self._last_read = now
+            if full_due:
+                return self._full_sync(sheet)
+
+            ids = [str(v).strip() for v in sheet.col_values(1)]
+            known = len(self._ids)
+            if len(ids) < known or ids[:known] != self._ids:
+                # Deleted, inserted or reordered rows shift everything below them
+                return self._full_sync(sheet)
+
+            fetch = set(self._open_rows)
+            fetch.update(range(known + 1, len(ids) + 1))
+            verify = self._verify_window(known)
+            fetch.update(verify)
+            if not fetch:
+                return self.UNCHANGED
+
+            fetch = sorted(fetch)
+            ranges = row_ranges(fetch)
+            fetched = sheet.batch_get(ranges)
+            changed = False
+            for range_name, values in zip(ranges, fetched):
+                first, last = (int(part[1:]) for part in range_name.split(':'))
+                values = list(values) + [[]] * (last - first + 1 - len(values))  # Trailing blank rows are omitted
+                for row_number, row in enumerate(values, first):
+                    if row_number <= known:
+                        changed |= self._set_row(row_number, list(row))
+                    else:
+                        self._append_row(list(row))
+                        changed = True
+
+            self.rows_fetched += len(fetch)
+            self._ids = ids
+            if verify:
+                self._verify_from = verify[-1] + 1
+            if not changed:
+                if modified is not None and previous_modified is not None and modified != previous_modified:
+                    # The sheet moved somewhere the open, new and verified rows don't cover
+                    return self._full_sync(sheet)
+                return self.UNCHANGED
+
+            self.incremental_syncs += 1
+            if self.index is not None and len(ids) > known:
+                self.index.rebuild_from_column(ids)
+            return self.INCREMENTAL
+
+    def _verify_window(self, known):
+        """Next verify_rows closed rows to re-read, wrapping to the top after the last row"""
+        if not self.verify_rows or known < 2:
+            return []
+        start = self._verify_from if self._verify_from <= known else 2
+        window = []
+        for n in range(start, known + 1):
+            if n not in self._open_rows:
+                window.append(n)
+                if len(window) == self.verify_rows:
+                    break
+        return window
+
+    def _append_row(self, row):
+        self.rows.append(row)
+        self.fingerprints.append(row_fingerprint(row))
+        self.digest ^= row_digest(len(self.rows), self.fingerprints[-1])
+        self._stale.add(len(self.rows))
+        if is_row_open(row):
+            self._open_rows.add(len(self.rows))
+
+    def _set_row(self, row_number, row):
+        fingerprint = row_fingerprint(row)
+        if fingerprint == self.fingerprints[row_number - 1]:
+            return False
+        self.digest ^= row_digest(row_number, self.fingerprints[row_number - 1]) ^ row_digest(row_number, fingerprint)
+        self.rows[row_number - 1] = row
+        self.fingerprints[row_number - 1] = fingerprint
+        self._stale.add(row_number)
+        if is_row_open(row):
+            self._open_rows.add(row_number)  # Closed rows can be reopened by hand
+        else:
+            self._open_rows.discard(row_number)
+        return True
+
+    def _full_sync(self, sheet):
+        all_values = sheet.get_all_values()
+        previous = self.digest if self.rows else None
+        old_fingerprints = self.fingerprints
+        self.rows = [list(row) for row in all_values]
+        self.fingerprints = [row_fingerprint(row) for row in self.rows]
+        # Rows whose content moved or changed are re-parsed; the rest keep their parsed trades
+        self._stale.update(n for n in range(1, max(len(old_fingerprints), len(self.fingerprints)) + 1)
+                           if n > len(old_fingerprints) or n > len(self.fingerprints) or
+                           old_fingerprints[n - 1] != self.fingerprints[n - 1])
+        self.digest = 0
+        for row_number, fingerprint in enumerate(self.fingerprints, 1):
+            self.digest ^= row_digest(row_number, fingerprint)
+        self._ids = [str(row[0]).strip() if row else '' for row in self.rows]
+        self._open_rows = {n for n in range(2, len(self.rows) + 1) if is_row_open(self.rows[n - 1])}
+        self.last_full_sync = self._clock()
+        self.full_syncs += 1
+        self.rows_fetched += len(self.rows)
+        if self.index is not None:
+            self.index.rebuild(self.rows)
+        if self.digest == previous:
+            return self.UNCHANGED  # Safety-net reload found nothing new; keep the parsed trades
+        return self.FULL
+
+    def trades(self):
+        """Parsed trades for the current mirror (only changed rows are re-parsed)"""
+        with self._lock:
+            if self._parsed is None or len(self._stale) > len(self.rows) // 2:
+                stale, self._parsed = range(2, len(self.rows) + 1), None
+                self._rejected = {}
+            else:
+                stale = sorted(n for n in self._stale if n > 1)  # Row 1 is the header
+            self._stale = set()
+            live = [n for n in stale if n <= len(self.rows)]
+            if stale or self._parsed is None:
+                patch, rejected = self.parse_rows([list(self.rows[0]) if self.rows else []] +
+                                                  [list(self.rows[n - 1]) for n in live], live)
+                self.rows_parsed += len(live)
+                if self._parsed is None:
+                    self._parsed = patch
+                else:
+                    for n in stale:
+                        self._rejected.pop(n, None)
+                    kept = self._parsed.drop(stale, errors='ignore')
+                    self._parsed = pd.concat([kept, patch]) if len(patch) else kept
+                    if len(patch) and len(kept) and patch.index[0] < kept.index[-1]:
+                        self._parsed = self._parsed.sort_index()
+                self._rejected.update(rejected)
+            # A copy, so callers mutating session trades never touch the mirror
+            return self._parsed.reset_index(drop=True)
+
+    def rejected(self):
+        """Rows the last trades() dropped, counted by reject rule"""
+        with self._lock:
+            return dict(Counter(self._rejected.values()))
+
+    def expect_changes(self):
+        """Our own write just landed: read the sheet on the next sync even if the modified time lags"""
+        with self._lock:
+            self.modified = None
+
+    def invalidate(self):
+        """Force the next sync to be a full reload"""
+        with self._lock:
+            self.last_full_sync = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': len(self.rows),
+                'full_syncs': self.full_syncs,
+                'incremental_syncs': self.incremental_syncs,
+                'probe_skips': self.probe_skips,
+                'rows_fetched': self.rows_fetched,
+                'rows_parsed': self.rows_parsed
+            }
@@ -0,0 +1,351 @@
+"""Trade data layer shared by the dashboard and the analytics pages.
+
+Google Sheets connection, sheet mirror and cached loading, parsing, the
+write-behind journal, and the Twelve Data client behind the live monitor.
+Importing it has no side effects: nothing runs until a function is called,
+so every page (and headless tooling) can use it without executing Aapp.py.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import gspread
+from google.oauth2.service_account import Credentials
+
+from bar_store import BarStore
+from data_version import DataVersion
+from ingest import parse_trade_rows_at
+from monitor import MONITOR_INTERVAL, PriceMonitor
+from profiling import get_profiler
+from quotes import QUOTE_CACHE_TTL, TWELVE_DATA_URL, PriceClient, QuoteCache, normalize_symbol
+from sheets import RowIndex
+from streaming import TWELVE_DATA_WS_URL, PriceStream
+from sync import SheetSync
+from trade_store import TradeStore
+from write_queue import WriteBehindQueue
+
+# Google Sheets Configuration
+SHEET_NAME = "Forex Trading Analytics"
+WORKSHEET_NAME = "Trades"
+
+# Cached loader configuration
+CACHE_TTL = 30  # Cache data for 30 seconds (longer cache)
+CACHE_VERSIONS = 4  # Data versions kept by the cached loaders before the oldest is evicted
+
+# Local journal of trade writes not yet flushed to Google Sheets
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".trade_journal.jsonl")
+
+# Local OHLC bar cache shared by the monitor, backtests and charts
+BAR_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bar_store")
+
+# Initialize Google Sheets connection
+@st.cache_resource
+def init_connection():
+    """Initialize connection to Google Sheets"""
+    try:
+        # Try to get credentials from Streamlit secrets
+        credentials = Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"],
+            scopes=[
+                "https://www.googleapis.com/auth/spreadsheets",
+                "https://www.googleapis.com/auth/drive"
+            ]
+        )
+        return gspread.authorize(credentials)
+    except Exception as e:
+        return None
+
+@st.cache_resource
+def get_row_index():
+    """Trade id -> sheet row index shared by every session in this process"""
+    return RowIndex()
+
+@st.cache_resource
+def get_data_version():
+    """Trade data version shared by every session; cached loaders are keyed on it"""
+    return DataVersion()
+
+@st.cache_resource
+def get_sheet_sync():
+    """Incremental mirror of the Trades worksheet shared by every session"""
+    return SheetSync(parse_trade_rows, index=get_row_index())
+
+def get_sheet_key():
+    """Spreadsheet key from the sheet_key secret, or None to open the sheet by name"""
+    try:
+        return st.secrets.get("sheet_key")
+    except:
+        return None
+
+@st.cache_resource
+def open_spreadsheet():
+    """The trades spreadsheet, opened once per server process.
+
+    open() by name is a Drive search plus a metadata fetch; with a sheet_key
+    secret open_by_key() skips the search. Raises while Google Sheets is
+    unreachable, and errors are not cached, so the next call tries again.
+    """
+    gc = init_connection()
+    if gc is None:
+        raise ConnectionError("Google Sheets is not connected")
+    key = get_sheet_key()
+    return gc.open_by_key(key) if key else gc.open(SHEET_NAME)
+
+@st.cache_resource
+def open_trades_worksheet():
+    """The Trades worksheet, fetched once per server process (raises if Google Sheets is unreachable)"""
+    return open_spreadsheet().worksheet(WORKSHEET_NAME)
+
+def reset_sheet_handles():
+    """Drop the cached spreadsheet/worksheet so the next call opens them again"""
+    open_trades_worksheet.clear()
+    open_spreadsheet.clear()
+
+def sync_sheet():
+    """Bring the local sheet mirror up to date (None when not connected)"""
+    if init_connection() is None:
+        return None
+    
+    spreadsheet = open_spreadsheet()
+    sheet = open_trades_worksheet()
+    
+    # One Drive metadata call; while the modified time stands still the sheet isn't read
+    profiler = get_profiler()
+    try:
+        with profiler.timed("sheets: modified-time probe"):
+            modified = spreadsheet.get_lastUpdateTime()
+    except Exception:
+        modified = None
+    
+    # Reads only new and still-open rows unless a structural change forces a full reload
+    mirror = get_sheet_sync()
+    try:
+        with profiler.timed("sheets: sync"):
+            outcome = mirror.sync(sheet, modified=modified)
+    except Exception:
+        reset_sheet_handles()  # The worksheet may be gone or re-created; reopen next time
+        raise
+    if outcome != SheetSync.UNCHANGED:
+        get_data_version().bump()
+    return mirror
+
+@st.cache_resource
+def get_ingest_report():
+    """Rows skipped by each validation rule on the last sheet parse"""
+    return {}
+
+def parse_trade_rows(all_values, row_numbers):
+    """Turn raw worksheet rows (header first) into trades indexed by row number, plus rejected rows"""
+    with get_profiler().timed("parse sheet rows", page="data", detail=f"{len(row_numbers)} rows"):
+        return parse_trade_rows_at(all_values, row_numbers)
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_VERSIONS, show_spinner=False)
+def load_trades_from_sheets(data_version=0):
+    """Load trades from Google Sheets, cached per data version (see get_data_version)"""
+    try:
+        mirror = sync_sheet()
+        
+        if mirror is None or mirror.row_count < 2:
+            return pd.DataFrame(load_fallback_data())
+        
+        trades_frame = mirror.trades()
+        report = get_ingest_report()
+        report.clear()
+        report.update(mirror.rejected())
+        return trades_frame if len(trades_frame) else pd.DataFrame(load_fallback_data())
+        
+    except:
+        return pd.DataFrame(load_fallback_data())
+
+def setup_google_sheet_silently():
+    """Set up the Google Sheet with proper headers if it doesn't exist - runs silently in background"""
+    try:
+        gc = init_connection()
+        if gc is None:
+            return False
+        
+        # Step 1: Handle the spreadsheet
+        try:
+            spreadsheet = open_spreadsheet()
+        except gspread.SpreadsheetNotFound:
+            # Create new spreadsheet
+            spreadsheet = gc.create(SHEET_NAME)
+        
+        # Step 2: Handle the worksheet
+        try:
+            worksheet = open_trades_worksheet()
+        except gspread.WorksheetNotFound:
+            # Create new worksheet named "Trades"
+            worksheet = spreadsheet.add_worksheet(title=WORKSHEET_NAME, rows=1000, cols=12)
+        
+        # Step 3: Setup headers
+        try:
+            headers = worksheet.row_values(1)
+            expected_headers = ['id', 'date', 'trader', 'instrument', 'entry', 'sl', 'target', 'risk', 'reward', 'rrRatio', 'outcome', 'result']
+            
+            if not headers or len(headers) == 0 or headers != expected_headers:
+                # Clear first row and set proper headers
+                worksheet.clear()  # Clear the worksheet first
+                worksheet.append_row(expected_headers)
+                get_row_index().invalidate()
+            
+        except Exception as e:
+            # Try to add headers anyway
+            try:
+                headers = ['id', 'date', 'trader', 'instrument', 'entry', 'sl', 'target', 'risk', 'reward', 'rrRatio', 'outcome', 'result']
+                worksheet.append_row(headers)
+            except:
+                pass
+        
+        return True
+        
+    except:
+        return False
+
+def get_journal_path():
+    """Journal location; a journal_path secret moves it (benchmarks use a scratch file)"""
+    try:
+        return st.secrets.get("journal_path", JOURNAL_PATH)
+    except:
+        return JOURNAL_PATH
+
+def sheet_written():
+    """The writer put rows in the sheet: re-read it on the next sync and move the data version on"""
+    get_sheet_sync().expect_changes()
+    get_data_version().bump()
+
+@st.cache_resource
+def start_write_queue():
+    """Start the write-behind sheet writer once per server process (replays the journal)"""
+    return WriteBehindQueue(get_journal_path(), open_trades_worksheet, get_row_index,
+                            on_written=sheet_written).start()
+
+def journal_trade_write(op, trade):
+    """Journal one trade write for the background writer and move the data version on"""
+    start_write_queue().record(op, trade)
+    get_data_version().bump()
+
+def queue_trade_updates(trades):
+    """Journal updated trades for the background writer"""
+    start_write_queue().record_many("update", trades)
+    get_data_version().bump()
+    return True
+
+def load_trades():
+    """Load trades into a TradeStore with any writes still waiting in the journal applied on top.
+
+    Returns (store, data version it was built at); callers keep the version
+    next to the store so they can tell when it falls behind.
+    """
+    data_version = get_data_version().value
+    store = TradeStore(load_trades_from_sheets(data_version))
+    if init_connection() is not None:
+        start_write_queue().apply_to(store)
+    return store, data_version
+
+def latest_data_version():
+    """The current data version, re-syncing the sheet first once the cached copy has expired.
+
+    A session whose store was built at an older version should reload it with load_trades().
+    """
+    load_trades_from_sheets(get_data_version().value)
+    return get_data_version().value
+
+def load_fallback_data():
+    """Load fallback data when Google Sheets is not available"""
+    return [
+        { 'id': 1, 'date': '2023-10-08', 'trader': 'Waithaka', 'instrument': 'XAUUSD', 'entry': 1820.50, 'sl': 1815.00, 'target': 1830.00, 'risk': 5.50, 'reward': 9.50, 'rrRatio': 1.73, 'outcome': 'Target Hit', 'result': 'Win' },
+        { 'id': 2, 'date': '2023-10-07', 'trader': 'Wallace', 'instrument': 'USOIL', 'entry': 89.30, 'sl': 88.50, 'target': 91.00, 'risk': 0.80, 'reward': 1.70, 'rrRatio': 2.13, 'outcome': 'SL Hit', 'result': 'Loss' },
+        { 'id': 3, 'date': '2023-10-06', 'trader': 'Max', 'instrument': 'BTCUSD', 'entry': 27450.00, 'sl': 27200.00, 'target': 27800.00, 'risk': 250.00, 'reward': 350.00, 'rrRatio': 1.40, 'outcome': 'Open', 'result': 'Open' },
+        { 'id': 4, 'date': '2023-10-05', 'trader': 'Waithaka', 'instrument': 'EURUSD', 'entry': 1.06250, 'sl': 1.06000, 'target': 1.06700, 'risk': 0.00250, 'reward': 0.00450, 'rrRatio': 1.80, 'outcome': 'Open', 'result': 'Open' },
+        { 'id': 5, 'date': '2023-10-04', 'trader': 'Wallace', 'instrument': 'US30', 'entry': 34500.00, 'sl': 34200.00, 'target': 34900.00, 'risk': 300.00, 'reward': 400.00, 'rrRatio': 1.33, 'outcome': 'Open', 'result': 'Open' }
+    ]
+
+
+def get_twelvedata_config():
+    """Read Twelve Data settings from Streamlit secrets"""
+    try:
+        config = st.secrets.get("twelvedata", {})
+        return config.get("api_key"), config.get("base_url", TWELVE_DATA_URL), float(config.get("cache_ttl", QUOTE_CACHE_TTL))
+    except:
+        return None, TWELVE_DATA_URL, QUOTE_CACHE_TTL
+
+def get_stream_config():
+    """WebSocket URL for streaming quotes when [twelvedata] stream = true, else None"""
+    try:
+        config = st.secrets.get("twelvedata", {})
+        return config.get("ws_url", TWELVE_DATA_WS_URL) if config.get("stream") else None
+    except:
+        return None
+
+@st.cache_resource
+def init_price_client(api_key, base_url=TWELVE_DATA_URL):
+    """Initialize pooled keep-alive client for Twelve Data"""
+    return PriceClient(api_key, base_url=base_url)
+
+@st.cache_resource
+def get_quote_cache(ttl=QUOTE_CACHE_TTL):
+    """Quote cache shared by every session in this server process"""
+    return QuoteCache(ttl=ttl)
+
+def get_live_prices(pairs) -> dict:
+    """Get live prices for several instruments in one batched Twelve Data call"""
+    api_key, base_url, cache_ttl = get_twelvedata_config()
+    if not api_key:
+        return {}
+
+    client = init_price_client(api_key, base_url)
+    prices = get_quote_cache(cache_ttl).get_many(pairs, client.fetch_prices)
+    # Map back to the instrument names used in the trades
+    return {pair: prices[normalize_symbol(pair)] for pair in pairs if pair and normalize_symbol(pair) in prices}
+
+def get_bar_store_path():
+    """Bar store location; a bar_store_path secret moves it"""
+    try:
+        return st.secrets.get("bar_store_path", BAR_STORE_PATH)
+    except:
+        return BAR_STORE_PATH
+
+@st.cache_resource
+def get_bar_store():
+    """On-disk bar store shared by every session in this process"""
+    return BarStore(get_bar_store_path())
+
+def get_recent_bars(pairs, start, interval=None):
+    """OHLC bars from start (naive UTC) for several instruments, read through the local bar store.
+
+    Only bars the store does not hold yet are fetched, in one batched Twelve Data call.
+    """
+    api_key, base_url, _ = get_twelvedata_config()
+    if not api_key:
+        return {}
+
+    client = init_price_client(api_key, base_url)
+    bars = get_bar_store().fetch_through(client.fetch_bars, pairs, start, interval)
+    # Map back to the instrument names used in the trades
+    return {pair: bars[normalize_symbol(pair)] for pair in pairs if pair and normalize_symbol(pair) in bars}
+
+def get_live_price(pair: str) -> float:
+    """Get live price from Twelve Data API"""
+    return get_live_prices([pair]).get(pair)
+
+def load_monitored_trades():
+    """Current trades for the background monitor, read through the sheet mirror"""
+    mirror = sync_sheet()
+    store = TradeStore(mirror.trades() if mirror is not None else pd.DataFrame())
+    start_write_queue().apply_to(store)
+    return store.records(np.flatnonzero(store.open_mask()))
+
+@st.cache_resource
+def start_price_monitor(interval=MONITOR_INTERVAL):
+    """Start the background SL/TP monitor once per server process (streaming ticks when configured)"""
+    ws_url = get_stream_config()
+    return PriceMonitor(
+        load_trades=load_monitored_trades,
+        fetch_prices=get_live_prices,
+        save_trades=queue_trade_updates,
+        interval=interval,
+        fetch_bars=get_recent_bars,
+        stream=PriceStream(ws_url, get_twelvedata_config()[0]) if ws_url else None
+    ).start()
@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+
+from analytics import build_cube
+from evaluator import OUTCOMES, evaluate_hits, is_trade_open
+from sheets import SHEET_COLUMNS
+
+MEMO_SIZE = 32  # Derived tables kept per data version (one per filter/grouping combination)
+
+CATEGORICAL_COLUMNS = ('trader', 'instrument', 'outcome', 'result')
+PRICE_COLUMNS = ('entry', 'sl', 'target', 'risk', 'reward', 'rrRatio')
+INSTRUMENT_ALIASES = {'USTECH': 'US30'}  # Fix USTECH to US30 for Wallace
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def _typed_frame(frame):
+    """Coerce a trades frame to the store's column types"""
+    frame = frame.reindex(columns=SHEET_COLUMNS)
+    frame['id'] = pd.to_numeric(frame['id'], errors='coerce').fillna(0).astype(np.int64)
+    frame['date'] = pd.to_datetime(frame['date'], errors='coerce', format='mixed')
+    for col in PRICE_COLUMNS:
+        frame[col] = pd.to_numeric(frame[col], errors='coerce').fillna(0.0).astype(np.float64)
+    for col in CATEGORICAL_COLUMNS:
+        values = frame[col].fillna('').astype(str)
+        if col == 'instrument':
+            values = values.str.upper().map(INSTRUMENT_ALIASES).fillna(values)
+        frame[col] = values.astype('category')
+    return frame.reset_index(drop=True)
+
+
+def _hash_rows(frame):
+    """Stable uint64 hash of each row's contents"""
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().copy()
+
+
+class TradeStore:
+    """Columnar, typed trade table with O(1) lookup by id.
+
+    Trader/instrument/outcome/result are categoricals, prices float64 and the
+    date datetime64, held in one DataFrame shared by the dashboard and both
+    analytics pages. All mutations go through update/append/delete so the id
+    index stays correct and ``version`` moves on; ``df`` is for reading only.
+    """
+
+    def __init__(self, frame):
+        self._df = _typed_frame(frame)
+        self._reindex()
+        self.version = 0  # Bumped by every mutation
+        self._cube = (None, None)  # (version, cube)
+        self._memo = (None, {})  # (version, {key: derived table})
+        self._row_hashes = None  # Per-row content hashes behind fingerprint(), built on first use
+        self._digest = 0
+        self._by_date = None  # (sort keys, row positions) newest first, built on first use
+        self._columns = None  # {column: array view} behind get(), built on first use
+
+    @classmethod
+    def from_records(cls, records):
+        return cls(pd.DataFrame.from_records(list(records), columns=SHEET_COLUMNS))
+
+    def _reindex(self):
+        self._ids = pd.Index(self._df['id'].to_numpy())
+
+    def _position(self, trade_id):
+        """Row position of a trade id, or None (hash lookup, no scan)"""
+        try:
+            pos = self._ids.get_loc(int(trade_id))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return pos if isinstance(pos, (int, np.integer)) else None  # Duplicate ids aren't addressable
+
+    @property
+    def df(self):
+        return self._df
+
+    def __len__(self):
+        return len(self._df)
+
+    def __contains__(self, trade_id):
+        return self._position(trade_id) is not None
+
+    def cube(self):
+        """(trader x instrument x day) aggregates, rebuilt only after the data changed"""
+        version, cube = self._cube
+        if version != self.version:
+            cube = build_cube(self._df)
+            self._cube = (self.version, cube)
+        return cube
+
+    def memo(self, key, compute):
+        """compute() cached under key until the data changes.
+
+        key should hold everything the result depends on besides the trades
+        (filters, grouping); entries from older versions are never returned.
+        """
+        version, entries = self._memo
+        if version != self.version:
+            entries = {}
+            self._memo = (self.version, entries)
+        if key not in entries:
+            if len(entries) >= MEMO_SIZE:
+                del entries[next(iter(entries))]  # Oldest first
+            entries[key] = compute()
+        return entries[key]
+
+    def fingerprint(self):
+        """Content hash of the whole table, for cheap 'did anything change' checks.
+
+        The sum (mod 2**64) of per-row hashes, so it is the same in every
+        process and mutations adjust it one row at a time instead of rehashing
+        the table.
+        """
+        if self._row_hashes is None:
+            self._row_hashes = _hash_rows(self._df)
+            self._digest = int(self._row_hashes.sum())
+        return self._digest
+
+    def _rehash(self, pos, removed=False):
+        """Keep the fingerprint current after row pos changed, was appended or is about to be removed"""
+        if self._row_hashes is None:
+            return
+        if pos < len(self._row_hashes):
+            self._digest -= int(self._row_hashes[pos])
+        if removed:
+            self._row_hashes = np.delete(self._row_hashes, pos)
+        else:
+            new = _hash_rows(self._df.iloc[[pos]])
+            if pos < len(self._row_hashes):
+                self._row_hashes[pos] = new[0]
+            else:
+                self._row_hashes = np.append(self._row_hashes, new)
+            self._digest += int(new[0])
+        self._digest %= 2 ** 64
+
+    def _date_keys(self, positions):
+        """Ascending sort keys for newest-first order (undated trades sort last)"""
+        dates = self._df['date'].to_numpy()[positions].astype('datetime64[ns]').view(np.int64)
+        return ~dates  # NaT is the smallest int64, so it becomes the largest key
+
+    def newest_first(self, start=0, stop=None):
+        """Row positions ordered by date, newest first (ties in sheet order, undated last).
+
+        The order is kept as trades are appended, so paging through history
+        doesn't re-sort the table on every rerun.
+        """
+        if self._by_date is None:
+            positions = np.arange(len(self._df))
+            keys = self._date_keys(positions)
+            order = np.argsort(keys, kind='stable')
+            self._by_date = (keys[order], positions[order])
+        return self._by_date[1][start:stop]
+
+    def max_id(self):
+        return int(self._df['id'].max()) if len(self._df) else 0
+
+    def _to_records(self, frame):
+        records = frame.to_dict('records')
+        for record in records:
+            record['id'] = int(record['id'])
+            record['date'] = record['date'].strftime(DATE_FORMAT) if pd.notna(record['date']) else ''
+        return records
+
+    def records(self, positions=None):
+        """Trades as plain dicts in the sheet layout (optionally only some rows)"""
+        frame = self._df if positions is None else self._df.iloc[positions]
+        return self._to_records(frame)
+
+    def _column_view(self, col):
+        """No-copy numpy view of a column; categoricals as (codes, categories)"""
+        series = self._df[col]
+        if col in CATEGORICAL_COLUMNS:
+            return series.cat.codes.to_numpy(), series.cat.categories.to_numpy(dtype=object)
+        return series.to_numpy()
+
+    def _refresh_columns(self, columns=SHEET_COLUMNS):
+        """Re-take the views after a mutation may have replaced the columns' storage"""
+        if self._columns is not None:
+            self._columns.update((col, self._column_view(col)) for col in columns)
+
+    def get(self, trade_id):
+        pos = self._position(trade_id)
+        if pos is None:
+            return None
+        if self._columns is None:
+            self._columns = {col: self._column_view(col) for col in SHEET_COLUMNS}
+        record = {}
+        for col, values in self._columns.items():
+            if col in CATEGORICAL_COLUMNS:
+                codes, categories = values
+                record[col] = categories[codes[pos]] if codes[pos] >= 0 else np.nan
+            else:
+                record[col] = values[pos]
+        record['id'] = int(record['id'])
+        record['date'] = pd.Timestamp(record['date']).strftime(DATE_FORMAT) if not np.isnat(record['date']) else ''
+        for col in PRICE_COLUMNS:
+            record[col] = float(record[col])
+        return record
+
+    def category_lookup(self, column, mapping, default=np.nan):
+        """Map a categorical column through a dict without touching every row in Python"""
+        series = self._df[column]
+        table = np.array([mapping.get(c, default) for c in series.cat.categories] + [default], dtype=np.float64)
+        return table[series.cat.codes.to_numpy()]  # Missing values (-1) pick the trailing default
+
+    def open_mask(self):
+        """Boolean array of trades still waiting on SL/TP"""
+        outcome = self._df['outcome']
+        is_open = np.array([is_trade_open({'outcome': c or 'Open'}) for c in outcome.cat.categories] + [True], dtype=bool)
+        return is_open[outcome.cat.codes.to_numpy()]
+
+    def find_hits(self, prices):
+        """Evaluate every open trade against {instrument: price} in one pass.
+
+        Returns a list of (trade id, outcome, result) for trades that were hit.
+        """
+        mask = self.open_mask()
+        if not mask.any():
+            return []
+        price = self.category_lookup('instrument', prices)
+        codes = evaluate_hits(
+            self._df['entry'].to_numpy()[mask], self._df['sl'].to_numpy()[mask],
+            self._df['target'].to_numpy()[mask], price[mask]
+        )
+        ids = self._df['id'].to_numpy()[mask]
+        return [(int(ids[i]), *OUTCOMES[int(codes[i])]) for i in np.flatnonzero(codes)]
+
+    def open_instruments(self):
+        """Sorted instruments that still have open trades"""
+        instruments = self._df.loc[self.open_mask(), 'instrument'].dropna().unique()
+        return sorted(str(i) for i in instruments if i)
+
+    def close_hits(self, hits):
+        """Record (trade id, outcome, result) hits on trades still open; returns the updated trades"""
+        updated = []
+        for trade_id, outcome, result in hits:
+            pos = self._position(trade_id)
+            if pos is not None and is_trade_open({'outcome': self._df['outcome'].iat[pos] or 'Open'}):
+                self.update(trade_id, outcome=outcome, result=result)
+                updated.append(self.get(trade_id))
+        return updated
+
+    def _ensure_categories(self, column, values):
+        missing = [v for v in dict.fromkeys(values) if v not in self._df[column].cat.categories]
+        if missing:
+            self._df[column] = self._df[column].cat.add_categories(missing)
+
+    def update(self, trade_id, **fields):
+        """Change fields of one trade; returns False if the id is unknown"""
+        pos = self._position(trade_id)
+        if pos is None:
+            return False
+        for col, value in fields.items():
+            if col == 'id':
+                continue
+            if col in CATEGORICAL_COLUMNS:
+                value = str(value)
+                if col == 'instrument':
+                    value = INSTRUMENT_ALIASES.get(value.upper(), value)
+                self._ensure_categories(col, [value])
+            elif col == 'date':
+                value = pd.to_datetime(value, errors='coerce')
+            elif col in PRICE_COLUMNS:
+                value = float(value)
+            self._df.iat[pos, self._df.columns.get_loc(col)] = value
+        self._refresh_columns([col for col in fields if col in SHEET_COLUMNS])
+        if 'date' in fields:
+            self._by_date = None
+        self._rehash(pos)
+        self.version += 1
+        return True
+
+    def append(self, trade):
+        """Add a trade (or replace it if the id already exists)"""
+        if trade['id'] in self:
+            return self.update(trade['id'], **trade)
+
+        row = _typed_frame(pd.DataFrame.from_records([trade], columns=SHEET_COLUMNS))
+        for col in CATEGORICAL_COLUMNS:
+            self._ensure_categories(col, row[col].tolist())
+            row[col] = row[col].cat.set_categories(self._df[col].cat.categories)
+        self._df = pd.concat([self._df, row], ignore_index=True)
+        self._ids = self._ids.append(pd.Index([int(trade['id'])]))
+        self._rehash(len(self._df) - 1)
+        self._refresh_columns()
+        if self._by_date is not None:
+            pos = len(self._df) - 1
+            keys, positions = self._by_date
+            key = self._date_keys([pos])[0]
+            at = np.searchsorted(keys, key, side='right')  # After older rows with the same date
+            self._by_date = (np.insert(keys, at, key), np.insert(positions, at, pos))
+        self.version += 1
+        return True
+
+    def delete(self, trade_id):
+        pos = self._position(trade_id)
+        if pos is None:
+            return False
+        self._rehash(pos, removed=True)
+        self._by_date = None
+        self._df = self._df.drop(index=pos).reset_index(drop=True)
+        self._reindex()
+        self._refresh_columns()
+        self.version += 1
+        return True
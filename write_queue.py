@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+
+from profiling import get_profiler
+from sheets import append_trade_rows, delete_trade_row, update_trade_rows
+
+FLUSH_INTERVAL = 2  # Seconds between background flushes
+MAX_BACKOFF = 60  # Longest wait between retries while the Sheets API is failing
+OPS = ("append", "update", "delete")
+
+
+def coalesce(entries):
+    """Collapse queued entries to at most one operation per trade id.
+
+    Returns (appends, updates, deletes) as lists of (trade id, trade) in
+    first-seen order. An update to a trade that was never flushed folds into
+    its append, and appending then deleting cancels out.
+    """
+    state, order = {}, []
+    for entry in entries:
+        key = str(entry['trade']['id'])
+        op, trade = entry['op'], entry['trade']
+        if key not in state:
+            order.append(key)
+            state[key] = (op, trade)
+            continue
+
+        previous = state[key]
+        if previous is None:
+            state[key] = (op, trade)
+        elif previous[0] == "append":
+            state[key] = None if op == "delete" else ("append", trade)
+        else:
+            state[key] = (op, trade)
+
+    grouped = {op: [] for op in OPS}
+    for key in order:
+        if state[key] is not None:
+            grouped[state[key][0]].append((key, state[key][1]))
+    return grouped["append"], grouped["update"], grouped["delete"]
+
+
+class WriteBehindQueue:
+    """Durable write-behind queue between the UI and the Trades worksheet.
+
+    Every mutation is appended (and fsynced) to a local JSON-lines journal
+    before the call returns, so the UI can update immediately. A background
+    thread coalesces pending entries and pushes them in batches, retrying with
+    backoff while the Sheets API is unavailable. Entries still in the journal
+    at start-up are replayed, so nothing is lost across restarts. Updates for
+    ids the sheet does not have stay in the journal, listed as ``unmatched``
+    in the snapshot, and are only retried alongside other pending writes.
+
+    An append that may already have reached the sheet (the call failed after
+    sending, or the process died before committing it) is only re-sent once
+    the ID column shows its id is missing; otherwise it becomes an update of
+    the row that landed, so retries never duplicate a trade.
+
+    get_sheet() -> worksheet, raises if Sheets is unreachable
+    get_index() -> sheets.RowIndex used to locate rows
+    on_written() -> called after rows reach the sheet, before their entries
+                    leave the journal (the app re-syncs its cached copy)
+    """
+
+    def __init__(self, path, get_sheet, get_index, interval=FLUSH_INTERVAL, on_written=None):
+        self.path = path
+        self.get_sheet = get_sheet
+        self.get_index = get_index
+        self.interval = interval
+        self.on_written = on_written
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._entries = []
+        self._seq = 0
+        self.flushed = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_flush = None
+        self.unmatched = set()  # Keys of updates whose trade id was not in the sheet
+        self._unconfirmed = set()  # Keys of appends that were sent (or replayed) but not committed
+        self._replay()
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash mid-write
+                if entry.get('op') in OPS and 'trade' in entry:
+                    self._entries.append(entry)
+                    self._seq = max(self._seq, entry.get('seq', 0))
+                    if entry['op'] == "append":
+                        self._unconfirmed.add(str(entry['trade']['id']))  # May have landed before a crash
+
+    def record(self, op, trade):
+        """Journal one mutation; returns its sequence number"""
+        return self.record_many(op, [trade])
+
+    def record_many(self, op, trades):
+        if op not in OPS:
+            raise ValueError(f"Unknown journal operation: {op}")
+        with self._lock:
+            lines = []
+            for trade in trades:
+                self._seq += 1
+                entry = {'seq': self._seq, 'op': op, 'trade': dict(trade), 'ts': time.time()}
+                self._entries.append(entry)
+                lines.append(json.dumps(entry, default=str))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            return self._seq
+
+    def pending(self):
+        with self._lock:
+            return list(self._entries)
+
+    def apply_to(self, store):
+        """Apply unflushed mutations on top of a TradeStore loaded from the sheet"""
+        appends, updates, deletes = coalesce(self.pending())
+        for key, _ in deletes:
+            store.delete(int(key))
+        for key, trade in updates:
+            store.update(int(key), **trade)
+        for key, trade in appends:
+            store.append(trade)
+        return store
+
+    def flush(self):
+        """Push pending entries to the sheet; returns how many entries were flushed"""
+        with self._flush_lock:
+            batch = self.pending()
+            if not batch:
+                return 0
+
+            appends, updates, deletes = coalesce(batch)
+            live_keys = {key for key, _ in appends + updates + deletes}
+            cancelled = {str(entry['trade']['id']) for entry in batch} - live_keys
+            if cancelled:
+                # Appended and deleted before ever reaching the sheet
+                self._commit(batch, cancelled)
+            if not live_keys:
+                return len(batch)
+            if live_keys <= self.unmatched:
+                return 0  # Nothing new; unmatched updates wait for other writes to retry with
+
+            sheet = self.get_sheet()
+            index = self.get_index()
+
+            # Each stage is committed on its own so a retry never re-appends rows
+            profiler = get_profiler()
+            if any(key in self._unconfirmed for key, _ in appends):
+                # An earlier attempt may have appended these: rows already there are updated instead
+                index.rebuild_from_column(sheet.col_values(1))
+                landed = {key for key, _ in appends if key in self._unconfirmed and index.row_for(key)}
+                updates = [item for item in appends if item[0] in landed] + updates
+                appends = [item for item in appends if item[0] not in landed]
+            if appends:
+                keys = {key for key, _ in appends}
+                self._unconfirmed |= keys
+                with profiler.timed("sheets: append rows", detail=f"{len(appends)} trades"):
+                    append_trade_rows(sheet, [t for _, t in appends], index)
+                self._commit(batch, keys, written=True)
+                self._unconfirmed -= keys
+            if updates:
+                with profiler.timed("sheets: update rows", detail=f"{len(updates)} trades"):
+                    _, skipped = update_trade_rows(sheet, [t for _, t in updates], index)
+                unmatched = {str(trade_id) for trade_id in skipped}
+                self._commit(batch, {key for key, _ in updates} - unmatched, written=True)
+                self._unconfirmed -= {key for key, _ in updates}
+                with self._lock:
+                    self.unmatched = unmatched
+            for key, trade in deletes:
+                with profiler.timed("sheets: delete row", detail=f"#{trade['id']}"):
+                    delete_trade_row(sheet, trade['id'], index)
+                self._commit(batch, {key}, written=True)
+
+            self.last_flush = time.time()
+            return sum(str(entry['trade']['id']) not in self.unmatched for entry in batch)
+
+    def _commit(self, batch, keys, written=False):
+        """Drop flushed entries and rewrite the journal with what is left.
+
+        With written (the entries reached the sheet) on_written runs first, so
+        a reload in between still finds each trade in the journal or the sheet.
+        """
+        done = {entry['seq'] for entry in batch if str(entry['trade']['id']) in keys}
+        if written and done and self.on_written is not None:
+            self.on_written()
+        with self._lock:
+            self._entries = [e for e in self._entries if e['seq'] not in done]
+            self.flushed += len(done)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, default=str) + "\n" for e in self._entries))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sheet-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.is_set():
+            try:
+                self.flush()
+                self.last_error = None
+                delay = self.interval
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                delay = min(delay * 2, MAX_BACKOFF)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pending': len(self._entries),
+                'flushed': self.flushed,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'last_flush': self.last_flush,
+                'unmatched': sorted(self.unmatched)
+            }